@@ -1,8 +1,16 @@
 from abc import ABC, abstractmethod
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.cancellation import get_cancellation_registry
+from messaging.kafka_producer import KafkaProducerClient, get_shared_producer
+from messaging.ledger import get_ledger, regeneration
+from messaging.partition_cache import get_partition_cache
+from messaging.retry import retry_or_dead_letter
+from messaging.topics import KafkaTopics
 from database.repositories import PodcastRepository
+from utils.exceptions import JobCancelledError
+from typing import Optional
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +19,13 @@ class BaseAgent(ABC):
     
     def __init__(self, name: str):
         self.name = name
-        self.producer = KafkaProducerClient()
+        self.producer = get_shared_producer(KafkaProducerClient)
         self.repo = PodcastRepository()
         self.logger = logging.getLogger(f"agent.{name}")
+        self.ledger = get_ledger()
+        self._execution = threading.local()  # ledger scope of the message being processed
+        self.partition_cache = get_partition_cache()
+        self.cancellations = get_cancellation_registry()
         
         # NEW: Add Prefect integration flag
         self.prefect_enabled = os.getenv('PREFECT_ENABLED', 'true').lower() == 'true'
@@ -23,14 +35,56 @@ class BaseAgent(ABC):
         """Process incoming message"""
         pass
     
+    def process_once(self, message: dict):
+        """Process a message unless this stage already handled the same content for the job"""
+        job_id = message.get("job_id")
+        key = self.ledger.key(job_id, self.name, message, regeneration(message))
+        entry = self.ledger.get(key)
+        if entry is not None:
+            self.logger.info(f"Job {job_id} already processed by {self.name}, re-sending recorded handoff")
+            self.ledger.redeliver(self.producer, entry)
+            return
+        
+        self._execution.key = key
+        self._execution.job_id = job_id
+        self._execution.recorded = False
+        self._execution.failed = False
+        try:
+            self.process(message)
+            if not self._execution.failed and not self._execution.recorded:
+                # Terminal stages (publishing) have no handoff to record
+                self.ledger.record(key, job_id, self.name)
+        finally:
+            self._execution.key = None
+    
+    def check_cancelled(self, job_id: str):
+        """Abort the stage if the job was cancelled; call between expensive steps"""
+        self.cancellations.check(job_id)
+    
     def send_to_next_stage(self, topic: str, message: dict) -> bool:
         """Send message to next stage"""
+        self.check_cancelled(message.get("job_id"))
+        key = getattr(self._execution, "key", None)
+        if key is not None:
+            # Record before sending so a redelivery re-sends instead of recomputing
+            self.ledger.record(key, self._execution.job_id, self.name, topic, message)
+            self._execution.recorded = True
+        # Always wait for the ack: the consumer commits this record once the handler returns
         return self.producer.send_message(topic, message)
     
+    def get_job(self, job_id: str):
+        """
+        Get the job row, cached while this worker owns the job's partition
+
+        The row is a snapshot: use it for fields that are settled by the time
+        the job reaches this stage (brief, outline, script, audio_url).
+        """
+        return self.partition_cache.get(job_id, f"job:{self.name}", lambda: self.repo.get_job(job_id))
+    
     def update_job_status(self, job_id: str, status: str):
         """Update job status in database"""
         try:
-            self.repo.update_job(job_id, {"status": status})
+            self.repo.update_job_fields(job_id, {"status": status})
             
             # NEW: Optional Prefect state update
             if self.prefect_enabled:
@@ -48,22 +102,34 @@ class BaseAgent(ABC):
         except Exception as e:
             self.logger.warning(f"Failed to update Prefect state: {str(e)}")
     
-    def handle_error(self, job_id: str, error: str):
-        """Handle processing errors"""
+    def handle_error(self, job_id: str, error: str, message: Optional[dict] = None,
+                     exc: Optional[BaseException] = None):
+        """Handle processing errors: retry transient failures with backoff, dead-letter the rest"""
+        self._execution.failed = True
+        if isinstance(exc, JobCancelledError):
+            # Already marked failed by the cancel request; nothing to retry or dead-letter
+            self.logger.info(f"Stopped {self.name} for cancelled job {job_id}")
+            return
         self.logger.error(f"Error in {self.name} for job {job_id}: {error}")
         try:
-            self.repo.update_job(job_id, {
+            if message is not None and exc is not None:
+                attempt = retry_or_dead_letter(self.producer, self.name, None, message, exc,
+                                               extra={"job_id": job_id, "agent": self.name, "error": error})
+                if attempt is not None:
+                    self.repo.update_job_fields(job_id, {"retry_count": attempt})
+                    return
+            else:
+                self.producer.send_message(KafkaTopics.DLQ, {
+                    "job_id": job_id,
+                    "agent": self.name,
+                    "error": error
+                })
+            
+            self.repo.update_job_fields(job_id, {
                 "status": "FAILED",
                 "error_message": error
             })
             
-            # Send to DLQ
-            self.producer.send_message("podcast.dlq", {
-                "job_id": job_id,
-                "agent": self.name,
-                "error": error
-            })
-            
             # NEW: Optional Prefect error notification
             if self.prefect_enabled:
                 self._notify_prefect_error(job_id, error)
@@ -3,9 +3,11 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai.chat_models import ChatOpenAI
 from langchain_core.output_parsers import PydanticOutputParser
 from api.schemas import OutlineStructure
+from messaging.ledger import REGENERATION_FIELD, regeneration
 from messaging.topics import KafkaTopics
 from database.models import JobStatus
 from utils.config import config
+from utils.circuit_breaker import LLM, get_breaker
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,7 +70,7 @@ Additional Context: {additional_context}""")
             # Create the chain
             chain = self.prompt | self.llm | self.parser
 
-            outline = chain.invoke({
+            outline = get_breaker(LLM).call(chain.invoke, {
                 "topic": brief.get("topic", ""),
                 "tone": brief.get("tone", ""),
                 "length_minutes": brief.get("length_minutes", 10),
@@ -79,8 +81,11 @@ Additional Context: {additional_context}""")
                 "format_instructions": self.parser.get_format_instructions()
             })
 
+            # The job may have been cancelled while the LLM call ran
+            self.check_cancelled(job_id)
+
             # Save generated outline to DB
-            self.repo.update_job(job_id, {"outline": outline.model_dump()})
+            self.repo.update_job_fields(job_id, {"outline": outline.model_dump()})
 
             # Send to next stage
             self.send_to_next_stage(
@@ -88,10 +93,11 @@ Additional Context: {additional_context}""")
                 {
                     "job_id": job_id,
                     "outline": outline.model_dump(),
-                    "brief": brief
+                    "brief": brief,
+                    REGENERATION_FIELD: regeneration(message)
                 }
             )
 
         except Exception as e:
             self.logger.error(f"Outline generation failed for job {job_id}: {str(e)}")
-            self.handle_error(job_id, f"Outline generation failed: {str(e)}")
+            self.handle_error(job_id, f"Outline generation failed: {str(e)}", message=message, exc=e)
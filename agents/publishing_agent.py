@@ -22,7 +22,7 @@ class PublishingAgent(BaseAgent):
             self.update_job_status(job_id, JobStatus.PUBLISHING.value)
             
             # Get job details
-            job = self.repo.get_job(job_id)
+            job = self.get_job(job_id)
             if not job:
                 raise Exception(f"Job {job_id} not found")
             
@@ -36,7 +36,7 @@ class PublishingAgent(BaseAgent):
             metadata_url = self._create_metadata(job)
             
             # Update database
-            self.repo.update_job(job_id, {
+            self.repo.update_job_fields(job_id, {
                 "status": JobStatus.COMPLETED.value,
                 "rss_feed_url": rss_feed_url,
                 "completed_at": datetime.now(timezone.utc)
@@ -45,7 +45,7 @@ class PublishingAgent(BaseAgent):
             self.logger.info(f"Successfully published podcast for job {job_id}")
             
         except Exception as e:
-            self.handle_error(job_id, f"Publishing failed: {str(e)}")
+            self.handle_error(job_id, f"Publishing failed: {str(e)}", message=message, exc=e)
     
     def _create_rss_entry(self, job) -> ET.Element:
         """Create RSS entry for podcast"""
@@ -1,9 +1,11 @@
 from agents.base_agent import BaseAgent
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai.chat_models import ChatOpenAI
+from messaging.ledger import REGENERATION_FIELD, regeneration
 from messaging.topics import KafkaTopics
 from database.models import JobStatus
 from utils.config import config
+from utils.circuit_breaker import LLM, get_breaker
 from utils.fact_checker import FactChecker
 import logging
 
@@ -64,7 +66,8 @@ class ScriptAgent(BaseAgent):
             self.update_job_status(job_id, JobStatus.SCRIPT_GENERATION.value)
             
             # Generate script using updated langchain syntax
-            script_response = self.llm.invoke(
+            script_response = get_breaker(LLM).call(
+                self.llm.invoke,
                 self.prompt.format_prompt(
                     title=outline["title"],
                     tone=brief["tone"],
@@ -80,13 +83,18 @@ class ScriptAgent(BaseAgent):
             if not message.get("skip_fact_check", False):
                 fact_check_results = self.fact_checker.check_script(script)
                 if fact_check_results["needs_correction"]:
+                    # Skip the second LLM call if the job was cancelled during the first
+                    self.check_cancelled(job_id)
                     script = self._regenerate_with_corrections(
                         script, 
                         fact_check_results["corrections"]
                     )
             
+            # The job may have been cancelled while the LLM calls ran
+            self.check_cancelled(job_id)
+            
             # Save script to database
-            self.repo.update_job(job_id, {"script": script})
+            self.repo.update_job_fields(job_id, {"script": script})
             
             # Send to evaluation
             self.send_to_next_stage(
@@ -95,12 +103,13 @@ class ScriptAgent(BaseAgent):
                     "job_id": job_id,
                     "script": script,
                     "outline": outline,
-                    "brief": brief
+                    "brief": brief,
+                    REGENERATION_FIELD: regeneration(message)
                 }
             )
             
         except Exception as e:
-            self.handle_error(job_id, f"Script generation failed: {str(e)}")
+            self.handle_error(job_id, f"Script generation failed: {str(e)}", message=message, exc=e)
     
     def _format_outline(self, outline: dict) -> str:
         """Format outline for prompt"""
@@ -126,7 +135,8 @@ class ScriptAgent(BaseAgent):
             Revise the script with these corrections integrated naturally.""")
         ])
         
-        response = self.llm.invoke(
+        response = get_breaker(LLM).call(
+            self.llm.invoke,
             correction_prompt.format_prompt(
                 script=script, 
                 corrections="\n".join(corrections)
@@ -1,4 +1,5 @@
 from agents.base_agent import BaseAgent
+from messaging.priority import lane_topic, normalize_priority
 from messaging.topics import KafkaTopics
 from database.models import JobStatus
 from datetime import datetime, timezone
@@ -26,21 +27,24 @@ class SupervisorAgent(BaseAgent):
         self.logger.info(f"Starting job {job_id}")
         
         # Ensure user_email is included in the brief
-        if 'user_email' not in brief:
+        if not brief.get('user_email'):
             brief['user_email'] = os.getenv('DEFAULT_APPROVAL_EMAIL')
         
         # Update status
         self.update_job_status(job_id, JobStatus.OUTLINE_GENERATION.value)
         
         # Update job with user email
-        self.repo.update_job(job_id, {"user_email": brief.get('user_email')})
+        self.repo.update_job_fields(job_id, {"user_email": brief.get('user_email')})
         
-        # Start Kafka workflow (immediate processing)
+        # Start Kafka workflow on the job's priority lane; later stages inherit it
+        priority = normalize_priority(brief.get('priority')) or KafkaTopics.DEFAULT_PRIORITY
+        brief['priority'] = priority
         kafka_success = self.send_to_next_stage(
-            KafkaTopics.OUTLINE_GENERATION,
+            lane_topic(KafkaTopics.OUTLINE_GENERATION, priority),
             {
                 "job_id": job_id,
-                "brief": brief
+                "brief": brief,
+                "priority": priority
             }
         )
         
@@ -1,9 +1,11 @@
 from agents.base_agent import BaseAgent
 from google.cloud import texttospeech
+from messaging.ledger import REGENERATION_FIELD, regeneration
 from messaging.topics import KafkaTopics
 from database.models import JobStatus
 from storage.s3_client import S3Client
 from utils.config import config
+from utils.circuit_breaker import TTS, get_breaker
 from pydub import AudioSegment
 import tempfile
 import os
@@ -79,15 +81,17 @@ class TTSAgent(BaseAgent):
                 ssml_script, voice, audio_config, job_id
             )
             
-            # Upload to S3
+            # Upload to S3 (skipped if the job was cancelled during synthesis)
             s3_key = f"podcasts/{job_id}/audio.mp3"
-            audio_url = self.s3_client.upload_file(final_audio_path, s3_key)
-            
-            # Clean up temp file
-            os.unlink(final_audio_path)
+            try:
+                self.check_cancelled(job_id)
+                audio_url = self.s3_client.upload_file(final_audio_path, s3_key)
+            finally:
+                # Clean up temp file
+                os.unlink(final_audio_path)
             
             # Update database
-            self.repo.update_job(job_id, {"audio_url": audio_url})
+            self.repo.update_job_fields(job_id, {"audio_url": audio_url})
             
             # Send to evaluation
             self.send_to_next_stage(
@@ -95,12 +99,13 @@ class TTSAgent(BaseAgent):
                 {
                     "job_id": job_id,
                     "audio_url": audio_url,
-                    "script": script
+                    "script": script,
+                    REGENERATION_FIELD: regeneration(message)
                 }
             )
             
         except Exception as e:
-            self.handle_error(job_id, f"TTS generation failed: {str(e)}")
+            self.handle_error(job_id, f"TTS generation failed: {str(e)}", message=message, exc=e)
     
     def _generate_chunked_audio(self, ssml_script: str, voice, audio_config, job_id: str) -> str:
         """Generate audio from SSML script, chunking if necessary"""
@@ -123,6 +128,8 @@ class TTSAgent(BaseAgent):
         audio_files = []
         try:
             for i, chunk in enumerate(chunks):
+                # A cancelled job stops before the next paid synthesis call
+                self.check_cancelled(job_id)
                 self.logger.info(f"Generating chunk {i+1}/{len(chunks)} for job {job_id}")
                 audio_file = self._generate_single_audio(chunk, voice, audio_config)
                 audio_files.append(audio_file)
@@ -146,7 +153,8 @@ class TTSAgent(BaseAgent):
         synthesis_input = texttospeech.SynthesisInput(ssml=ssml_script)
         
         # Generate audio
-        response = self.tts_client.synthesize_speech(
+        response = get_breaker(TTS).call(
+            self.tts_client.synthesize_speech,
             input=synthesis_input,
             voice=voice,
             audio_config=audio_config
@@ -22,6 +22,11 @@ def create_app():
         logger.error(f"Failed to initialize database: {str(e)}")
         raise
 
+    # Start jobs admission control held back, including those held before a restart
+    if config.ADMISSION_CONTROL_ENABLED:
+        from services.admission import admission
+        admission.start_releasing(podcast.start_held_job)
+
     # Register all blueprints
     app.register_blueprint(podcast.bp, url_prefix='/api/v1/podcast')
     app.register_blueprint(approval.bp, url_prefix='/api/v1/approval')
@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify, request
 from database.repositories import PodcastRepository
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.cancellation import get_cancellation_registry
+from messaging.dlq_replay import DLQReplayer
+from messaging.kafka_producer import get_shared_producer
 from messaging.topics import KafkaTopics
+from datetime import datetime, timezone
 import logging
+import threading
 
 bp = Blueprint('admin', __name__)
 logger = logging.getLogger(__name__)
@@ -20,15 +24,18 @@ def retry_job(job_id):
         if job.status.value != "FAILED":
             return jsonify({"error": "Job is not in failed state"}), 400
         
-        # Reset job status and retry
-        repo.update_job(job_id, {
-            "status": "PENDING",
+        # Reset job status and retry (not PENDING: that is for jobs held back at admission)
+        repo.update_job_fields(job_id, {
+            "status": "OUTLINE_GENERATION",
             "error_message": None,
             "retry_count": job.retry_count + 1
         })
         
+        # A cancelled job being retried must not be skipped by the workers
+        get_cancellation_registry().restore(job_id)
+        
         # Send to outline generation to restart
-        producer = KafkaProducerClient()
+        producer = get_shared_producer()
         producer.send_message(KafkaTopics.OUTLINE_GENERATION, {
             "job_id": job_id,
             "brief": job.brief,
@@ -55,11 +62,14 @@ def cancel_job(job_id):
             return jsonify({"error": "Job cannot be cancelled"}), 400
         
         # Update job status to failed
-        repo.update_job(job_id, {
+        repo.update_job_fields(job_id, {
             "status": "FAILED",
             "error_message": "Job cancelled by user"
         })
         
+        # Stop queued and in-flight work for the job
+        get_cancellation_registry().cancel(job_id)
+        
         return jsonify({"message": "Job cancelled successfully"}), 200
     
     except Exception as e:
@@ -73,15 +83,14 @@ def system_status():
         # Check database connection
         repo = PodcastRepository()
         try:
-            repo.get_all_jobs()
+            repo.list_jobs(limit=1, fields=["job_id"])
             db_status = "healthy"
         except Exception:
             db_status = "unhealthy"
         
         # Check Kafka connection
         try:
-            producer = KafkaProducerClient()
-            kafka_status = "healthy"
+            kafka_status = "healthy" if get_shared_producer().is_connected() else "unhealthy"
         except Exception:
             kafka_status = "unhealthy"
         
@@ -93,4 +102,66 @@ def system_status():
     
     except Exception as e:
         logger.error(f"Error getting system status: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def _parse_dlq_filters(source) -> dict:
+    since = source.get("since")
+    return {
+        "job_id": source.get("job_id"),
+        "stage": source.get("stage"),
+        "error_class": source.get("error_class"),
+        "since": datetime.fromisoformat(since) if since else None
+    }
+
+@bp.route('/dlq', methods=['GET'])
+def dlq_summary():
+    """Summarize replayable DLQ entries, optionally filtered by job, stage or error class"""
+    try:
+        index = DLQReplayer().load_index()
+        entries = index.query(**_parse_dlq_filters(request.args))
+        
+        return jsonify({
+            "summary": index.summary(),
+            "entries": [{
+                "job_id": entry.job_id,
+                "stage": entry.stage,
+                "error_class": entry.error_class,
+                "error": entry.error,
+                "original_topic": entry.original_topic,
+                "failed_at": datetime.fromtimestamp(entry.timestamp / 1000, timezone.utc).isoformat()
+            } for entry in entries]
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error reading DLQ: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/dlq/replay', methods=['POST'])
+def dlq_replay():
+    """Replay matching DLQ entries to their original topics (throttled, deduplicated)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        replayer = DLQReplayer(repo=PodcastRepository())
+        index = replayer.load_index()
+        entries = index.query(**_parse_dlq_filters(data))
+        
+        options = {
+            "rate": data.get("rate"),
+            "concurrency": data.get("concurrency")
+        }
+        
+        if data.get("dry_run"):
+            return jsonify(replayer.replay(index, entries, dry_run=True, **options)), 200
+        
+        # Throttled replays of hundreds of jobs take minutes, so run them in the background
+        threading.Thread(target=replayer.replay, args=(index, entries), kwargs=options,
+                         name="dlq-replay", daemon=True).start()
+        
+        return jsonify({"message": "DLQ replay started", "matched": len(entries)}), 202
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error replaying DLQ: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from api.schemas import ApprovalRequest
 from database.repositories import PodcastRepository
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.kafka_producer import get_shared_producer
 from messaging.topics import KafkaTopics
+from utils.config import config
 
 bp = Blueprint('approval', __name__)
 repo = PodcastRepository()
-producer = KafkaProducerClient()
+
+def _send(topic: str, message: dict):
+    """Hand off to the next stage, without blocking the request when async sends are enabled"""
+    producer = get_shared_producer()
+    if config.KAFKA_PRODUCER_ASYNC:
+        return producer.send_message_async(topic, message) is not None
+    return producer.send_message(topic, message)
 
 @bp.route('/<job_id>/outline', methods=['POST'])
 def approve_outline(job_id):
@@ -20,9 +27,9 @@ def approve_outline(job_id):
             return jsonify({"error": "Job not found"}), 404
         
         if approval.approved:
-            repo.update_job(job_id, {"outline_approved": True})
+            repo.update_job_fields(job_id, {"outline_approved": True})
             # Send to script generation
-            producer.send_message(
+            _send(
                 KafkaTopics.SCRIPT_GENERATION,
                 {
                     "job_id": job_id,
@@ -32,7 +39,7 @@ def approve_outline(job_id):
             )
         else:
             # Send back for regeneration with feedback
-            producer.send_message(
+            _send(
                 KafkaTopics.OUTLINE_GENERATION,
                 {
                     "job_id": job_id,
@@ -59,19 +66,22 @@ def approve_script(job_id):
             return jsonify({"error": "Job not found"}), 404
         
         if approval.approved:
-            repo.update_job(job_id, {"script_approved": True})
+            repo.update_job_fields(job_id, {"script_approved": True})
             # Send to TTS generation
-            producer.send_message(
+            _send(
                 KafkaTopics.TTS_GENERATION,
                 {
                     "job_id": job_id,
                     "script": job.script,
-                    "voice_preference": job.brief.get("voice_preference")
+                    "voice_preference": job.brief.get("voice_preference"),
+                    "priority": job.brief.get("priority"),
+                    "deliver_by": job.brief.get("deliver_by"),
+                    "tenant": job.brief.get("tenant") or job.brief.get("user_email")
                 }
             )
         else:
             # Send back for regeneration
-            producer.send_message(
+            _send(
                 KafkaTopics.SCRIPT_GENERATION,
                 {
                     "job_id": job_id,
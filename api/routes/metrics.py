@@ -1,31 +1,24 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from utils.monitoring import metrics
-from database.repositories import PodcastRepository
+from database.job_stats import JobStatistics
+from messaging.queue_manager import queue_stats
+from services.admission import admission
 import logging
 
 bp = Blueprint('metrics', __name__)
 logger = logging.getLogger(__name__)
+job_stats = JobStatistics()
 
 @bp.route('/metrics', methods=['GET'])
 def get_metrics():
     """Get system metrics"""
     try:
-        repo = PodcastRepository()
-        jobs = repo.get_all_jobs()
-        
-        # Calculate statistics
-        total_jobs = len(jobs)
-        completed_jobs = len([j for j in jobs if j.status.value == "COMPLETED"])
-        failed_jobs = len([j for j in jobs if j.status.value == "FAILED"])
-        pending_jobs = len([j for j in jobs if j.status.value in ["PENDING", "OUTLINE_GENERATION", "SCRIPT_GENERATION"]])
-        
+        # Counts per status from the summary table, not from loading every job
         system_metrics = {
-            "total_jobs": total_jobs,
-            "completed_jobs": completed_jobs,
-            "failed_jobs": failed_jobs,
-            "pending_jobs": pending_jobs,
-            "success_rate": (completed_jobs / total_jobs * 100) if total_jobs > 0 else 0,
-            "performance_metrics": metrics.get_metrics()
+            **job_stats.summary(),
+            "performance_metrics": metrics.get_metrics(),
+            "queue_stats": queue_stats.get_stats(refresh=request.args.get('refresh') == 'true'),
+            "admission": admission.summary()
         }
         
         return jsonify(system_metrics), 200
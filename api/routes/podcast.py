@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from api.schemas import PodcastBrief, PodcastJobResponse, JobStatusResponse
 from database.repositories import PodcastRepository
 from agents.supervisor_agent import SupervisorAgent
+from messaging.fairness import DEFAULT_TENANT, api_key_tenant
+from services.admission import QUEUE, REJECT, admission
+from utils.config import config
 import uuid
 from datetime import datetime, timezone
 import requests
@@ -19,6 +22,21 @@ def create_podcast():
             return jsonify({"error": "No data provided"}), 400
             
         brief = PodcastBrief(**brief_data)
+        brief_dict = brief.model_dump(mode="json")
+
+        # Fair-share tenant: the submitter's email, else their API key
+        api_key = request.headers.get("X-API-Key")
+        brief_dict["tenant"] = brief.user_email or (api_key_tenant(api_key) if api_key else DEFAULT_TENANT)
+
+        # Turn the job away before creating it if the pipeline is saturated
+        decision = admission.admit(brief_dict["tenant"])
+        if decision.action == REJECT:
+            response = jsonify({
+                "error": "Pipeline is at capacity, retry later",
+                "retry_after_seconds": decision.retry_after_seconds
+            })
+            response.headers["Retry-After"] = str(decision.retry_after_seconds)
+            return response, 429
 
         # Generate job ID
         job_id = f"job_{uuid.uuid4().hex[:12]}"
@@ -26,15 +44,28 @@ def create_podcast():
         # Create job in the database
         job = repo.create_job(
             job_id=job_id,
-            brief=brief.model_dump()
+            brief=brief_dict
         )
 
-        # Start the job using supervisor agent
-        supervisor = SupervisorAgent()
-        result = supervisor.start_job(job_id, brief.model_dump())
-        
-        if "error" in result:
-            return jsonify({"error": result["error"]}), 500
+        if decision.action == QUEUE:
+            # Held as PENDING; admission.release starts it once the pipeline has room
+            admission.start_releasing(start_held_job)
+            return jsonify(PodcastJobResponse(
+                job_id=job_id,
+                status="queued",
+                created_at=datetime.now(timezone.utc),
+                message="Podcast generation job queued behind earlier jobs",
+                queue_position=decision.queue_position,
+                estimated_start_at=decision.estimated_start_at
+            ).model_dump()), 202
+
+        # Start the job using supervisor agent, unless a release claimed it first
+        if repo.claim_pending_job(job_id):
+            supervisor = SupervisorAgent()
+            result = supervisor.start_job(job_id, dict(brief_dict))
+
+            if "error" in result:
+                return jsonify({"error": result["error"]}), 500
 
         return jsonify(PodcastJobResponse(
             job_id=job_id,
@@ -46,6 +77,11 @@ def create_podcast():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+def start_held_job(job_id: str, brief: dict) -> bool:
+    """Start a job admission held back; passed to admission.start_releasing"""
+    result = SupervisorAgent().start_job(job_id, brief)
+    return "error" not in result
+
 @bp.route('/<job_id>/status', methods=['GET'])
 def get_job_status(job_id):
     """Get the status of a podcast generation job"""
@@ -71,21 +107,46 @@ def get_job_status(job_id):
 
 @bp.route('/jobs', methods=['GET'])
 def list_jobs():
-    """List all podcast generation jobs"""
+    """
+    List podcast generation jobs, newest first, one page at a time
+
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    status (comma-separated), created_after, created_before (ISO-8601),
+    fields (comma-separated job columns or "topic").
+    """
     try:
-        jobs = repo.get_all_jobs()
+        limit = min(int(request.args.get("limit", config.JOB_LIST_PAGE_SIZE)), config.JOB_LIST_MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        jobs, next_cursor = repo.list_jobs(
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            statuses=_split_arg("status"),
+            created_after=_time_arg("created_after"),
+            created_before=_time_arg("created_before"),
+            fields=_split_arg("fields")
+        )
         return jsonify({
             "jobs": [
-                {
-                    "job_id": job.job_id,
-                    "status": job.status.value,
-                    "topic": job.brief.get("topic", "Unknown"),
-                    "created_at": job.created_at.isoformat() if job.created_at else None,
-                    "updated_at": job.updated_at.isoformat() if job.updated_at else None
-                }
+                {key: value.isoformat() if isinstance(value, datetime) else value for key, value in job.items()}
                 for job in jobs
-            ]
+            ],
+            "next_cursor": next_cursor
         }), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
\ No newline at end of file
+        return jsonify({"error": str(e)}), 400
+
+def _split_arg(name: str):
+    value = request.args.get(name)
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+def _time_arg(name: str):
+    """ISO-8601 query parameter as naive UTC, like the stored timestamps"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -10,6 +10,11 @@ class PodcastTone(str, Enum):
     ENTERTAINING = "entertaining"
     INSPIRATIONAL = "inspirational"
 
+class PodcastPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
 class PodcastBrief(BaseModel):
     topic: str = Field(..., description="Main topic of the podcast")
     tone: PodcastTone = Field(..., description="Desired tone of the podcast")
@@ -19,12 +24,17 @@ class PodcastBrief(BaseModel):
     avoid_topics: Optional[List[str]] = Field(None, description="Topics to avoid")
     voice_preference: Optional[str] = Field(None, description="Voice preference for TTS")
     additional_context: Optional[str] = Field(None, description="Any additional context")
+    priority: PodcastPriority = Field(PodcastPriority.NORMAL, description="Processing lane for every stage of the job")
+    user_email: Optional[str] = Field(None, description="Submitter; receives approval emails and is the fair-share tenant")
+    deliver_by: Optional[datetime] = Field(None, description="Deadline for the finished episode; stages run earlier deadlines first")
 
 class PodcastJobResponse(BaseModel):
     job_id: str
     status: str
     created_at: datetime
     message: str
+    queue_position: Optional[int] = None
+    estimated_start_at: Optional[datetime] = None
 
 class JobStatusResponse(BaseModel):
     job_id: str
@@ -9,6 +9,10 @@ logger = logging.getLogger(__name__)
 engine = create_engine(config.DATABASE_URL, echo=False, pool_pre_ping=True)
 SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 
+def get_engine():
+    """Get the shared database engine"""
+    return engine
+
 def init_db():
     """Initialize database tables"""
     try:
@@ -0,0 +1,122 @@
+from database.connection import SessionLocal
+from database.models import JobStatus, PodcastJob
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, MetaData, String, Table, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Migration that installs the summary table and the triggers maintaining it (database/migrations/versions.py)
+SUMMARY_MIGRATION = 4
+
+# Statuses /api/v1/metrics reports as pending
+PENDING_STATUSES = ["PENDING", "OUTLINE_GENERATION", "SCRIPT_GENERATION"]
+
+metadata = MetaData()
+
+# Per status: jobs in it now, jobs that have left it, and the time they spent in it
+job_status_summary = Table(
+    "job_status_summary", metadata,
+    Column("status", String(50), primary_key=True),
+    Column("jobs", BigInteger, nullable=False),
+    Column("exits", BigInteger, nullable=False),
+    Column("exit_seconds", Float, nullable=False)
+)
+
+# One row per status a job has left
+job_status_transitions = Table(
+    "job_status_transitions", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("job_id", String(100), nullable=False),
+    Column("status", String(50), nullable=False),
+    Column("seconds", Float, nullable=False),
+    Column("exited_at", DateTime, nullable=False)
+)
+
+class JobStatistics:
+    """
+    Job counts per status, success rate and time spent per stage
+
+    Once the summary migration is applied, triggers update job_status_summary
+    in the same transaction as every job insert and status change, and
+    summary() reads its one row per status however many jobs are stored.
+    compute() derives the same figures with GROUP BY queries over the jobs
+    and their status transitions; summary() falls back to it until then.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or SessionLocal
+        self._maintained = False
+
+    def summary(self) -> Dict[str, Any]:
+        """Current figures, from the summary table when it is maintained"""
+        session = self.session_factory()
+        try:
+            if not self._is_maintained(session):
+                return self._compute(session)
+            rows = session.execute(select(
+                job_status_summary.c.status, job_status_summary.c.jobs,
+                job_status_summary.c.exits, job_status_summary.c.exit_seconds
+            )).all()
+            return self._report(
+                {status: jobs for status, jobs, _, _ in rows},
+                {status: (exits, seconds) for status, _, exits, seconds in rows},
+                source="summary"
+            )
+        finally:
+            session.close()
+
+    def compute(self) -> Dict[str, Any]:
+        """Current figures from GROUP BY queries over the jobs and their transitions"""
+        session = self.session_factory()
+        try:
+            return self._compute(session)
+        finally:
+            session.close()
+
+    def _compute(self, session) -> Dict[str, Any]:
+        counts = {
+            status.value: jobs for status, jobs in
+            session.query(PodcastJob.status, func.count(PodcastJob.id)).group_by(PodcastJob.status).all()
+        }
+        durations = {}
+        if self._is_maintained(session):
+            durations = {
+                status: (exits, seconds) for status, exits, seconds in session.execute(
+                    select(job_status_transitions.c.status, func.count(), func.sum(job_status_transitions.c.seconds))
+                    .group_by(job_status_transitions.c.status)
+                ).all()
+            }
+        return self._report(counts, durations, source="query")
+
+    def _is_maintained(self, session) -> bool:
+        """Whether the summary migration has been applied (checked until it has)"""
+        if not self._maintained:
+            from database.migrations.runner import schema_migrations
+            try:
+                self._maintained = session.execute(
+                    select(schema_migrations.c.version).where(schema_migrations.c.version == SUMMARY_MIGRATION)
+                ).first() is not None
+            except SQLAlchemyError:
+                # No schema_migrations table yet
+                session.rollback()
+        return self._maintained
+
+    @staticmethod
+    def _report(counts: Dict[str, int], durations: Dict[str, Tuple[int, float]], source: str) -> Dict[str, Any]:
+        total = sum(counts.values())
+        completed = counts.get(JobStatus.COMPLETED.value, 0)
+        return {
+            "total_jobs": total,
+            "completed_jobs": completed,
+            "failed_jobs": counts.get(JobStatus.FAILED.value, 0),
+            "pending_jobs": sum(counts.get(status, 0) for status in PENDING_STATUSES),
+            "success_rate": (completed / total * 100) if total > 0 else 0,
+            "jobs_by_status": {status: jobs for status, jobs in counts.items() if jobs},
+            "stage_durations": {
+                status: {"exits": exits, "avg_seconds": round(seconds / exits, 1)}
+                for status, (exits, seconds) in durations.items() if exits
+            },
+            "source": source
+        }
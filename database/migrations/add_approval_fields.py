@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 """
 Database migration to add email approval fields
-Run this script to add the necessary approval fields to your existing database
+Run this script to add the necessary approval fields to your existing database.
+scripts/migrate_db.py applies this and every later migration.
 """
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from sqlalchemy import create_engine, text, Column, Boolean, DateTime, String, Text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 from database.connection import get_engine
+from database.migrations.runner import MigrationRunner
 from utils.config import config
 import logging
 
@@ -18,124 +19,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def run_migration():
-    """Run the approval fields migration"""
+    """Run the approval fields migration (version 1 in database/migrations/versions.py)"""
     try:
         engine = get_engine()
         
         logger.info("Starting database migration: add_approval_fields")
-        
-        # List of SQL commands to add approval fields
-        migration_commands = [
-            # User email field for approvals
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS user_email VARCHAR(255);
-            """,
-            
-            # Outline approval fields
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS outline_approved BOOLEAN DEFAULT FALSE;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS outline_approval_requested BOOLEAN DEFAULT FALSE;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS outline_approval_requested_at TIMESTAMP;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS outline_approval_time TIMESTAMP;
-            """,
-            
-            # Script approval fields
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS script_approved BOOLEAN DEFAULT FALSE;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS script_approval_requested BOOLEAN DEFAULT FALSE;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS script_approval_requested_at TIMESTAMP;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS script_approval_time TIMESTAMP;
-            """,
-            
-            # Audio approval fields
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS audio_approved BOOLEAN DEFAULT FALSE;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS audio_approval_requested BOOLEAN DEFAULT FALSE;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS audio_approval_requested_at TIMESTAMP;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS audio_approval_time TIMESTAMP;
-            """,
-            
-            # General approval fields
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS approval_stage VARCHAR(50);
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS approval_timeout TIMESTAMP;
-            """,
-            """
-            ALTER TABLE podcast_jobs 
-            ADD COLUMN IF NOT EXISTS continuation_data TEXT;
-            """,
-            
-            # Add indexes for better performance
-            """
-            CREATE INDEX IF NOT EXISTS idx_podcast_jobs_approval_stage 
-            ON podcast_jobs(approval_stage);
-            """,
-            """
-            CREATE INDEX IF NOT EXISTS idx_podcast_jobs_outline_approved 
-            ON podcast_jobs(outline_approved);
-            """,
-            """
-            CREATE INDEX IF NOT EXISTS idx_podcast_jobs_script_approved 
-            ON podcast_jobs(script_approved);
-            """,
-            """
-            CREATE INDEX IF NOT EXISTS idx_podcast_jobs_audio_approved 
-            ON podcast_jobs(audio_approved);
-            """,
-            """
-            CREATE INDEX IF NOT EXISTS idx_podcast_jobs_user_email 
-            ON podcast_jobs(user_email);
-            """
-        ]
-        
-        # Execute each migration command
-        with engine.connect() as connection:
-            for i, command in enumerate(migration_commands, 1):
-                try:
-                    logger.info(f"Executing migration step {i}/{len(migration_commands)}")
-                    connection.execute(text(command.strip()))
-                    connection.commit()
-                    logger.info(f"✅ Step {i} completed successfully")
-                except Exception as e:
-                    logger.warning(f"⚠️ Step {i} failed (may already exist): {e}")
-                    # Continue with other commands even if one fails
-                    continue
-        
+        MigrationRunner(engine).run(target=1)
         logger.info("✅ Database migration completed successfully!")
         
         # Verify the migration
@@ -216,7 +105,8 @@ def rollback_migration():
             "DROP INDEX IF EXISTS idx_podcast_jobs_outline_approved;",
             "DROP INDEX IF EXISTS idx_podcast_jobs_script_approved;",
             "DROP INDEX IF EXISTS idx_podcast_jobs_audio_approved;",
-            "DROP INDEX IF EXISTS idx_podcast_jobs_user_email;"
+            "DROP INDEX IF EXISTS idx_podcast_jobs_user_email;",
+            "DELETE FROM schema_migrations WHERE version = 1;"
         ]
         
         with engine.connect() as connection:
@@ -0,0 +1,170 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Schema operations a migration is made of; each is idempotent (raw SQL must be too),
+# so an interrupted migration can simply be rerun
+AddColumn = namedtuple("AddColumn", ["table", "column", "definition"])
+CreateIndex = namedtuple("CreateIndex", ["name", "table", "columns", "where"])
+DropIndex = namedtuple("DropIndex", ["name"])
+# Raw SQL per dialect name ("*" for any); skipped on dialects it has no statement for
+ExecuteSql = namedtuple("ExecuteSql", ["statements"])
+
+class Migration:
+    """
+    One schema version
+
+    Args:
+        version: Position in the migration sequence, starting at 1
+        name: Short description
+        operations: AddColumn, CreateIndex, DropIndex and ExecuteSql operations, run in order
+        concurrent: Build and drop indexes without blocking writes (PostgreSQL
+            CONCURRENTLY). Such a migration runs outside a transaction, one
+            operation at a time, so it must contain only index operations.
+    """
+
+    def __init__(self, version: int, name: str, operations: List, concurrent: bool = False):
+        if concurrent and not all(isinstance(operation, (CreateIndex, DropIndex)) for operation in operations):
+            raise ValueError(f"Migration {version} is concurrent but not only index operations")
+        self.version = version
+        self.name = name
+        self.operations = operations
+        self.concurrent = concurrent
+
+metadata = MetaData()
+
+# Versions applied to this database
+schema_migrations = Table(
+    "schema_migrations", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+class MigrationRunner:
+    """
+    Apply migrations in version order and record each one in schema_migrations
+
+    A plain migration runs in a single transaction together with its
+    version row. A concurrent one runs each operation in autocommit mode and
+    records its version last. An interrupted CREATE INDEX CONCURRENTLY
+    leaves an invalid index behind; it is dropped and rebuilt on the next run.
+    """
+
+    def __init__(self, engine=None, migrations: Optional[List[Migration]] = None):
+        if engine is None:
+            from database.connection import get_engine
+            engine = get_engine()
+        if migrations is None:
+            from database.migrations.versions import MIGRATIONS
+            migrations = MIGRATIONS
+        versions = [migration.version for migration in migrations]
+        if versions != list(range(1, len(versions) + 1)):
+            raise ValueError(f"Migration versions must be 1..n in order, got {versions}")
+        self.engine = engine
+        self.migrations = migrations
+
+    @property
+    def postgres(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    def applied(self) -> Dict[int, datetime]:
+        """Applied versions and when they were applied"""
+        metadata.create_all(self.engine, tables=[schema_migrations])
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at))
+            return {version: applied_at for version, applied_at in rows}
+
+    def pending(self, target: Optional[int] = None) -> List[Migration]:
+        """Migrations not yet applied, up to and including target"""
+        applied = self.applied()
+        return [migration for migration in self.migrations
+                if migration.version not in applied and (target is None or migration.version <= target)]
+
+    def run(self, target: Optional[int] = None, dry_run: bool = False) -> List[int]:
+        """
+        Apply pending migrations
+
+        Args:
+            target: Last version to apply (default: all)
+            dry_run: Only log the statements that would run
+
+        Returns:
+            Versions applied (or that would be)
+        """
+        done = []
+        for migration in self.pending(target):
+            logger.info(f"Applying migration {migration.version}: {migration.name}")
+            if dry_run:
+                for operation in migration.operations:
+                    logger.info(f"  {self._render(operation, migration.concurrent)}")
+            elif migration.concurrent:
+                self._run_concurrent(migration)
+            else:
+                with self.engine.begin() as connection:
+                    for operation in migration.operations:
+                        self._execute(connection, operation, concurrent=False)
+                    self._record(connection, migration)
+            done.append(migration.version)
+        if not done:
+            logger.info("Database schema is up to date")
+        return done
+
+    def _run_concurrent(self, migration: Migration):
+        with self.engine.connect() as connection:
+            if self.postgres:
+                connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            for operation in migration.operations:
+                with connection.begin():
+                    if isinstance(operation, CreateIndex) and self.postgres:
+                        self._drop_invalid_index(connection, operation.name)
+                    self._execute(connection, operation, concurrent=True)
+        with self.engine.begin() as connection:
+            self._record(connection, migration)
+
+    def _execute(self, connection, operation, concurrent: bool):
+        if isinstance(operation, AddColumn) and not self.postgres:
+            # Only PostgreSQL has ADD COLUMN IF NOT EXISTS
+            if operation.column in {column["name"] for column in inspect(connection).get_columns(operation.table)}:
+                return
+        statement = self._render(operation, concurrent)
+        if statement is None:
+            logger.warning(f"No {self.engine.dialect.name} statement in {operation!r}, skipping")
+            return
+        connection.execute(text(statement))
+
+    def _render(self, operation, concurrent: bool) -> Optional[str]:
+        concurrently = "CONCURRENTLY " if concurrent and self.postgres else ""
+        if isinstance(operation, AddColumn):
+            if_not_exists = "IF NOT EXISTS " if self.postgres else ""
+            return f"ALTER TABLE {operation.table} ADD COLUMN {if_not_exists}{operation.column} {operation.definition}"
+        if isinstance(operation, CreateIndex):
+            statement = (f"CREATE INDEX {concurrently}IF NOT EXISTS {operation.name} "
+                         f"ON {operation.table} ({', '.join(operation.columns)})")
+            return f"{statement} WHERE {operation.where}" if operation.where else statement
+        if isinstance(operation, DropIndex):
+            return f"DROP INDEX {concurrently}IF EXISTS {operation.name}"
+        if isinstance(operation, ExecuteSql):
+            return operation.statements.get(self.engine.dialect.name, operation.statements.get("*"))
+        raise TypeError(f"Unknown migration operation: {operation!r}")
+
+    def _drop_invalid_index(self, connection, name: str):
+        invalid = connection.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+    def _record(self, connection, migration: Migration):
+        connection.execute(schema_migrations.insert().values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=datetime.now(timezone.utc).replace(tzinfo=None)
+        ))
+        logger.info(f"Migration {migration.version} applied")
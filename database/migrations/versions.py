@@ -0,0 +1,164 @@
+from database.migrations.runner import AddColumn, CreateIndex, DropIndex, ExecuteSql, Migration
+
+# Statuses in which a job occupies pipeline workers (services/admission.py ACTIVE_STATUSES). The partial
+# index below only serves queries whose status list matches this one; a change here needs a new migration.
+ACTIVE_STATUSES_SQL = ("status IN ('OUTLINE_GENERATION', 'OUTLINE_EVALUATION', 'SCRIPT_GENERATION', "
+                       "'SCRIPT_EVALUATION', 'TTS_GENERATION', 'TTS_EVALUATION', 'PUBLISHING')")
+APPROVAL_STATUSES_SQL = "status IN ('OUTLINE_APPROVAL', 'SCRIPT_APPROVAL', 'AUDIO_APPROVAL')"
+
+# Every JobStatus when migration 4 was written; a status added later needs a migration seeding its summary row
+SUMMARY_STATUSES = ["PENDING", "OUTLINE_GENERATION", "OUTLINE_EVALUATION", "OUTLINE_APPROVAL",
+                    "SCRIPT_GENERATION", "SCRIPT_EVALUATION", "SCRIPT_APPROVAL", "TTS_GENERATION",
+                    "TTS_EVALUATION", "AUDIO_APPROVAL", "PUBLISHING", "COMPLETED", "FAILED"]
+
+# Time spent in a status before leaving it; jobs from before migration 4 count from their last update
+ELAPSED_POSTGRES = "EXTRACT(EPOCH FROM (LOCALTIMESTAMP - COALESCE(OLD.status_changed_at, OLD.updated_at)))"
+ELAPSED_SQLITE = "(julianday('now') - julianday(COALESCE(OLD.status_changed_at, OLD.updated_at))) * 86400"
+
+MIGRATIONS = [
+    # Formerly database/migrations/add_approval_fields.py; a no-op on databases that already ran it
+    Migration(1, "approval_fields", [
+        AddColumn("podcast_jobs", "user_email", "VARCHAR(255)"),
+        AddColumn("podcast_jobs", "outline_approved", "BOOLEAN DEFAULT FALSE"),
+        AddColumn("podcast_jobs", "outline_approval_requested", "BOOLEAN DEFAULT FALSE"),
+        AddColumn("podcast_jobs", "outline_approval_requested_at", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "outline_approval_time", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "script_approved", "BOOLEAN DEFAULT FALSE"),
+        AddColumn("podcast_jobs", "script_approval_requested", "BOOLEAN DEFAULT FALSE"),
+        AddColumn("podcast_jobs", "script_approval_requested_at", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "script_approval_time", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "audio_approved", "BOOLEAN DEFAULT FALSE"),
+        AddColumn("podcast_jobs", "audio_approval_requested", "BOOLEAN DEFAULT FALSE"),
+        AddColumn("podcast_jobs", "audio_approval_requested_at", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "audio_approval_time", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "approval_stage", "VARCHAR(50)"),
+        AddColumn("podcast_jobs", "approval_timeout", "TIMESTAMP"),
+        AddColumn("podcast_jobs", "continuation_data", "TEXT"),
+        CreateIndex("idx_podcast_jobs_approval_stage", "podcast_jobs", ["approval_stage"], None),
+        CreateIndex("idx_podcast_jobs_outline_approved", "podcast_jobs", ["outline_approved"], None),
+        CreateIndex("idx_podcast_jobs_script_approved", "podcast_jobs", ["script_approved"], None),
+        CreateIndex("idx_podcast_jobs_audio_approved", "podcast_jobs", ["audio_approved"], None),
+        CreateIndex("idx_podcast_jobs_user_email", "podcast_jobs", ["user_email"], None),
+    ]),
+
+    Migration(2, "job_query_indexes", [
+        # Job listing, newest first, keyed on (created_at, id); and the same per status
+        CreateIndex("ix_podcast_jobs_created_at_id", "podcast_jobs", ["created_at", "id"], None),
+        CreateIndex("ix_podcast_jobs_status_created_at_id", "podcast_jobs", ["status", "created_at", "id"], None),
+        # Admission control: active job count and the oldest active job, per tenant
+        CreateIndex("ix_podcast_jobs_active_created_at", "podcast_jobs", ["created_at"], ACTIVE_STATUSES_SQL),
+        # Approvals waiting longest, to time them out (PodcastRepository.get_timed_out_approvals)
+        CreateIndex("ix_podcast_jobs_pending_approval_updated_at", "podcast_jobs", ["updated_at"],
+                    APPROVAL_STATUSES_SQL),
+        CreateIndex("ix_evaluation_results_job_id", "evaluation_results", ["job_id"], None),
+        CreateIndex("ix_guardrail_results_job_id", "guardrail_results", ["job_id"], None),
+    ], concurrent=True),
+
+    # No query filters on these low-selectivity flags, yet every approval update had to maintain them
+    Migration(3, "drop_approval_flag_indexes", [
+        DropIndex("idx_podcast_jobs_outline_approved"),
+        DropIndex("idx_podcast_jobs_script_approved"),
+        DropIndex("idx_podcast_jobs_audio_approved"),
+    ], concurrent=True),
+
+    # Job counts and time per status, kept current by triggers in the transaction that changes a job's status
+    # (database/job_stats.py). Creating the triggers locks out job writes until the migration commits, so the
+    # backfill neither misses nor double counts a change.
+    Migration(4, "job_status_summary", [
+        AddColumn("podcast_jobs", "status_changed_at", "TIMESTAMP"),
+        ExecuteSql({"*": "CREATE TABLE IF NOT EXISTS job_status_summary ("
+                         "status VARCHAR(50) PRIMARY KEY, "
+                         "jobs BIGINT NOT NULL DEFAULT 0, "
+                         "exits BIGINT NOT NULL DEFAULT 0, "
+                         "exit_seconds DOUBLE PRECISION NOT NULL DEFAULT 0)"}),
+        ExecuteSql({
+            "postgresql": "CREATE TABLE IF NOT EXISTS job_status_transitions ("
+                          "id BIGSERIAL PRIMARY KEY, job_id VARCHAR(100) NOT NULL, status VARCHAR(50) NOT NULL, "
+                          "seconds DOUBLE PRECISION NOT NULL, exited_at TIMESTAMP NOT NULL)",
+            "sqlite": "CREATE TABLE IF NOT EXISTS job_status_transitions ("
+                      "id INTEGER PRIMARY KEY, job_id VARCHAR(100) NOT NULL, status VARCHAR(50) NOT NULL, "
+                      "seconds DOUBLE PRECISION NOT NULL, exited_at TIMESTAMP NOT NULL)"
+        }),
+        ExecuteSql({"*": "INSERT INTO job_status_summary (status) VALUES "
+                         + ", ".join(f"('{status}')" for status in SUMMARY_STATUSES)
+                         + " ON CONFLICT (status) DO NOTHING"}),
+
+        ExecuteSql({
+            "postgresql": """
+                CREATE OR REPLACE FUNCTION podcast_jobs_stamp_status_change() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP = 'INSERT' THEN
+                        NEW.status_changed_at := LOCALTIMESTAMP;
+                    ELSIF NEW.status IS DISTINCT FROM OLD.status THEN
+                        NEW.status_changed_at := LOCALTIMESTAMP;
+                    END IF;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql"""
+        }),
+        ExecuteSql({"postgresql": "DROP TRIGGER IF EXISTS podcast_jobs_stamp_status_change ON podcast_jobs"}),
+        ExecuteSql({"postgresql": "CREATE TRIGGER podcast_jobs_stamp_status_change "
+                                  "BEFORE INSERT OR UPDATE OF status ON podcast_jobs "
+                                  "FOR EACH ROW EXECUTE PROCEDURE podcast_jobs_stamp_status_change()"}),
+        ExecuteSql({"postgresql": f"""
+                CREATE OR REPLACE FUNCTION job_status_summary_track() RETURNS trigger AS $$
+                DECLARE
+                    elapsed DOUBLE PRECISION;
+                BEGIN
+                    IF TG_OP = 'INSERT' THEN
+                        UPDATE job_status_summary SET jobs = jobs + 1 WHERE status = NEW.status::text;
+                    ELSIF TG_OP = 'DELETE' THEN
+                        UPDATE job_status_summary SET jobs = jobs - 1 WHERE status = OLD.status::text;
+                    ELSIF NEW.status IS DISTINCT FROM OLD.status THEN
+                        elapsed := COALESCE({ELAPSED_POSTGRES}, 0);
+                        -- Both rows in one statement, so opposite transitions lock them in the same order
+                        UPDATE job_status_summary SET
+                            jobs = jobs + CASE WHEN status = NEW.status::text THEN 1 ELSE -1 END,
+                            exits = exits + CASE WHEN status = OLD.status::text THEN 1 ELSE 0 END,
+                            exit_seconds = exit_seconds + CASE WHEN status = OLD.status::text THEN elapsed ELSE 0 END
+                        WHERE status IN (OLD.status::text, NEW.status::text);
+                        INSERT INTO job_status_transitions (job_id, status, seconds, exited_at)
+                        VALUES (NEW.job_id, OLD.status::text, elapsed, LOCALTIMESTAMP);
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql"""}),
+        ExecuteSql({"postgresql": "DROP TRIGGER IF EXISTS job_status_summary_track ON podcast_jobs"}),
+        ExecuteSql({"postgresql": "CREATE TRIGGER job_status_summary_track "
+                                  "AFTER INSERT OR DELETE OR UPDATE OF status ON podcast_jobs "
+                                  "FOR EACH ROW EXECUTE PROCEDURE job_status_summary_track()"}),
+
+        ExecuteSql({"sqlite": """
+                CREATE TRIGGER IF NOT EXISTS job_status_summary_insert AFTER INSERT ON podcast_jobs
+                BEGIN
+                    UPDATE job_status_summary SET jobs = jobs + 1 WHERE status = NEW.status;
+                    UPDATE podcast_jobs SET status_changed_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+                END"""}),
+        ExecuteSql({"sqlite": f"""
+                CREATE TRIGGER IF NOT EXISTS job_status_summary_update AFTER UPDATE OF status ON podcast_jobs
+                WHEN NEW.status IS NOT OLD.status
+                BEGIN
+                    UPDATE job_status_summary SET jobs = jobs - 1, exits = exits + 1,
+                        exit_seconds = exit_seconds + COALESCE({ELAPSED_SQLITE}, 0)
+                    WHERE status = OLD.status;
+                    UPDATE job_status_summary SET jobs = jobs + 1 WHERE status = NEW.status;
+                    INSERT INTO job_status_transitions (job_id, status, seconds, exited_at)
+                    VALUES (NEW.job_id, OLD.status, COALESCE({ELAPSED_SQLITE}, 0), CURRENT_TIMESTAMP);
+                    UPDATE podcast_jobs SET status_changed_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+                END"""}),
+        ExecuteSql({"sqlite": """
+                CREATE TRIGGER IF NOT EXISTS job_status_summary_delete AFTER DELETE ON podcast_jobs
+                BEGIN
+                    UPDATE job_status_summary SET jobs = jobs - 1 WHERE status = OLD.status;
+                END"""}),
+
+        # Backfill with GROUP BY counts
+        ExecuteSql({
+            "postgresql": "UPDATE job_status_summary s SET jobs = c.jobs FROM ("
+                          "SELECT status::text AS status, count(*) AS jobs FROM podcast_jobs GROUP BY status"
+                          ") c WHERE s.status = c.status",
+            "sqlite": "UPDATE job_status_summary SET jobs = ("
+                      "SELECT count(*) FROM podcast_jobs WHERE podcast_jobs.status = job_status_summary.status)"
+        }),
+    ]),
+]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, Enum, JSON, Boolean
+from sqlalchemy import Column, String, Integer, Text, DateTime, Enum, JSON, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -49,12 +49,18 @@ class PodcastJob(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     completed_at = Column(DateTime)
+    
+    __table_args__ = (
+        # Keyset pagination of the job listing, newest first, overall and per status
+        Index("ix_podcast_jobs_created_at_id", "created_at", "id"),
+        Index("ix_podcast_jobs_status_created_at_id", "status", "created_at", "id"),
+    )
 
 class EvaluationResult(Base):
     __tablename__ = "evaluation_results"
     
     id = Column(Integer, primary_key=True)
-    job_id = Column(String(100), nullable=False)
+    job_id = Column(String(100), nullable=False, index=True)
     stage = Column(String(50), nullable=False)
     score = Column(JSON)
     passed = Column(Boolean, default=False)
@@ -65,8 +71,19 @@ class GuardrailResult(Base):
     __tablename__ = "guardrail_results"
     
     id = Column(Integer, primary_key=True)
-    job_id = Column(String(100), nullable=False)
+    job_id = Column(String(100), nullable=False, index=True)
     guardrail_type = Column(String(50), nullable=False)
     passed = Column(Boolean, default=True)
     details = Column(JSON)
     created_at = Column(DateTime, server_default=func.now())
+
+class ProcessedMessage(Base):
+    __tablename__ = "processed_messages"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of job_id + stage + message hash
+    job_id = Column(String(100), nullable=False, index=True)
+    stage = Column(String(50), nullable=False)
+    handoff_topic = Column(String(200))
+    handoff_message = Column(JSON)
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,12 +1,43 @@
-from database.models import PodcastJob, EvaluationResult, GuardrailResult, JobStatus
+from database.models import PodcastJob, EvaluationResult, GuardrailResult, JobStatus, ProcessedMessage
 from database.connection import SessionLocal
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import base64
+import json
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import case, func, literal, select, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
 
 logger = logging.getLogger(__name__)
 
+# Fields a job listing returns by default; any job column, or "topic" from the brief, may be requested
+DEFAULT_LIST_FIELDS = ["job_id", "status", "topic", "created_at", "updated_at"]
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for the position after a listed job"""
+    position = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Position encoded by encode_cursor
+
+    Raises:
+        ValueError: The cursor is malformed
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _list_column(field: str):
+    if field == "topic":
+        return PodcastJob.brief["topic"].as_string()
+    if field not in PodcastJob.__table__.columns:
+        raise ValueError(f"Unknown job field: {field}")
+    return PodcastJob.__table__.columns[field]
+
 class PodcastRepository:
     def __init__(self):
         self.session_factory = SessionLocal
@@ -51,17 +82,181 @@ class PodcastRepository:
         finally:
             session.close()
     
+    def list_jobs(self, limit: int = 50, cursor: Optional[str] = None, statuses: Optional[List[str]] = None,
+                  created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                  fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of jobs, newest first, reading only the requested fields
+
+        Pages are keyed on (created_at, id), so each page is an index range
+        scan however deep into the listing it is.
+
+        Args:
+            limit: Jobs per page
+            cursor: next_cursor of the previous page
+            statuses: Only jobs in these statuses
+            created_after: Only jobs created at or after this time
+            created_before: Only jobs created before this time
+            fields: Job columns, or "topic", to return (default DEFAULT_LIST_FIELDS)
+
+        Returns:
+            (jobs as dicts, cursor of the next page or None on the last page)
+
+        Raises:
+            ValueError: Unknown field or status, or a malformed cursor
+        """
+        fields = fields or DEFAULT_LIST_FIELDS
+        columns = [_list_column(field).label(field) for field in fields]
+        query_filters = []
+        if statuses:
+            query_filters.append(PodcastJob.status.in_([JobStatus(status) for status in statuses]))
+        if created_after is not None:
+            query_filters.append(PodcastJob.created_at >= created_after)
+        if created_before is not None:
+            query_filters.append(PodcastJob.created_at < created_before)
+        if cursor:
+            query_filters.append(tuple_(PodcastJob.created_at, PodcastJob.id) < tuple_(*decode_cursor(cursor)))
+
+        session = self._get_session()
+        try:
+            rows = session.query(*columns, PodcastJob.created_at.label("_created_at"), PodcastJob.id.label("_id")).filter(
+                *query_filters
+            ).order_by(PodcastJob.created_at.desc(), PodcastJob.id.desc()).limit(limit + 1).all()
+        finally:
+            session.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor(last["_created_at"], last["_id"])
+        jobs = []
+        for row in rows:
+            job = {field: row._mapping[field] for field in fields}
+            if isinstance(job.get("status"), JobStatus):
+                job["status"] = job["status"].value
+            jobs.append(job)
+        return jobs, next_cursor
+    
+    def get_job_statuses(self, job_ids: List[str]) -> Dict[str, str]:
+        """Get the status of several jobs in one query"""
+        if not job_ids:
+            return {}
+
+        session = self._get_session()
+        try:
+            rows = session.query(PodcastJob.job_id, PodcastJob.status).filter(
+                PodcastJob.job_id.in_(list(job_ids))
+            ).all()
+            return {job_id: status.value for job_id, status in rows}
+        finally:
+            session.close()
+    
+    def count_jobs(self, statuses: List[str]) -> int:
+        """Count jobs in any of the given statuses"""
+        session = self._get_session()
+        try:
+            return session.query(PodcastJob.id).filter(
+                PodcastJob.status.in_([JobStatus(status) for status in statuses])
+            ).count()
+        finally:
+            session.close()
+    
+    def count_jobs_by_tenant(self, statuses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Count jobs in any of the given statuses per brief tenant, with the oldest one's creation time"""
+        session = self._get_session()
+        try:
+            tenant = func.coalesce(PodcastJob.brief["tenant"].as_string(),
+                                   PodcastJob.brief["user_email"].as_string())
+            rows = session.query(tenant, func.count(PodcastJob.id), func.min(PodcastJob.created_at)).filter(
+                PodcastJob.status.in_([JobStatus(status) for status in statuses])
+            ).group_by(tenant).all()
+            return {name: {"jobs": count, "oldest_created_at": oldest} for name, count, oldest in rows}
+        finally:
+            session.close()
+    
+    def get_pending_jobs(self, limit: int = 100) -> List[Tuple[str, Dict[str, Any]]]:
+        """(job_id, brief) of jobs not yet started (PENDING), oldest first"""
+        session = self._get_session()
+        try:
+            return [(job_id, brief) for job_id, brief in session.query(PodcastJob.job_id, PodcastJob.brief).filter(
+                PodcastJob.status == JobStatus.PENDING
+            ).order_by(PodcastJob.created_at, PodcastJob.id).limit(limit).all()]
+        finally:
+            session.close()
+    
+    def claim_pending_job(self, job_id: str) -> bool:
+        """
+        Move a PENDING job to OUTLINE_GENERATION with a conditional UPDATE
+
+        Returns:
+            True if this call claimed the job (and should start it), False if
+            it was not PENDING, e.g. another process claimed it first
+        """
+        session = self._get_session()
+        try:
+            result = session.execute(update(PodcastJob.__table__).where(
+                PodcastJob.job_id == job_id, PodcastJob.status == JobStatus.PENDING
+            ).values(status=JobStatus.OUTLINE_GENERATION))
+            session.commit()
+            return result.rowcount > 0
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error claiming job: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def get_timed_out_approvals(self, timeout_hours: float, limit: int = 100) -> List[str]:
+        """Jobs waiting for a human approval, untouched for longer than timeout_hours, oldest first"""
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=timeout_hours)
+        session = self._get_session()
+        try:
+            rows = session.query(PodcastJob.job_id).filter(
+                PodcastJob.status.in_([JobStatus.OUTLINE_APPROVAL, JobStatus.SCRIPT_APPROVAL, JobStatus.AUDIO_APPROVAL]),
+                PodcastJob.updated_at <= cutoff
+            ).order_by(PodcastJob.updated_at).limit(limit).all()
+            return [job_id for job_id, in rows]
+        finally:
+            session.close()
+    
+    def _job_update(self, job_id: str, updates: Dict[str, Any]):
+        """UPDATE statement for the job's columns in updates; keys that are not columns are ignored"""
+        columns = PodcastJob.__table__.columns
+        values = {key: value for key, value in updates.items() if key in columns}
+        if not values:
+            return None
+        return update(PodcastJob.__table__).where(PodcastJob.job_id == job_id).values(**values)
+
+    @staticmethod
+    def _supports_returning(session) -> bool:
+        dialect = session.get_bind().dialect
+        return bool(getattr(dialect, "update_returning", getattr(dialect, "full_returning", False)))
+
     def update_job(self, job_id: str, updates: Dict[str, Any]) -> Optional[PodcastJob]:
-        """Update job fields"""
+        """
+        Update job fields and return the updated job
+
+        One UPDATE ... RETURNING where the database supports it (PostgreSQL),
+        else an UPDATE and a SELECT. Use update_job_fields when the row is
+        not needed.
+        """
+        statement = self._job_update(job_id, updates)
+        if statement is None:
+            return self.get_job(job_id)
+
         session = self._get_session()
         try:
-            job = session.query(PodcastJob).filter(PodcastJob.job_id == job_id).first()
-            if job:
-                for key, value in updates.items():
-                    if hasattr(job, key):
-                        setattr(job, key, value)
-                session.commit()
-                session.refresh(job)
+            if self._supports_returning(session):
+                returning = statement.returning(*PodcastJob.__table__.columns)
+                job = session.execute(select(PodcastJob).from_statement(returning)).scalars().first()
+            else:
+                session.execute(statement)
+                job = session.query(PodcastJob).filter(PodcastJob.job_id == job_id).first()
+            if job is not None:
+                # Keep the loaded values usable after commit and close
+                session.expunge(job)
+            session.commit()
             return job
         except SQLAlchemyError as e:
             session.rollback()
@@ -70,6 +265,71 @@ class PodcastRepository:
         finally:
             session.close()
     
+    def update_job_fields(self, job_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Update job fields with a single UPDATE statement, without reading the job
+
+        Returns:
+            True if the job was updated
+        """
+        statement = self._job_update(job_id, updates)
+        if statement is None:
+            return False
+
+        session = self._get_session()
+        try:
+            result = session.execute(statement)
+            session.commit()
+            return result.rowcount > 0
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error updating job: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def update_jobs(self, updates_by_job: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Update several jobs with a single UPDATE statement
+
+        Each column is set with a CASE over job_id, so jobs may update
+        different columns; a job keeps its current value for columns it
+        does not update. Keys that are not columns are ignored.
+
+        Returns:
+            Number of jobs updated
+        """
+        table = PodcastJob.__table__
+        values_by_job = {
+            job_id: {key: value for key, value in updates.items() if key in table.columns}
+            for job_id, updates in updates_by_job.items()
+        }
+        values_by_job = {job_id: values for job_id, values in values_by_job.items() if values}
+        if not values_by_job:
+            return 0
+
+        columns = sorted({key for values in values_by_job.values() for key in values})
+        statement = update(table).where(table.c.job_id.in_(list(values_by_job))).values({
+            column: case(
+                *[(table.c.job_id == job_id, literal(values[column], table.c[column].type))
+                  for job_id, values in values_by_job.items() if column in values],
+                else_=table.c[column]
+            )
+            for column in columns
+        })
+
+        session = self._get_session()
+        try:
+            result = session.execute(statement)
+            session.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error updating jobs: {str(e)}")
+            raise
+        finally:
+            session.close()
+
     def save_evaluation_result_to_db(self, job_id: str, stage: str, score: Dict[str, Any], passed: bool, feedback: str) -> None:
         """Save evaluation result"""
         session = self._get_session()
@@ -120,3 +380,52 @@ class PodcastRepository:
             }
         }
         return self.update_job(job_id, evaluation_data)
+
+    def get_processed_message(self, key: str) -> Optional[ProcessedMessage]:
+        """Get an unexpired processed-message ledger entry"""
+        session = self._get_session()
+        try:
+            return session.query(ProcessedMessage).filter(
+                ProcessedMessage.key == key,
+                ProcessedMessage.expires_at > datetime.now(timezone.utc).replace(tzinfo=None)
+            ).first()
+        finally:
+            session.close()
+
+    def record_processed_message(self, key: str, job_id: str, stage: str, handoff_topic: Optional[str],
+                                 handoff_message: Optional[dict], expires_at: datetime) -> None:
+        """Insert or refresh a processed-message ledger entry"""
+        session = self._get_session()
+        try:
+            entry = ProcessedMessage()
+            entry.key = key
+            entry.job_id = job_id
+            entry.stage = stage
+            entry.handoff_topic = handoff_topic
+            entry.handoff_message = handoff_message
+            entry.expires_at = expires_at
+
+            session.merge(entry)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error recording processed message: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def purge_expired_processed_messages(self) -> int:
+        """Delete expired processed-message ledger entries"""
+        session = self._get_session()
+        try:
+            deleted = session.query(ProcessedMessage).filter(
+                ProcessedMessage.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None)
+            ).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error purging processed messages: {str(e)}")
+            raise
+        finally:
+            session.close()
@@ -3,10 +3,13 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import List, Dict
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.kafka_producer import get_shared_producer
+from messaging.ledger import REGENERATION_FIELD, get_ledger
+from messaging.retry import retry_or_dead_letter
 from messaging.topics import KafkaTopics
 from database.repositories import PodcastRepository
 from utils.config import config
+from utils.circuit_breaker import LLM, get_breaker
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +31,8 @@ class OutlineEvaluator:
             temperature=0.3
         )
         self.parser = PydanticOutputParser(pydantic_object=OutlineEvaluation)
-        self.producer = KafkaProducerClient()
+        self.producer = get_shared_producer()
+        self.ledger = get_ledger()
         self.repo = PodcastRepository()
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -56,9 +60,17 @@ class OutlineEvaluator:
             Provide detailed evaluation scores and feedback.""")
         ])
     
-    def evaluate(self, job_id: str, outline: dict, brief: dict):
-        """Evaluate outline quality"""
+    def evaluate(self, job_id: str, outline: dict, brief: dict, regeneration: int = 0):
+        """Evaluate outline quality; regeneration is the round of the evaluate-regenerate loop"""
         try:
+            # A redelivered message re-sends the recorded decision instead of re-running the LLM
+            ledger_key = self.ledger.key(job_id, "outline_evaluation", {"outline": outline, "brief": brief}, regeneration)
+            recorded = self.ledger.get(ledger_key)
+            if recorded is not None:
+                logger.info(f"Outline for job {job_id} already evaluated, re-sending recorded handoff")
+                self.ledger.redeliver(self.producer, recorded)
+                return
+            
             logger.info(f"Evaluating outline for job {job_id}")
             
             # Create chain
@@ -69,7 +81,7 @@ class OutlineEvaluator:
             if not isinstance(key_points, list):
                 key_points = []
             
-            evaluation = chain.invoke({
+            evaluation = get_breaker(LLM).call(chain.invoke, {
                 "topic": brief["topic"],
                 "tone": brief["tone"],
                 "audience": brief.get("target_audience", "general"),
@@ -90,7 +102,8 @@ class OutlineEvaluator:
             # Determine next step
             if evaluation.overall_score >= 0.7:
                 # Send to guardrails
-                self.producer.send_message(
+                self.ledger.handoff(
+                    self.producer, ledger_key, job_id, "outline_evaluation",
                     KafkaTopics.OUTLINE_APPROVAL,
                     {
                         "job_id": job_id,
@@ -101,24 +114,23 @@ class OutlineEvaluator:
                 )
             else:
                 # Send back for regeneration
-                self.producer.send_message(
+                self.ledger.handoff(
+                    self.producer, ledger_key, job_id, "outline_evaluation",
                     KafkaTopics.OUTLINE_GENERATION,
                     {
                         "job_id": job_id,
                         "brief": brief,
                         "feedback": evaluation.feedback,
                         "issues": evaluation.issues,
-                        "retry": True
+                        "retry": True,
+                        REGENERATION_FIELD: regeneration + 1
                     }
                 )
             
         except Exception as e:
             logger.error(f"Outline evaluation failed: {str(e)}")
-            self.producer.send_message(KafkaTopics.DLQ, {
-                "job_id": job_id,
-                "error": str(e),
-                "stage": "outline_evaluation"
-            })
+            message = {"job_id": job_id, "outline": outline, "brief": brief, REGENERATION_FIELD: regeneration}
+            retry_or_dead_letter(self.producer, "outline_evaluation", KafkaTopics.OUTLINE_EVALUATION, message, e)
     
     def _format_outline(self, outline: dict) -> str:
         """Format outline for evaluation"""
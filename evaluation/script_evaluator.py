@@ -5,7 +5,10 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from messaging.topics import KafkaTopics
 from utils.config import config
-from messaging.kafka_producer import KafkaProducerClient
+from utils.circuit_breaker import LLM, get_breaker
+from messaging.kafka_producer import get_shared_producer
+from messaging.ledger import REGENERATION_FIELD, get_ledger
+from messaging.retry import retry_or_dead_letter
 from database.repositories import PodcastRepository
 import logging
 
@@ -29,7 +32,8 @@ class ScriptEvaluator:
             temperature=0.3
         )
         self.parser = PydanticOutputParser(pydantic_object=ScriptEvaluation)
-        self.producer = KafkaProducerClient()
+        self.producer = get_shared_producer()
+        self.ledger = get_ledger()
         self.repo = PodcastRepository()
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -55,15 +59,24 @@ class ScriptEvaluator:
             Provide detailed evaluation and specific corrections if needed.""")
         ])
     
-    def evaluate(self, job_id: str, script: str, outline: dict, brief: dict):
-        """Evaluate script quality"""
+    def evaluate(self, job_id: str, script: str, outline: dict, brief: dict, regeneration: int = 0):
+        """Evaluate script quality; regeneration is the round of the evaluate-regenerate loop"""
         try:
+            # A redelivered message re-sends the recorded decision instead of re-running the LLM
+            ledger_key = self.ledger.key(job_id, "script_evaluation", {"script": script, "outline": outline, "brief": brief},
+                                         regeneration)
+            recorded = self.ledger.get(ledger_key)
+            if recorded is not None:
+                logger.info(f"Script for job {job_id} already evaluated, re-sending recorded handoff")
+                self.ledger.redeliver(self.producer, recorded)
+                return
+            
             logger.info(f"Evaluating script for job {job_id}")
             
             # Run evaluation
             chain = self.prompt | self.llm | self.parser
             
-            evaluation = chain.invoke({
+            evaluation = get_breaker(LLM).call(chain.invoke, {
                 "tone": brief["tone"],
                 "duration": brief["length_minutes"],
                 "script": script[:3000],  # Limit for token management
@@ -82,7 +95,8 @@ class ScriptEvaluator:
             # Determine next step
             if evaluation.overall_score >= 0.75:
                 # Send to guardrails
-                self.producer.send_message(
+                self.ledger.handoff(
+                    self.producer, ledger_key, job_id, "script_evaluation",
                     KafkaTopics.SCRIPT_APPROVAL,
                     {
                         "job_id": job_id,
@@ -94,7 +108,8 @@ class ScriptEvaluator:
                 )
             else:
                 # Send back for improvement
-                self.producer.send_message(
+                self.ledger.handoff(
+                    self.producer, ledger_key, job_id, "script_evaluation",
                     KafkaTopics.SCRIPT_GENERATION,
                     {
                         "job_id": job_id,
@@ -102,9 +117,13 @@ class ScriptEvaluator:
                         "brief": brief,
                         "feedback": evaluation.feedback,
                         "corrections": evaluation.corrections_needed,
-                        "retry": True
+                        "retry": True,
+                        REGENERATION_FIELD: regeneration + 1
                     }
                 )
             
         except Exception as e:
-            logger.error(f"Script evaluation failed: {str(e)}")
\ No newline at end of file
+            logger.error(f"Script evaluation failed: {str(e)}")
+            message = {"job_id": job_id, "script": script, "outline": outline, "brief": brief,
+                       REGENERATION_FIELD: regeneration}
+            retry_or_dead_letter(self.producer, "script_evaluation", KafkaTopics.SCRIPT_EVALUATION, message, e)
\ No newline at end of file
@@ -1,7 +1,10 @@
 from langchain_openai.chat_models import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from utils.config import config
+from utils.circuit_breaker import LLM, get_breaker
+from messaging.retry import is_transient_error
 import logging
+import threading
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -41,7 +44,7 @@ class BiasDetector:
         try:
             chain = self.prompt | self.llm
             
-            result = chain.invoke({"content": text[:2000]})  # Limit for token management
+            result = get_breaker(LLM).call(chain.invoke, {"content": text[:2000]})  # Limit for token management
             
             # Parse LLM response (simplified logic for now)
             content = result.content if isinstance(result.content, str) else str(result.content)
@@ -54,8 +57,22 @@ class BiasDetector:
             }
             
         except Exception as e:
+            if is_transient_error(e):
+                # Provider outage (open breaker, timeout, throttling): let the stage retry instead of passing unchecked
+                raise
             logger.error(f"Bias detector error: {str(e)}")
             return {
                 "passed": True,
                 "message": "Bias check skipped due to error"
-            }
\ No newline at end of file
+            }
+
+_bias_detector = None
+_bias_detector_lock = threading.Lock()
+
+def get_bias_detector() -> BiasDetector:
+    """Get the process-wide BiasDetector shared by the guardrails stages"""
+    global _bias_detector
+    with _bias_detector_lock:
+        if _bias_detector is None:
+            _bias_detector = BiasDetector()
+        return _bias_detector
@@ -1,6 +1,7 @@
 from transformers import pipeline
 from typing import Dict, Any
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -73,4 +74,15 @@ class NSFWFilter:
                 "passed": True,
                 "score": 0,
                 "message": "NSFW check skipped due to error"
-            }
\ No newline at end of file
+            }
+
+_nsfw_filter = None
+_nsfw_filter_lock = threading.Lock()
+
+def get_nsfw_filter() -> NSFWFilter:
+    """Get the process-wide NSFWFilter so the model is loaded once per process"""
+    global _nsfw_filter
+    with _nsfw_filter_lock:
+        if _nsfw_filter is None:
+            _nsfw_filter = NSFWFilter()
+        return _nsfw_filter
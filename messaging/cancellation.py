@@ -0,0 +1,291 @@
+from abc import ABC, abstractmethod
+from kafka import KafkaConsumer
+from kafka.structs import TopicPartition
+from typing import Optional
+from messaging.memory_broker import MemoryKafkaConsumer
+from messaging.serialization import default_serializer
+from messaging.topics import KafkaTopics
+from utils.config import config
+from utils.exceptions import JobCancelledError
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Optional Redis backend
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+# Control message types on KafkaTopics.SUPERVISOR_CONTROL
+CANCEL = "cancel"
+RESTORE = "restore"
+
+class CancellationRegistry(ABC):
+    """
+    Jobs cancelled by an operator
+
+    Consumers skip a cancelled job's queued messages without running the
+    handler, and long-running stages check between chunks / provider calls,
+    so a cancel stops spend within one unit of work. Entries expire after
+    CANCELLATION_TTL_SECONDS; a retried job is restored explicitly. Lookups
+    fail open: a registry outage costs wasted work, never a lost job.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = config.CANCELLATION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+
+    @abstractmethod
+    def _add(self, job_id: str):
+        pass
+
+    @abstractmethod
+    def _remove(self, job_id: str):
+        pass
+
+    @abstractmethod
+    def _contains(self, job_id: str) -> bool:
+        pass
+
+    def start(self):
+        """Begin following cancellations made by other processes (no-op unless the backend needs it)"""
+        pass
+
+    def cancel(self, job_id: str):
+        """Mark a job cancelled"""
+        self._add(job_id)
+        logger.info(f"Job {job_id} cancelled")
+
+    def restore(self, job_id: str):
+        """Undo a cancellation, e.g. when the job is retried"""
+        self._remove(job_id)
+
+    def is_cancelled(self, job_id: Optional[str]) -> bool:
+        if not job_id:
+            return False
+        try:
+            return self._contains(job_id)
+        except Exception as e:
+            logger.error(f"Cancellation lookup failed: {str(e)}")
+            return False
+
+    def check(self, job_id: Optional[str]):
+        """
+        Stop here if the job was cancelled
+
+        Raises:
+            JobCancelledError: The job is cancelled
+        """
+        if self.is_cancelled(job_id):
+            raise JobCancelledError(job_id)
+
+class NullCancellationRegistry(CancellationRegistry):
+    """Registry that never cancels anything (CANCELLATION_BACKEND=none)"""
+
+    def _add(self, job_id: str):
+        logger.warning(f"Cancellation disabled; queued work of job {job_id} will still run")
+
+    def _remove(self, job_id: str):
+        pass
+
+    def _contains(self, job_id: str) -> bool:
+        return False
+
+class MemoryCancellationRegistry(CancellationRegistry):
+    """Process-local set of cancelled jobs with expiry"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._expires = {}  # job_id -> wall-clock expiry
+        self._lock = threading.Lock()
+
+    def _add(self, job_id: str, expires_at: Optional[float] = None):
+        with self._lock:
+            self._expires[job_id] = expires_at or time.time() + self.ttl_seconds
+
+    def _remove(self, job_id: str):
+        with self._lock:
+            self._expires.pop(job_id, None)
+
+    def _contains(self, job_id: str) -> bool:
+        with self._lock:
+            expires_at = self._expires.get(job_id)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._expires[job_id]
+                return False
+            return True
+
+class TopicCancellationRegistry(MemoryCancellationRegistry):
+    """
+    In-process set fed by the supervisor control topic
+
+    cancel() publishes a control message; every worker process replays the
+    topic from the start and keeps following it, so a lookup is a dict hit.
+    Each entry expires TTL after its control message was written. The TTL
+    should not exceed the control topic's retention, or a worker started
+    later would miss cancellations still in effect elsewhere.
+    """
+
+    RECONNECT_SECONDS = 10
+    STARTUP_WAIT_SECONDS = 5
+
+    def __init__(self, producer=None, **kwargs):
+        super().__init__(**kwargs)
+        self._producer = producer
+        self._thread = None
+        self._stopped = threading.Event()
+        self._caught_up = threading.Event()
+
+    @property
+    def producer(self):
+        if self._producer is None:
+            from messaging.kafka_producer import get_shared_producer
+            self._producer = get_shared_producer()
+        return self._producer
+
+    def cancel(self, job_id: str):
+        super().cancel(job_id)
+        self._publish(CANCEL, job_id)
+
+    def restore(self, job_id: str):
+        super().restore(job_id)
+        self._publish(RESTORE, job_id)
+
+    def _publish(self, kind: str, job_id: str):
+        sent = self.producer.send_message(KafkaTopics.SUPERVISOR_CONTROL, {
+            "type": kind,
+            "job_id": job_id,
+            "timestamp": time.time()
+        }, key=job_id)
+        if not sent:
+            logger.error(f"Failed to publish {kind} of job {job_id}; other workers will not see it")
+
+    def start(self):
+        """Start the listener and wait (bounded) until it has replayed the control topic"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._caught_up.clear()
+            self._thread = threading.Thread(target=self._follow, name="cancellation-listener", daemon=True)
+        self._thread.start()
+        if not self._caught_up.wait(self.STARTUP_WAIT_SECONDS):
+            logger.warning("Cancellation listener still replaying; starting without it")
+
+    def stop(self):
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _connect(self):
+        """Group-less consumer at the start of every control partition, and the offsets to replay up to"""
+        consumer_class = MemoryKafkaConsumer if config.MESSAGE_BACKEND == "memory" else KafkaConsumer
+        consumer = consumer_class(
+            bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS,
+            group_id=None,
+            value_deserializer=default_serializer.deserialize,
+            enable_auto_commit=False
+        )
+        try:
+            partitions = consumer.partitions_for_topic(KafkaTopics.SUPERVISOR_CONTROL)
+            if not partitions:
+                raise RuntimeError(f"Topic {KafkaTopics.SUPERVISOR_CONTROL} not found")
+            tps = [TopicPartition(KafkaTopics.SUPERVISOR_CONTROL, partition) for partition in partitions]
+            consumer.assign(tps)
+            for tp, offset in consumer.beginning_offsets(tps).items():
+                consumer.seek(tp, offset)
+            end_offsets = consumer.end_offsets(tps)
+        except Exception:
+            consumer.close()
+            raise
+        return consumer, end_offsets
+
+    def _follow(self):
+        while not self._stopped.is_set():
+            consumer = None
+            try:
+                consumer, end_offsets = self._connect()
+                logger.info("Following job cancellations")
+                while not self._stopped.is_set():
+                    if not self._caught_up.is_set() and all(
+                            consumer.position(tp) >= offset for tp, offset in end_offsets.items()):
+                        self._caught_up.set()
+                    for records in consumer.poll(timeout_ms=1000).values():
+                        for record in records:
+                            self._apply(record)
+            except Exception as e:
+                # Fail open: workers do not wait for a listener that cannot connect
+                self._caught_up.set()
+                logger.error(f"Cancellation listener failed, reconnecting in {self.RECONNECT_SECONDS}s: {str(e)}")
+                self._stopped.wait(self.RECONNECT_SECONDS)
+            finally:
+                if consumer is not None:
+                    consumer.close()
+
+    def _apply(self, record):
+        value = record.value if isinstance(record.value, dict) else {}
+        job_id = value.get("job_id")
+        if not job_id:
+            return
+        if value.get("type") == CANCEL:
+            expires_at = record.timestamp / 1000 + self.ttl_seconds
+            if expires_at > time.time():
+                self._add(job_id, expires_at)
+        elif value.get("type") == RESTORE:
+            self._remove(job_id)
+
+class RedisCancellationRegistry(CancellationRegistry):
+    """Cancelled jobs as Redis keys that expire via TTL"""
+
+    def __init__(self, client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            if not HAS_REDIS:
+                raise ImportError("CANCELLATION_BACKEND=redis requires the redis package")
+            client = redis.Redis.from_url(config.REDIS_URL)
+        self.client = client
+
+    def _add(self, job_id: str):
+        self.client.set(f"cancelled:{job_id}", 1, ex=self.ttl_seconds)
+
+    def _remove(self, job_id: str):
+        self.client.delete(f"cancelled:{job_id}")
+
+    def _contains(self, job_id: str) -> bool:
+        return bool(self.client.exists(f"cancelled:{job_id}"))
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_cancellation_registry() -> CancellationRegistry:
+    """Get the process-wide cancellation registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            backend = (config.CANCELLATION_BACKEND or "none").lower()
+            if backend == "topic":
+                _registry = TopicCancellationRegistry()
+            elif backend == "redis":
+                _registry = RedisCancellationRegistry()
+            elif backend == "memory":
+                _registry = MemoryCancellationRegistry()
+            elif backend == "none":
+                _registry = NullCancellationRegistry()
+            else:
+                raise ValueError(f"Unknown cancellation backend: {backend}")
+            logger.info(f"Cancellation registry initialized: {backend}")
+        return _registry
+
+def reset_cancellation_registry():
+    """Stop the listener and forget all cancellations (tests)"""
+    global _registry
+    with _registry_lock:
+        if isinstance(_registry, TopicCancellationRegistry):
+            _registry.stop()
+        _registry = None
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from messaging.topics import KafkaTopics
+from utils.config import config
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Record header carrying the job's deliver_by deadline (ISO-8601, UTC) through every stage
+DEADLINE_HEADER = "deliver-by"
+
+def parse_deadline(value: Any) -> Optional[float]:
+    """Deadline as epoch seconds from a datetime, ISO-8601 string or number; None if unset or invalid"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    except ValueError:
+        logger.warning(f"Ignoring invalid deadline: {value}")
+        return None
+
+def format_deadline(deadline: float) -> str:
+    return datetime.fromtimestamp(deadline, timezone.utc).isoformat()
+
+def message_deadline(message: Any) -> Optional[float]:
+    """
+    Deadline of a stage message
+
+    Taken from the message, then its brief, then the record currently being
+    handled on this thread, so handoffs without a brief keep the job's deadline.
+    """
+    if isinstance(message, dict):
+        deadline = parse_deadline(message.get("deliver_by"))
+        if deadline is None and isinstance(message.get("brief"), dict):
+            deadline = parse_deadline(message["brief"].get("deliver_by"))
+        if deadline is not None:
+            return deadline
+
+    from messaging.retry import current_delivery
+    record = current_delivery()
+    return record_deadline(record) if record is not None else None
+
+def record_deadline(record) -> Optional[float]:
+    """Deadline of a consumed record: its header, else the message it carries"""
+    from messaging.retry import record_headers
+    deadline = parse_deadline(record_headers(record).get(DEADLINE_HEADER))
+    if deadline is None and isinstance(record.value, dict):
+        deadline = parse_deadline(record.value.get("deliver_by"))
+        if deadline is None and isinstance(record.value.get("brief"), dict):
+            deadline = parse_deadline(record.value["brief"].get("deliver_by"))
+    return deadline
+
+def stamp_deadline(topic: str, message: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[Any, Optional[Dict[str, str]]]:
+    """
+    Carry a message's deadline in the deadline header and, for stage
+    messages, in the message itself (batch handlers only see message values)
+    """
+    deadline = message_deadline(message)
+    if deadline is None:
+        return message, headers
+    value = format_deadline(deadline)
+    if (isinstance(message, dict) and message.get("deliver_by") is None
+            and KafkaTopics.split_priority(topic)[0] in KafkaTopics.PRIORITY_TOPICS):
+        message = {**message, "deliver_by": value}
+    if not headers or DEADLINE_HEADER not in headers:
+        headers = {**(headers or {}), DEADLINE_HEADER: value}
+    return message, headers
+
+class DeadlineOrder:
+    """
+    Earliest-deadline-first sort keys for buffered records
+
+    Records without a deadline, and records whose deadline has already
+    passed when they are fetched, get an implicit deadline of fetch time
+    plus DEADLINE_DEFAULT_SLACK_SECONDS: they run behind work that can
+    still make its deadline, but cannot be starved by it. Ties keep fetch
+    order, so messages of one job never overtake each other.
+    """
+
+    def __init__(self, slack_seconds: Optional[float] = None):
+        self.slack_seconds = config.DEADLINE_DEFAULT_SLACK_SECONDS if slack_seconds is None else slack_seconds
+        self._sequence = itertools.count()
+        self.missed = 0
+
+    def key(self, record) -> tuple:
+        now = time.time()
+        deadline = record_deadline(record)
+        if deadline is not None and deadline <= now:
+            self.missed += 1
+            logger.info(f"Deadline of record {record.topic}:{record.offset} passed "
+                        f"{now - deadline:.0f}s ago, deprioritizing")
+            deadline = None
+        if deadline is None:
+            deadline = now + self.slack_seconds
+        return (deadline, next(self._sequence))
@@ -0,0 +1,269 @@
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from kafka import KafkaConsumer
+from kafka.structs import TopicPartition
+from typing import Dict, Iterator, List, Optional
+from messaging.kafka_producer import KafkaProducerClient, get_shared_producer
+from messaging.memory_broker import MemoryKafkaConsumer
+from messaging.serialization import default_serializer
+from messaging.topics import KafkaTopics
+from utils.config import config
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REPLAY_HEADER = "dlq-replay"
+
+DLQEntry = namedtuple("DLQEntry", ["partition", "offset", "timestamp", "job_id", "stage",
+                                   "error_class", "error", "original_topic", "message"])
+
+def _stage_from_topic(topic: Optional[str]) -> Optional[str]:
+    """podcast.tts.generation -> tts_generation"""
+    if not topic:
+        return None
+    topic = KafkaTopics.split_priority(topic.split(".retry.")[0])[0]
+    return topic.replace("podcast.", "", 1).replace(".", "_")
+
+def _error_class_from_text(error: str) -> str:
+    match = re.match(r"^\s*([A-Z]\w*(?:Error|Exception|Timeout))\b", error or "")
+    return match.group(1) if match else "unknown"
+
+def parse_entry(record) -> DLQEntry:
+    """Normalise the DLQ payload shapes written by the producer, agents and evaluators"""
+    value = record.value if isinstance(record.value, dict) else {}
+    message = value.get("message") if isinstance(value.get("message"), dict) else None
+    original_topic = value.get("original_topic")
+    return DLQEntry(
+        partition=record.partition,
+        offset=record.offset,
+        timestamp=record.timestamp,
+        job_id=value.get("job_id") or (message or {}).get("job_id"),
+        stage=value.get("stage") or value.get("agent") or _stage_from_topic(original_topic) or "unknown",
+        error_class=value.get("error_class") or _error_class_from_text(value.get("error", "")),
+        error=value.get("error", ""),
+        original_topic=original_topic,
+        message=message
+    )
+
+class DLQIndex:
+    """In-memory index of DLQ entries by job, stage and error class"""
+
+    def __init__(self):
+        self.entries = []
+        self.by_job = {}
+        self.by_stage = {}
+        self.by_error_class = {}
+        self._replayed = {}  # (job_id, original_topic) -> last replay timestamp (ms)
+
+    def add(self, entry: DLQEntry):
+        self.entries.append(entry)
+        self.by_job.setdefault(entry.job_id, []).append(entry)
+        self.by_stage.setdefault(entry.stage, []).append(entry)
+        self.by_error_class.setdefault(entry.error_class, []).append(entry)
+
+    def mark_replayed(self, job_id: str, original_topic: str, timestamp_ms: int):
+        key = (job_id, original_topic)
+        self._replayed[key] = max(timestamp_ms, self._replayed.get(key, 0))
+
+    def is_replayed(self, entry: DLQEntry) -> bool:
+        """Whether the job was already re-driven from this stage after this failure"""
+        return self._replayed.get((entry.job_id, entry.original_topic), -1) >= entry.timestamp
+
+    def query(self, job_id: Optional[str] = None, stage: Optional[str] = None,
+              error_class: Optional[str] = None, since: Optional[datetime] = None,
+              include_replayed: bool = False) -> List[DLQEntry]:
+        """
+        Select replayable entries, keeping only the latest failure per job and topic
+
+        Args:
+            job_id: Only this job
+            stage: Only this stage (agent name such as "tts", or e.g. "outline_evaluation")
+            error_class: Only this exception class name
+            since: Only failures at or after this time
+            include_replayed: Also return entries that were already replayed
+        """
+        if job_id is not None:
+            candidates = self.by_job.get(job_id, [])
+        elif stage is not None:
+            candidates = self.by_stage.get(stage, [])
+        elif error_class is not None:
+            candidates = self.by_error_class.get(error_class, [])
+        else:
+            candidates = self.entries
+
+        since_ms = since.timestamp() * 1000 if since else None
+        latest = {}
+        for entry in candidates:
+            if entry.original_topic is None or entry.message is None or entry.job_id is None:
+                continue
+            if (stage is not None and entry.stage != stage) or \
+                    (error_class is not None and entry.error_class != error_class) or \
+                    (since_ms is not None and entry.timestamp < since_ms):
+                continue
+            key = (entry.job_id, entry.original_topic)
+            if key not in latest or entry.timestamp >= latest[key].timestamp:
+                latest[key] = entry
+
+        return [entry for entry in latest.values() if include_replayed or not self.is_replayed(entry)]
+
+    def summary(self) -> Dict:
+        """Counts for dashboards and the replay CLI"""
+        pending = self.query()
+        return {
+            "total": len(self.entries),
+            "jobs": len([job_id for job_id in self.by_job if job_id]),
+            "replayable": len(pending),
+            "by_stage": dict(Counter(entry.stage for entry in pending)),
+            "by_error_class": dict(Counter(entry.error_class for entry in pending))
+        }
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second after an initial burst"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class DLQReplayer:
+    """Selective, throttled and deduplicated replay of DLQ entries to their original topics"""
+
+    def __init__(self, producer: Optional[KafkaProducerClient] = None, repo=None):
+        self.producer = producer or get_shared_producer()
+        self.repo = repo
+
+    def _scan(self, topic: str) -> Iterator:
+        """Read a topic from the beginning up to its current end offsets"""
+        consumer_class = MemoryKafkaConsumer if config.MESSAGE_BACKEND == "memory" else KafkaConsumer
+        consumer = consumer_class(bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS, group_id=None,
+                                  enable_auto_commit=False,
+                                  value_deserializer=default_serializer.deserialize)
+        try:
+            partitions = [TopicPartition(topic, p) for p in sorted(consumer.partitions_for_topic(topic) or [])]
+            end_offsets = consumer.end_offsets(partitions)
+            remaining = {tp for tp in partitions if end_offsets[tp] > 0}
+            if not remaining:
+                return
+
+            consumer.assign(partitions)
+            for tp, offset in consumer.beginning_offsets(partitions).items():
+                consumer.seek(tp, offset)
+
+            while remaining:
+                batch = consumer.poll(timeout_ms=1000)
+                if not batch:
+                    logger.warning(f"Timed out reading {topic} before its end offsets")
+                    return
+                for tp, records in batch.items():
+                    for record in records:
+                        if record.offset < end_offsets[tp]:
+                            yield record
+                    if records[-1].offset + 1 >= end_offsets[tp]:
+                        remaining.discard(tp)
+                        consumer.pause(tp)
+        finally:
+            consumer.close()
+
+    def load_index(self) -> DLQIndex:
+        """Build an index of the DLQ and of previous replays"""
+        index = DLQIndex()
+        for record in self._scan(KafkaTopics.DLQ):
+            index.add(parse_entry(record))
+        for record in self._scan(KafkaTopics.DLQ_REPLAYED):
+            marker = record.value or {}
+            index.mark_replayed(marker.get("job_id"), marker.get("original_topic"), record.timestamp)
+        logger.info(f"Indexed {len(index.entries)} DLQ entries")
+        return index
+
+    def replay(self, index: DLQIndex, entries: List[DLQEntry], rate: Optional[float] = None,
+               concurrency: Optional[int] = None, dry_run: bool = False,
+               include_replayed: bool = False) -> Dict:
+        """
+        Re-drive DLQ entries to their original topics
+
+        Args:
+            index: Index the entries came from (updated with the new replay markers)
+            entries: Entries to replay, usually from DLQIndex.query()
+            rate: Maximum messages per second (defaults to DLQ_REPLAY_RATE)
+            concurrency: Parallel sends (defaults to DLQ_REPLAY_CONCURRENCY)
+            dry_run: Only report what would be replayed
+            include_replayed: Re-drive entries that were already replayed
+
+        Returns:
+            Dict with replayed/skipped/failed counts and job IDs
+        """
+        rate = rate or config.DLQ_REPLAY_RATE
+        concurrency = concurrency or config.DLQ_REPLAY_CONCURRENCY
+        result = {"replayed": [], "skipped": [], "failed": []}
+
+        # Never re-drive the same job twice in one run, or a job that has moved on since it failed
+        selected = {}
+        for entry in sorted(entries, key=lambda e: e.timestamp):
+            if not include_replayed and index.is_replayed(entry):
+                result["skipped"].append(entry.job_id)
+            else:
+                selected[entry.job_id] = entry
+        if self.repo is not None and selected:
+            statuses = self.repo.get_job_statuses(list(selected))
+            for job_id in list(selected):
+                if statuses.get(job_id) != "FAILED":
+                    result["skipped"].append(job_id)
+                    del selected[job_id]
+
+        if dry_run:
+            result["replayed"] = list(selected)
+            return self._counts(result, dry_run)
+
+        limiter = TokenBucket(rate, burst=concurrency)
+        lock = threading.Lock()
+
+        def replay_one(entry: DLQEntry):
+            limiter.acquire()
+            sent = self.producer.send_message(entry.original_topic, entry.message, key=entry.job_id,
+                                              headers={REPLAY_HEADER: f"{entry.partition}:{entry.offset}"})
+            if sent:
+                self.producer.send_message(KafkaTopics.DLQ_REPLAYED, {
+                    "job_id": entry.job_id,
+                    "original_topic": entry.original_topic,
+                    "dlq_partition": entry.partition,
+                    "dlq_offset": entry.offset,
+                    "replayed_at": datetime.now(timezone.utc).isoformat()
+                }, key=f"{entry.job_id}:{entry.original_topic}")
+                index.mark_replayed(entry.job_id, entry.original_topic, int(time.time() * 1000))
+            with lock:
+                result["replayed" if sent else "failed"].append(entry.job_id)
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dlq-replay") as executor:
+            list(executor.map(replay_one, selected.values()))
+
+        return self._counts(result, dry_run)
+
+    @staticmethod
+    def _counts(result: Dict, dry_run: bool) -> Dict:
+        logger.info(f"DLQ replay{' (dry run)' if dry_run else ''}: {len(result['replayed'])} replayed, "
+                    f"{len(result['skipped'])} skipped, {len(result['failed'])} failed")
+        return {
+            "dry_run": dry_run,
+            "replayed": len(result["replayed"]),
+            "skipped": len(result["skipped"]),
+            "failed": len(result["failed"]),
+            "job_ids": sorted(result["replayed"])
+        }
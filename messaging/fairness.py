@@ -0,0 +1,141 @@
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+from messaging.topics import KafkaTopics
+from utils.config import config
+import hashlib
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Record header naming the submitter a stage message is queued for
+TENANT_HEADER = "tenant"
+DEFAULT_TENANT = "anonymous"
+
+def parse_tenant_weights(spec: Optional[str] = None) -> Dict[str, float]:
+    """
+    Parse tenant weights such as "alice@example.com:3,api-key:1a2b3c4d5e6f:2"
+
+    Tenants not listed weigh 1.
+    """
+    spec = config.FAIR_SHARE_WEIGHTS if spec is None else spec
+    weights = {}
+    for item in (spec or "").split(","):
+        name, _, weight = item.strip().rpartition(":")
+        if not name:
+            continue
+        if float(weight) <= 0:
+            raise ValueError(f"Weight for tenant '{name}' must be positive")
+        weights[name] = float(weight)
+    return weights
+
+def api_key_tenant(api_key: str) -> str:
+    """Tenant name for a submitter identified only by API key (the key itself is never stored)"""
+    return "api-key:" + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+def brief_tenant(brief: Any) -> Optional[str]:
+    if not isinstance(brief, dict):
+        return None
+    return brief.get("tenant") or brief.get("user_email") or None
+
+def message_tenant(message: Any) -> Optional[str]:
+    """
+    Tenant of a stage message
+
+    Taken from the message, then its brief, then the record currently being
+    handled on this thread, so handoffs without a brief keep the job's tenant.
+    """
+    if isinstance(message, dict):
+        tenant = message.get("tenant") or brief_tenant(message.get("brief"))
+        if tenant:
+            return tenant
+
+    from messaging.retry import current_delivery, record_headers
+    record = current_delivery()
+    return record_headers(record).get(TENANT_HEADER) if record is not None else None
+
+def record_tenant(record) -> str:
+    """Tenant of a consumed record: its header, else the message it carries"""
+    from messaging.retry import record_headers
+    tenant = record_headers(record).get(TENANT_HEADER)
+    if not tenant and isinstance(record.value, dict):
+        tenant = record.value.get("tenant") or brief_tenant(record.value.get("brief"))
+    return tenant or DEFAULT_TENANT
+
+def stamp_tenant(topic: str, message: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[Any, Optional[Dict[str, str]]]:
+    """Carry a message's tenant in the tenant header and, for stage messages, in the message itself"""
+    tenant = message_tenant(message)
+    if not tenant:
+        return message, headers
+    if (isinstance(message, dict) and not message.get("tenant")
+            and KafkaTopics.split_priority(topic)[0] in KafkaTopics.PRIORITY_TOPICS):
+        message = {**message, "tenant": tenant}
+    if not headers or TENANT_HEADER not in headers:
+        headers = {**(headers or {}), TENANT_HEADER: tenant}
+    return message, headers
+
+class FairQueue:
+    """
+    Deficit round robin across tenants
+
+    Each backlogged tenant is topped up by its weight when its turn comes
+    and takes one item per unit of deficit, so with weights a:2,b:1 and both
+    backlogged, a gets two items for each of b's however many it queued.
+    A tenant that empties its queue forfeits the rest of its deficit.
+    Within a tenant, items leave in heap order.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = weights or {}
+        self._queues = {}  # tenant -> heap of items
+        self._active = deque()  # backlogged tenants, the one being served first
+        self._deficit = {}
+        self._turn_started = False  # whether the head tenant got its quantum this turn
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def push(self, tenant: str, item):
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = []
+            self._deficit[tenant] = 0.0
+            self._active.append(tenant)
+        heapq.heappush(queue, item)
+
+    def pop(self) -> Tuple[str, Any]:
+        """Remove the next (tenant, item); the queue must not be empty"""
+        while True:
+            tenant = self._active[0]
+            if not self._turn_started:
+                self._deficit[tenant] += self.weights.get(tenant, 1.0)
+                self._turn_started = True
+            if self._deficit[tenant] >= 1:
+                self._deficit[tenant] -= 1
+                queue = self._queues[tenant]
+                item = heapq.heappop(queue)
+                if not queue:
+                    self._forget(tenant)
+                return tenant, item
+            # Deficit spent: the next tenant's turn
+            self._active.rotate(-1)
+            self._turn_started = False
+
+    def retain(self, keep: Callable[[Any], bool]):
+        """Drop items for which keep(item) is false"""
+        for tenant, queue in list(self._queues.items()):
+            kept = [item for item in queue if keep(item)]
+            if len(kept) == len(queue):
+                continue
+            if not kept:
+                self._forget(tenant)
+                continue
+            heapq.heapify(kept)
+            self._queues[tenant] = kept
+
+    def _forget(self, tenant: str):
+        if self._active[0] == tenant:
+            self._turn_started = False
+        del self._queues[tenant]
+        del self._deficit[tenant]
+        self._active.remove(tenant)
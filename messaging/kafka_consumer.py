@@ -1,48 +1,631 @@
-from kafka import KafkaConsumer
+from kafka import KafkaConsumer, ConsumerRebalanceListener
+from kafka.coordinator.assignors.range import RangePartitionAssignor
+from kafka.coordinator.assignors.roundrobin import RoundRobinPartitionAssignor
+from kafka.coordinator.assignors.sticky.sticky_assignor import StickyPartitionAssignor
 from kafka.errors import KafkaError
-import json
+from kafka.structs import OffsetAndMetadata, TopicPartition
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, deque
+import signal
+import threading
+import time
 import logging
-from typing import Callable
+from typing import Callable, Dict, List, Optional
+from messaging.cancellation import get_cancellation_registry
+from messaging.deadline import DeadlineOrder
+from messaging.fairness import parse_tenant_weights
+from messaging.memory_broker import MemoryKafkaConsumer
+from messaging.partition_cache import get_partition_cache
+from messaging.priority import WeightedLaneBuffer
+from messaging.retry import delivery_context
+from messaging.serialization import MessageSerializer, default_serializer
+from messaging.topics import KafkaTopics
+from storage.artifact_store import get_artifact_store, resolve_artifacts
+from utils.circuit_breaker import topic_providers, unavailable_providers
 from utils.config import config
+from utils.settings import settings
 
 logger = logging.getLogger(__name__)
 
+ASSIGNORS = {
+    "range": RangePartitionAssignor,
+    "roundrobin": RoundRobinPartitionAssignor,
+    "sticky": StickyPartitionAssignor,
+}
+
+def assignment_strategy(name: Optional[str] = None) -> tuple:
+    """Partition assignors for KAFKA_ASSIGNMENT_STRATEGY"""
+    name = (name or config.KAFKA_ASSIGNMENT_STRATEGY or "range").lower()
+    if name == "cooperative-sticky":
+        # kafka-python only speaks the eager protocol; sticky keeps the same owners without it
+        logger.warning("Cooperative rebalancing is not supported by kafka-python, using sticky assignment")
+        name = "sticky"
+    if name not in ASSIGNORS:
+        raise ValueError(f"Unknown assignment strategy '{name}', expected one of: {', '.join(ASSIGNORS)}")
+    # Range stays listed so members still on the default can share a generation during a rolling deploy
+    return (ASSIGNORS[name], RangePartitionAssignor) if name != "range" else (RangePartitionAssignor,)
+
+class OffsetTracker:
+    """Track in-flight offsets per partition and expose the highest contiguous completed offset"""
+
+    def __init__(self):
+        self._offsets = {}  # partition -> offsets in arrival order, oldest first
+        self._done = {}  # partition -> completed offsets not yet contiguous
+        self._ready = {}  # partition -> next offset safe to commit
+        self._committed = {}  # partition -> last committed offset
+        self._next = {}  # partition -> offset after the last one handed out
+        self._lock = threading.Lock()
+
+    def track(self, tp, offset: int):
+        """Record that a message has been handed to a worker"""
+        with self._lock:
+            self._offsets.setdefault(tp, deque()).append(offset)
+            self._done.setdefault(tp, set())
+            self._next[tp] = offset + 1
+
+    def next_offset(self, tp) -> Optional[int]:
+        """Offset to resume fetching from so nothing already handed out is fetched again"""
+        with self._lock:
+            return self._next.get(tp)
+
+    def complete(self, tp, offset: int):
+        """Mark a message as processed and advance the partition watermark"""
+        with self._lock:
+            offsets = self._offsets.get(tp)
+            if offsets is None:
+                # Partition was revoked while the handler was running
+                return
+            done = self._done[tp]
+            done.add(offset)
+            while offsets and offsets[0] in done:
+                head = offsets.popleft()
+                done.discard(head)
+                self._ready[tp] = head + 1
+
+    def committable(self) -> Dict:
+        """Get offsets that advanced since the last commit"""
+        with self._lock:
+            return {
+                tp: OffsetAndMetadata(offset, None)
+                for tp, offset in self._ready.items()
+                if self._committed.get(tp) != offset
+            }
+
+    def mark_committed(self, offsets: Dict):
+        """Remember offsets that were successfully committed"""
+        with self._lock:
+            for tp, meta in offsets.items():
+                self._committed[tp] = meta.offset
+
+    def rewind(self, tp) -> Optional[int]:
+        """Drop a partition's outstanding offsets and return the oldest, where fetching should resume"""
+        with self._lock:
+            offsets = self._offsets.get(tp)
+            if not offsets:
+                return None
+            oldest = offsets[0]
+            offsets.clear()
+            self._done[tp].clear()
+            self._next[tp] = oldest
+            return oldest
+
+    def forget(self, partitions):
+        """Drop state for partitions that are no longer assigned"""
+        with self._lock:
+            for tp in partitions:
+                self._offsets.pop(tp, None)
+                self._done.pop(tp, None)
+                self._ready.pop(tp, None)
+                self._committed.pop(tp, None)
+                self._next.pop(tp, None)
+
+class _CommitOnRevokeListener(ConsumerRebalanceListener):
+    """Commit completed work and drop partition-local state before partitions move to another consumer"""
+
+    def __init__(self, client: "KafkaConsumerClient"):
+        self.client = client
+
+    def on_partitions_revoked(self, revoked):
+        self.client._wait_for_handlers(revoked)
+        self.client._commit_completed()
+        # Buffered records stay: a partition that comes back resumes after them,
+        # and those of partitions that moved are dropped once the poll returns
+        self.client._priority_paused -= set(revoked)
+        self.client._provider_paused -= set(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        logger.info(f"Partitions assigned: {assigned}")
+        self.client._take_ownership(assigned)
+
 class KafkaConsumerClient:
-    def __init__(self, topics: list, group_id: str = ""):
-        self.consumer = KafkaConsumer(
-            *topics,
+    def __init__(self, topics: list, group_id: str = "", max_workers: Optional[int] = None,
+                 serializer: Optional[MessageSerializer] = None):
+        # Priority lanes: subscribe to every lane of each stage topic and drain them by weight.
+        # Fair share: within a lane, take turns between submitters.
+        # Deadline scheduling: within a submitter, hand out the earliest deliver_by first.
+        self.priority_buffer = None
+        if config.PRIORITY_LANES_ENABLED or config.DEADLINE_SCHEDULING_ENABLED or config.FAIR_SHARE_ENABLED:
+            self.priority_buffer = WeightedLaneBuffer(
+                capacity=None if config.PRIORITY_LANES_ENABLED else config.DISPATCH_WINDOW,
+                order=DeadlineOrder() if config.DEADLINE_SCHEDULING_ENABLED else None,
+                tenant_weights=parse_tenant_weights() if config.FAIR_SHARE_ENABLED else None
+            )
+        self._priority_paused = set()
+        self._provider_paused = set()  # partitions of topics whose provider's circuit breaker is open
+        self.topics = [lane for topic in topics for lane in self._priority_topics(topic)]
+        self.serializer = serializer or default_serializer
+        self._calls_providers = any(topic_providers(topic) for topic in self.topics)
+        self.artifacts = get_artifact_store()
+        consumer_class = MemoryKafkaConsumer if config.MESSAGE_BACKEND == "memory" else KafkaConsumer
+        self.consumer = consumer_class(
+            *self.topics,
             bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS,
             group_id=group_id or config.KAFKA_GROUP_ID,
-            value_deserializer=lambda m: json.loads(m.decode('utf-8')),
+            value_deserializer=self.serializer.deserialize,
             enable_auto_commit=False,
-            auto_offset_reset='earliest'
+            auto_offset_reset='earliest',
+            partition_assignment_strategy=assignment_strategy()
         )
         self.handlers = {}
-    
+        self.batch_handlers = {}
+        self.partition_cache = get_partition_cache()
+        self.cancellations = get_cancellation_registry()
+
+        # Batch mode: poll up to batch_size records or batch_timeout_ms, commit once per batch
+        self.batch_size = max(1, int(settings.get("worker_settings.batch_size", 1)))
+        self.batch_timeout_ms = int(settings.get("worker_settings.timeout", 300))
+
+        # Concurrent mode: bounded worker pool with per-job/partition ordering
+        self.max_workers = max_workers or settings.get("worker_settings.concurrency", 1)
+        self.max_in_flight = self.max_workers * 2
+        self.offset_tracker = OffsetTracker()
+        self._lanes = {}
+        self._lanes_lock = threading.Lock()
+        self._in_flight = 0
+        self._running = False
+
+        # Partition ownership as seen by handler threads: a rebalance holds back
+        # queued messages of revoked partitions and waits (bounded) for running ones
+        self._ownership = threading.Condition()
+        self._active = Counter()  # partition -> handlers running now
+        self._revoking = set()
+        self._lost = set()
+        self._draining = False
+        self.revoke_drain_seconds = config.KAFKA_REVOKE_DRAIN_SECONDS
+        self.drain_timeout = config.WORKER_DRAIN_TIMEOUT_SECONDS
+
     def register_handler(self, topic: str, handler: Callable):
-        """Register a message handler for a topic"""
-        self.handlers[topic] = handler
-    
+        """Register a message handler for a topic (and its priority lanes)"""
+        for lane in self._priority_topics(topic):
+            self.handlers[lane] = handler
+
+    def register_batch_handler(self, topic: str, handler: Callable[[List[dict]], None]):
+        """Register a handler that receives a list of messages for a topic (and its priority lanes)"""
+        for lane in self._priority_topics(topic):
+            self.batch_handlers[lane] = handler
+
+    def _priority_topics(self, topic: str) -> list:
+        return KafkaTopics.priority_topics(topic) if config.PRIORITY_LANES_ENABLED else [topic]
+
+    def _poll_records(self, timeout_ms: int, max_records: Optional[int] = None) -> list:
+        """
+        Poll (TopicPartition, record) pairs
+
+        With priority lanes, fetched records are buffered per lane and handed
+        out by lane weight; a lane whose buffer is full stops fetching until
+        it drains, so a flood of high-priority work cannot crowd out the
+        other lanes' records. With deadline scheduling or fair share the
+        buffer is the reorder window. Buffered records are tracked as soon as they are
+        fetched, so no commit passes one that has not run yet.
+        """
+        self._pause_for_providers()
+        if self.priority_buffer is None:
+            kwargs = {} if max_records is None else {"max_records": max_records}
+            records = self.consumer.poll(timeout_ms=timeout_ms, **kwargs)
+            return [(tp, message) for tp, messages in records.items() for message in messages]
+
+        buffer = self.priority_buffer
+        self._pause_full_priority_lanes()
+        wait_ms = timeout_ms
+        if len(buffer):
+            # Records are waiting: come back soon so they go out as the pool frees up
+            wait_ms = 0 if max_records != 0 else min(timeout_ms, 50)
+        for tp, messages in self.consumer.poll(timeout_ms=wait_ms).items():
+            for message in messages:
+                self.offset_tracker.track(tp, message.offset)
+            buffer.add(tp, messages)
+        # A rebalance inside poll() may have revoked partitions with buffered records
+        buffer.retain(self.consumer.assignment())
+        return buffer.take(max_records)
+
+    def _pause_full_priority_lanes(self):
+        """Stop fetching lanes whose buffer is full and resume those that drained"""
+        full = self.priority_buffer.full_lanes()
+        assigned = self.consumer.assignment()
+        hold = {tp for tp in assigned if KafkaTopics.split_priority(tp.topic)[1] in full}
+        if hold - self._priority_paused:
+            self.consumer.pause(*(hold - self._priority_paused))
+        release = (self._priority_paused & assigned) - hold - self._provider_paused
+        if release:
+            self.consumer.resume(*release)
+        self._priority_paused = hold
+
+    def _pause_for_providers(self):
+        """
+        Stop fetching topics whose provider (LLM, TTS, S3, SMTP) is down and
+        resume them once its circuit breaker will take a probe call
+        """
+        if not self._calls_providers:
+            return
+        assigned = self.consumer.assignment()
+        hold = {tp for tp in assigned if unavailable_providers(tp.topic)}
+        if hold - self._provider_paused:
+            logger.warning(f"Pausing {sorted({tp.topic for tp in hold})} until their providers recover")
+            self.consumer.pause(*(hold - self._provider_paused))
+        release = (self._provider_paused & assigned) - hold - self._priority_paused
+        if release:
+            logger.info(f"Resuming {sorted({tp.topic for tp in release})}")
+            self.consumer.resume(*release)
+        self._provider_paused = hold
+
+    def _commit_handled(self, messages: list):
+        """Commit after handled messages; with a buffer, only up to the oldest record still buffered"""
+        if self.priority_buffer is not None:
+            self._commit_completed()
+            return
+        offsets = {}
+        for message in messages:
+            tp = TopicPartition(message.topic, message.partition)
+            offsets[tp] = max(offsets.get(tp, 0), message.offset + 1)
+        if not offsets:
+            return
+        try:
+            self.consumer.commit(offsets={tp: OffsetAndMetadata(offset, None) for tp, offset in offsets.items()})
+        except KafkaError as e:
+            logger.error(f"Failed to commit offsets: {str(e)}")
+
+    def _rewind(self, messages: list):
+        """Seek the partitions of a failed batch back so its records are fetched and handled again"""
+        first = {}
+        for message in messages:
+            tp = TopicPartition(message.topic, message.partition)
+            first[tp] = min(first.get(tp, message.offset), message.offset)
+        if not first:
+            return
+        if self.priority_buffer is not None:
+            # Resume from the oldest record not yet done; buffered records after it are fetched again
+            self.priority_buffer.retain(self.consumer.assignment() - set(first))
+            for tp in first:
+                oldest = self.offset_tracker.rewind(tp)
+                if oldest is not None:
+                    first[tp] = min(first[tp], oldest)
+        for tp, offset in first.items():
+            logger.warning(f"Batch from {tp.topic}[{tp.partition}] failed, fetching again from offset {offset}")
+            self.consumer.seek(tp, offset)
+
+    def _complete_batch(self, messages: list):
+        """Mark a batch's handled buffered records done"""
+        if self.priority_buffer is None:
+            return
+        for message in messages:
+            self.offset_tracker.complete(TopicPartition(message.topic, message.partition), message.offset)
+
     def start_consuming(self):
-        """Start consuming messages"""
-        logger.info(f"Starting consumer for topics: {self.consumer.subscription()}")
-        
+        """
+        Start consuming messages
+
+        Handlers run on a background pool (max_workers threads, default 1)
+        while this thread keeps polling, so a TTS or script job that outlasts
+        max.poll.interval.ms never gets the member kicked out of the group.
+        """
+        self._stop_on_signals()
+        self.cancellations.start()
+        if self.batch_handlers:
+            return self._consume_batches()
+        return self._consume_concurrently()
+
+    def _stop_on_signals(self):
+        """Drain on SIGTERM/SIGINT when running as a standalone worker (the worker host handles its own)"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+
+        def handle_signal(signum, frame):
+            logger.info(f"Received signal {signum}, draining in-flight messages")
+            self.stop()
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+    def _consume_batches(self):
+        """Poll micro-batches and commit once per batch"""
+        logger.info(f"Starting batch consumer for topics: {self.topics} "
+                    f"(batch_size={self.batch_size}, timeout={self.batch_timeout_ms}ms)")
+        self.consumer.subscribe(topics=self.topics, listener=_CommitOnRevokeListener(self))
+        self._running = True
+
         try:
-            for message in self.consumer:
-                topic = message.topic
-                if topic in self.handlers:
-                    try:
-                        self.handlers[topic](message.value)
-                        self.consumer.commit()
-                    except Exception as e:
-                        logger.error(f"Error processing message from {topic}: {str(e)}")
+            while self._running:
+                batch = self._poll_batch()
+                if not batch:
+                    continue
+                failed = self._process_batch(batch)
+                handled = [message for message in batch if message.topic not in failed]
+                self._complete_batch(handled)
+                self._rewind([message for message in batch if message.topic in failed])
+                self._commit_handled(handled)
+        except KafkaError as e:
+            logger.error(f"Kafka consumer error: {str(e)}")
+        finally:
+            self.close()
+
+    def _poll_batch(self) -> list:
+        """Collect up to batch_size records, waiting at most batch_timeout_ms"""
+        batch = []
+        deadline = time.monotonic() + self.batch_timeout_ms / 1000
+
+        while len(batch) < self.batch_size:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            records = self._poll_records(timeout_ms=remaining_ms, max_records=self.batch_size - len(batch))
+            batch.extend(message for _, message in records)
+
+        return batch
+
+    def _process_batch(self, batch: list) -> set:
+        """Hand each topic's messages to its batch handler; returns the topics whose handler failed"""
+        by_topic = {}
+        for message in batch:
+            if self._cancelled(message):
+                continue
+            self._bind(message)
+            by_topic.setdefault(message.topic, []).append(message.value)
+
+        failed = set()
+        for topic, values in by_topic.items():
+            try:
+                values = [self._resolve(value) for value in values]
+                if topic in self.batch_handlers:
+                    self.batch_handlers[topic](values)
+                elif topic in self.handlers:
+                    for value in values:
+                        self.handlers[topic](value)
                 else:
                     logger.warning(f"No handler registered for topic: {topic}")
+            except Exception as e:
+                logger.error(f"Error processing batch of {len(values)} from {topic}: {str(e)}")
+                failed.add(topic)
+
+        return failed
+
+    def stop(self):
+        """Ask the poll loop to exit after the current iteration"""
+        self._running = False
+
+    def _consume_concurrently(self):
+        """Poll loop that hands messages to a bounded worker pool and commits as they complete"""
+        logger.info(f"Starting concurrent consumer for topics: {self.topics} "
+                    f"with {self.max_workers} workers")
+
+        self.consumer.subscribe(topics=self.topics, listener=_CommitOnRevokeListener(self))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kafka-handler")
+        self._running = True
+
+        try:
+            while self._running:
+                limit = None
+                if self.priority_buffer is not None:
+                    # Only take what the pool can start, leaving the rest to be ordered by lane weight
+                    with self._lanes_lock:
+                        limit = max(0, self.max_in_flight - self._in_flight)
+                for tp, message in self._poll_records(timeout_ms=1000, max_records=limit):
+                    self._dispatch(executor, tp, message)
+                self._commit_completed()
+                self._apply_backpressure()
         except KafkaError as e:
             logger.error(f"Kafka consumer error: {str(e)}")
         finally:
-            self.close()
-    
+            try:
+                self._drain()
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._commit_completed()
+                self.close()
+
+    def _drain(self):
+        """
+        Let running handlers finish before leaving the group
+
+        Partitions are paused but polling continues, so the member stays in
+        the group and commits each handler's offset as it completes; the
+        partitions only move once nothing is mid-flight. Queued messages that
+        have not started are left uncommitted for the next owner.
+        """
+        with self._ownership:
+            self._draining = True
+            self._ownership.notify_all()
+        assigned = self.consumer.assignment()
+        if assigned:
+            self.consumer.pause(*assigned)
+
+        deadline = time.monotonic() + self.drain_timeout
+        while self._handlers_running() and time.monotonic() < deadline:
+            self.consumer.poll(timeout_ms=100)
+            self._commit_completed()
+        if self._handlers_running():
+            logger.warning(f"Leaving the group with handlers still running after {self.drain_timeout}s")
+
+    def _handlers_running(self, partitions=None) -> bool:
+        with self._ownership:
+            if partitions is None:
+                return sum(self._active.values()) > 0
+            return any(self._active[tp] for tp in partitions)
+
+    def _wait_for_handlers(self, revoked):
+        """Hold back revoked partitions and give their running handlers a bounded time to finish"""
+        revoked = set(revoked)
+        deadline = time.monotonic() + self.revoke_drain_seconds
+        with self._ownership:
+            self._revoking |= revoked
+            while any(self._active[tp] for tp in revoked):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Handlers still running on revoked partitions after {self.revoke_drain_seconds}s")
+                    break
+                self._ownership.wait(remaining)
+
+    def _take_ownership(self, assigned):
+        """
+        Settle a rebalance: partitions that came back (the sticky assignor
+        keeps most of them here) carry on from where dispatch left off; the
+        rest lose their queued messages, tracked offsets and cached job data
+        """
+        assigned = set(assigned)
+        with self._ownership:
+            lost = self._revoking - assigned
+            self._lost = (self._lost | lost) - assigned
+            self._revoking = set()
+            self._ownership.notify_all()
+
+        for tp in assigned:
+            next_offset = self.offset_tracker.next_offset(tp)
+            if next_offset is not None:
+                self.consumer.seek(tp, next_offset)
+
+        if lost:
+            with self._lanes_lock:
+                for lane, queue in self._lanes.items():
+                    kept = deque(item for item in queue if item[0] not in lost)
+                    self._in_flight -= len(queue) - len(kept)
+                    self._lanes[lane] = kept
+            self.offset_tracker.forget(lost)
+            self.partition_cache.drop(lost)
+
+    def _await_providers(self, tp) -> bool:
+        """Hold a fetched message while a provider it needs is down; False if it should no longer run here"""
+        while unavailable_providers(tp.topic):
+            with self._ownership:
+                if self._draining or tp in self._lost:
+                    return False
+                self._ownership.wait(0.5)
+        return True
+
+    def _acquire(self, tp) -> bool:
+        """Wait out a rebalance in progress; False if the message should no longer run here"""
+        with self._ownership:
+            while tp in self._revoking and not self._draining:
+                self._ownership.wait()
+            if tp in self._lost or self._draining:
+                return False
+            self._active[tp] += 1
+            return True
+
+    def _release(self, tp):
+        with self._ownership:
+            self._active[tp] -= 1
+            self._ownership.notify_all()
+
+    def _lane_key(self, tp, message):
+        """Messages sharing a lane run sequentially: same job, else same partition"""
+        job_id = message.value.get("job_id") if isinstance(message.value, dict) else None
+        return (tp.topic, job_id) if job_id else tp
+
+    def _dispatch(self, executor: ThreadPoolExecutor, tp, message):
+        """Queue a message on its lane and start the lane if it is idle"""
+        if self.priority_buffer is None:
+            # Buffered records were tracked when fetched
+            self.offset_tracker.track(tp, message.offset)
+
+        if message.topic not in self.handlers:
+            logger.warning(f"No handler registered for topic: {message.topic}")
+            self.offset_tracker.complete(tp, message.offset)
+            return
+
+        self._bind(message, tp)
+        lane = self._lane_key(tp, message)
+        with self._lanes_lock:
+            self._in_flight += 1
+            if lane in self._lanes:
+                self._lanes[lane].append((tp, message))
+                return
+            self._lanes[lane] = deque([(tp, message)])
+
+        executor.submit(self._drain_lane, lane)
+
+    def _drain_lane(self, lane):
+        """Run queued messages for one lane in arrival order"""
+        while True:
+            with self._lanes_lock:
+                queue = self._lanes[lane]
+                if not queue:
+                    del self._lanes[lane]
+                    return
+                tp, message = queue.popleft()
+            self._process_message(tp, message)
+
+    def _process_message(self, tp, message):
+        """Run the registered handler and record completion"""
+        if not self._await_providers(tp) or not self._acquire(tp):
+            # Not completed, so the offset stays uncommitted for whoever owns the partition next
+            with self._lanes_lock:
+                self._in_flight -= 1
+            return
+        try:
+            if not self._cancelled(message):
+                with delivery_context(message):
+                    self.handlers[message.topic](self._resolve(message.value))
+        except Exception as e:
+            logger.error(f"Error processing message from {message.topic}: {str(e)}")
+        finally:
+            self.offset_tracker.complete(tp, message.offset)
+            self._release(tp)
+            with self._lanes_lock:
+                self._in_flight -= 1
+
+    def _cancelled(self, message) -> bool:
+        """Whether the message belongs to a cancelled job; its offset is still committed"""
+        job_id = message.value.get("job_id") if isinstance(message.value, dict) else None
+        if not self.cancellations.is_cancelled(job_id):
+            return False
+        logger.info(f"Skipping message from {message.topic} for cancelled job {job_id}")
+        return True
+
+    def _bind(self, message, tp=None):
+        """Tie the message's job to its partition in the partition-affine cache"""
+        job_id = message.value.get("job_id") if isinstance(message.value, dict) else None
+        if job_id:
+            self.partition_cache.bind(job_id, tp or TopicPartition(message.topic, message.partition))
+
+    def _resolve(self, value):
+        """Load any claim-check artifact references before the handler sees the message"""
+        return resolve_artifacts(value, self.artifacts)
+
+    def _commit_completed(self):
+        """Commit the highest contiguous completed offset per partition"""
+        offsets = self.offset_tracker.committable()
+        if not offsets:
+            return
+        try:
+            self.consumer.commit(offsets=offsets)
+            self.offset_tracker.mark_committed(offsets)
+        except KafkaError as e:
+            logger.error(f"Failed to commit offsets: {str(e)}")
+
+    def _apply_backpressure(self):
+        """Pause fetching while the worker pool is saturated"""
+        with self._lanes_lock:
+            saturated = self._in_flight >= self.max_in_flight
+
+        if saturated:
+            assigned = self.consumer.assignment()
+            if assigned:
+                self.consumer.pause(*assigned)
+        else:
+            # Partitions held back by a full priority lane or a down provider stay paused
+            paused = self.consumer.paused() - self._priority_paused - self._provider_paused
+            if paused:
+                self.consumer.resume(*paused)
+
     def close(self):
         if hasattr(self, 'consumer'):
             self.consumer.close()
@@ -1,7 +1,16 @@
 from kafka import KafkaProducer
 from kafka.errors import KafkaError, NoBrokersAvailable
-import json
+import atexit
 import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from messaging.deadline import stamp_deadline
+from messaging.fairness import stamp_tenant
+from messaging.memory_broker import MemoryKafkaProducer
+from messaging.partitioning import get_partitioner, job_key
+from messaging.priority import route
+from messaging.serialization import MessageSerializer, default_serializer
+from storage.artifact_store import get_artifact_store
 from utils.config import config
 import time
 from datetime import datetime, timezone
@@ -9,18 +18,27 @@ from datetime import datetime, timezone
 logger = logging.getLogger(__name__)
 
 class KafkaProducerClient:
-    def __init__(self, retries=5, delay=5):
+    def __init__(self, retries=5, delay=5, linger_ms: Optional[int] = None,
+                 batch_size: Optional[int] = None, compression_type: Optional[str] = None,
+                 serializer: Optional[MessageSerializer] = None):
         self.producer = None
+        self.serializer = serializer or default_serializer
+        self.artifacts = get_artifact_store()
         attempt = 0
+        producer_class = MemoryKafkaProducer if config.MESSAGE_BACKEND == "memory" else KafkaProducer
         
         while attempt < retries:
             try:
-                self.producer = KafkaProducer(
+                self.producer = producer_class(
                     bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS,
-                    value_serializer=lambda v: json.dumps(v, default=str).encode('utf-8'),
+                    value_serializer=self.serializer.serialize,
                     key_serializer=lambda k: k.encode('utf-8') if k else None,
                     retries=3,
-                    acks='all'
+                    acks='all',
+                    linger_ms=config.KAFKA_PRODUCER_LINGER_MS if linger_ms is None else linger_ms,
+                    batch_size=batch_size or config.KAFKA_PRODUCER_BATCH_SIZE,
+                    compression_type=compression_type or config.KAFKA_PRODUCER_COMPRESSION,
+                    partitioner=get_partitioner()
                 )
                 logger.info("KafkaProducer initialized successfully")
                 break
@@ -29,33 +47,152 @@ class KafkaProducerClient:
                 logger.warning(f"Kafka not available (attempt {attempt}/{retries}): {e}")
                 if attempt < retries:
                     time.sleep(delay)
-        
+
         if self.producer is None:
             logger.error("Failed to connect to Kafka after multiple retries")
             raise ConnectionError("Could not connect to Kafka")
-
-    def send_message(self, topic: str, message: dict, key: str = "") -> bool:
+        
+    def send_message(self, topic: str, message: dict, key: str = "",
+                     headers: Optional[Dict[str, str]] = None) -> bool:
         """Send message to Kafka topic"""
         try:
-            key = key or ""
-            future = self.producer.send(topic, value=message, key=key)
+            key = key or job_key(message)
+            topic, message = route(topic, message)
+            message, headers = stamp_deadline(topic, message, headers)
+            message, headers = stamp_tenant(topic, message, headers)
+            message = self._offload(message)
+            future = self.producer.send(topic, value=message, key=key, headers=self._headers(headers))
             record_metadata = future.get(timeout=10)
             logger.info(f"Message sent to {topic} at offset {record_metadata.offset}")
             return True
         except KafkaError as e:
             logger.error(f"Failed to send message to {topic}: {str(e)}")
-            self._send_to_dlq(topic, message, str(e))
+            self._send_to_dlq(topic, message, str(e), type(e).__name__)
             return False
         except Exception as e:
             logger.error(f"Unexpected error sending message to {topic}: {str(e)}")
             return False
 
-    def _send_to_dlq(self, original_topic: str, message: dict, error: str):
+    def send_message_async(self, topic: str, message: dict, key: str = "",
+                           on_success: Optional[Callable] = None,
+                           on_error: Optional[Callable] = None,
+                           headers: Optional[Dict[str, str]] = None):
+        """
+        Send message without waiting for the broker acknowledgement
+
+        Args:
+            topic: Kafka topic
+            message: Message payload
+            key: Message key (defaults to the message's job_id)
+            headers: Record headers (optional)
+            on_success: Called with the record metadata once delivered
+            on_error: Called with the exception if delivery fails
+
+        Returns:
+            The delivery future, or None if the message could not be enqueued
+        """
+        try:
+            key = key or job_key(message)
+            topic, message = route(topic, message)
+            message, headers = stamp_deadline(topic, message, headers)
+            message, headers = stamp_tenant(topic, message, headers)
+            message = self._offload(message)
+            future = self.producer.send(topic, value=message, key=key, headers=self._headers(headers))
+        except KafkaError as e:
+            logger.error(f"Failed to enqueue message for {topic}: {str(e)}")
+            self._send_to_dlq(topic, message, str(e), type(e).__name__)
+            if on_error:
+                on_error(e)
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error enqueueing message for {topic}: {str(e)}")
+            if on_error:
+                on_error(e)
+            return None
+
+        def _delivered(record_metadata):
+            logger.debug(f"Message delivered to {topic} at offset {record_metadata.offset}")
+            if on_success:
+                on_success(record_metadata)
+
+        def _failed(exc):
+            logger.error(f"Async delivery to {topic} failed: {str(exc)}")
+            self._send_to_dlq(topic, message, str(exc), type(exc).__name__)
+            if on_error:
+                on_error(exc)
+
+        future.add_callback(_delivered)
+        future.add_errback(_failed)
+        return future
+
+    def send_many(self, messages: List[Tuple], timeout: float = 10) -> int:
+        """
+        Pipeline several sends and wait for all acknowledgements once
+
+        Args:
+            messages: (topic, message) or (topic, message, key) tuples
+            timeout: Seconds to wait for the whole batch to be delivered
+
+        Returns:
+            int: Number of messages delivered
+        """
+        futures = []
+        for item in messages:
+            topic, message = item[0], item[1]
+            key = item[2] if len(item) > 2 else ""
+            future = self.send_message_async(topic, message, key)
+            if future is not None:
+                futures.append((topic, future))
+
+        self.flush(timeout=timeout)
+
+        delivered = 0
+        for topic, future in futures:
+            try:
+                future.get(timeout=0)
+                delivered += 1
+            except Exception as e:
+                # Delivery failure was already routed to the DLQ by the errback
+                logger.error(f"Batched send to {topic} failed: {str(e)}")
+
+        logger.info(f"Delivered {delivered}/{len(messages)} batched messages")
+        return delivered
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until all buffered messages are sent"""
+        if self.producer:
+            try:
+                self.producer.flush(timeout=timeout)
+            except KafkaError as e:
+                logger.error(f"Failed to flush producer: {str(e)}")
+
+    def is_connected(self) -> bool:
+        """Check whether the producer can reach a bootstrap broker"""
+        try:
+            return bool(self.producer and self.producer.bootstrap_connected())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _headers(headers: Optional[Dict[str, str]]) -> Optional[List[Tuple[str, bytes]]]:
+        """Encode a header dict as kafka-python (key, bytes) pairs"""
+        if not headers:
+            return None
+        return [(name, str(value).encode('utf-8')) for name, value in headers.items()]
+
+    def _offload(self, message: dict) -> dict:
+        """Swap large outline/script fields for artifact references (claim-check)"""
+        if self.artifacts is None:
+            return message
+        return self.artifacts.offload(message)
+
+    def _send_to_dlq(self, original_topic: str, message: dict, error: str, error_class: str = ""):
         """Send failed messages to Dead Letter Queue"""
         dlq_message = {
             "original_topic": original_topic,
             "message": message,
             "error": error,
+            "error_class": error_class,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
         try:
@@ -66,4 +203,48 @@ class KafkaProducerClient:
     
     def close(self):
         if self.producer:
-            self.producer.close()
\ No newline at end of file
+            self.flush()
+            self.producer.close()
+
+class ProducerRegistry:
+    """Process-wide registry that hands out one shared, thread-safe producer"""
+
+    def __init__(self):
+        self._producers = {}
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def get(self, factory: Optional[Callable] = None) -> KafkaProducerClient:
+        """Get the shared producer, connecting on first use"""
+        factory = factory or KafkaProducerClient
+        producer = self._producers.get(factory)
+        if producer is not None:
+            return producer
+
+        # Concurrent first callers wait for one connection instead of racing to open their own
+        with self._lock:
+            if factory not in self._producers:
+                self._producers[factory] = factory()
+                if not self._atexit_registered:
+                    atexit.register(self.close_all)
+                    self._atexit_registered = True
+            return self._producers[factory]
+
+    def close_all(self):
+        """Flush and close every shared producer"""
+        with self._lock:
+            producers = list(self._producers.values())
+            self._producers.clear()
+
+        for producer in producers:
+            try:
+                producer.close()
+            except Exception as e:
+                logger.error(f"Failed to close shared producer: {str(e)}")
+
+# Global producer registry
+producer_registry = ProducerRegistry()
+
+def get_shared_producer(factory: Optional[Callable] = None) -> KafkaProducerClient:
+    """Get the process-wide KafkaProducerClient"""
+    return producer_registry.get(factory)
@@ -0,0 +1,192 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from utils.config import config
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Message field numbering the rounds of a regeneration loop (evaluation sends a stage's output back);
+# stages forward it with their handoff so every round gets its own ledger entries
+REGENERATION_FIELD = "regeneration"
+
+# Optional Redis backend
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+class MessageLedger(ABC):
+    """
+    Dedupe ledger of processed stage messages
+
+    A stage records its completed handoff (next topic + message) under a key
+    derived from job_id, stage and the incoming message content before sending
+    it. A redelivered message then costs one lookup: the stored handoff is
+    re-sent instead of repeating the LLM call or TTS synthesis. Failed
+    attempts are never recorded, so retries still run.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = config.LEDGER_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+
+    @staticmethod
+    def key(job_id: str, stage: str, message: Any, regeneration: int = 0) -> str:
+        """
+        Ledger key for one stage execution of one message
+
+        Args:
+            job_id: Job the message belongs to
+            stage: Stage handling it
+            message: Message content
+            regeneration: Regeneration round; a round repeating an earlier
+                one's content and feedback still runs instead of replaying it
+        """
+        content = json.dumps(message, sort_keys=True, default=str).encode('utf-8')
+        content_hash = hashlib.sha256(content).hexdigest()
+        return hashlib.sha256(f"{job_id}:{stage}:{regeneration}:{content_hash}".encode('utf-8')).hexdigest()
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def _put(self, key: str, entry: Dict):
+        pass
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get the recorded handoff for a key, or None if the message was not processed"""
+        try:
+            return self._get(key)
+        except Exception as e:
+            # Fail open: a ledger outage costs duplicate work, never lost messages
+            logger.error(f"Ledger lookup failed: {str(e)}")
+            return None
+
+    def record(self, key: str, job_id: str, stage: str, topic: Optional[str] = None,
+               message: Optional[dict] = None):
+        """Record a completed stage execution and the handoff it produced"""
+        try:
+            self._put(key, {"job_id": job_id, "stage": stage, "topic": topic, "message": message})
+        except Exception as e:
+            logger.error(f"Ledger write failed for job {job_id} ({stage}): {str(e)}")
+
+    def handoff(self, producer, key: str, job_id: str, stage: str, topic: str, message: dict) -> bool:
+        """Record the handoff, then send it; a crash in between is healed by redeliver()"""
+        self.record(key, job_id, stage, topic, message)
+        return producer.send_message(topic, message, key=job_id)
+
+    def redeliver(self, producer, entry: Dict) -> bool:
+        """Re-send the handoff recorded for an already processed message"""
+        if not entry.get("topic"):
+            return True
+        return producer.send_message(entry["topic"], entry["message"], key=entry.get("job_id") or "")
+
+class NullLedger(MessageLedger):
+    """Ledger that never remembers anything (LEDGER_BACKEND=none)"""
+
+    def _get(self, key: str) -> Optional[Dict]:
+        return None
+
+    def _put(self, key: str, entry: Dict):
+        pass
+
+class MemoryLedger(MessageLedger):
+    """Process-local ledger for tests and the single-process memory backend"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry
+
+    def _put(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, entry)
+
+class RedisLedger(MessageLedger):
+    """Ledger in Redis; entries expire via key TTL"""
+
+    def __init__(self, client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            if not HAS_REDIS:
+                raise ImportError("LEDGER_BACKEND=redis requires the redis package")
+            client = redis.Redis.from_url(config.REDIS_URL)
+        self.client = client
+
+    def _get(self, key: str) -> Optional[Dict]:
+        data = self.client.get(f"ledger:{key}")
+        return json.loads(data) if data else None
+
+    def _put(self, key: str, entry: Dict):
+        self.client.set(f"ledger:{key}", json.dumps(entry, default=str), ex=self.ttl_seconds)
+
+class PostgresLedger(MessageLedger):
+    """Ledger in the processed_messages table; expired rows are purged periodically"""
+
+    def __init__(self, repo=None, **kwargs):
+        super().__init__(**kwargs)
+        if repo is None:
+            from database.repositories import PodcastRepository
+            repo = PodcastRepository()
+        self.repo = repo
+        self._last_purge = 0.0
+
+    def _get(self, key: str) -> Optional[Dict]:
+        row = self.repo.get_processed_message(key)
+        if row is None:
+            return None
+        return {"job_id": row.job_id, "stage": row.stage,
+                "topic": row.handoff_topic, "message": row.handoff_message}
+
+    def _put(self, key: str, entry: Dict):
+        expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=self.ttl_seconds)
+        self.repo.record_processed_message(key, entry["job_id"], entry["stage"],
+                                           entry["topic"], entry["message"], expires_at)
+        if time.monotonic() - self._last_purge >= config.LEDGER_PURGE_INTERVAL_SECONDS:
+            self._last_purge = time.monotonic()
+            deleted = self.repo.purge_expired_processed_messages()
+            if deleted:
+                logger.info(f"Purged {deleted} expired ledger entries")
+
+def regeneration(message: Dict) -> int:
+    """Regeneration round a message belongs to (0 before any regeneration)"""
+    return int((message or {}).get(REGENERATION_FIELD) or 0)
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger() -> MessageLedger:
+    """Get the process-wide processed-message ledger"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            backend = (config.LEDGER_BACKEND or "none").lower()
+            if backend == "postgres":
+                _ledger = PostgresLedger()
+            elif backend == "redis":
+                _ledger = RedisLedger()
+            elif backend == "memory":
+                _ledger = MemoryLedger()
+            elif backend == "none":
+                _ledger = NullLedger()
+            else:
+                raise ValueError(f"Unknown ledger backend: {backend}")
+            logger.info(f"Message ledger initialized: {backend}")
+        return _ledger
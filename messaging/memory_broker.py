@@ -0,0 +1,419 @@
+"""
+In-process message broker
+
+Implements the subset of the kafka-python ``KafkaProducer``, ``KafkaConsumer``
+and ``KafkaAdminClient`` API used by the messaging clients and ``QueueManager``
+(topics, partitions, consumer groups, offsets and commits). Set ``MESSAGE_BACKEND=memory``
+to run the pipeline in one process for load tests and local benchmarking
+without a broker.
+"""
+
+from collections import namedtuple
+from kafka.structs import OffsetAndMetadata, TopicPartition
+from typing import Dict, List, Optional
+from messaging.partitioning import get_partitioner
+from utils.config import config
+import itertools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+MemoryRecord = namedtuple("MemoryRecord", ["topic", "partition", "offset", "timestamp", "key", "value", "headers"])
+RecordMetadata = namedtuple("RecordMetadata", ["topic", "partition", "topic_partition", "offset", "timestamp"])
+
+class InMemoryBroker:
+    """Thread-safe topic log with consumer-group coordination"""
+
+    def __init__(self, default_partitions: Optional[int] = None):
+        self.default_partitions = default_partitions or config.MEMORY_BROKER_PARTITIONS
+        self._topics = {}  # topic -> list of partition logs
+        self._topic_configs = {}  # topic -> config overrides (recorded, not enforced)
+        self._committed = {}  # (group_id, TopicPartition) -> offset
+        self._groups = {}  # group_id -> list of member consumers
+        self._partitioner = get_partitioner()
+        self._round_robin = {}  # topic -> counter for unkeyed messages
+        self._member_ids = itertools.count()
+        self._cond = threading.Condition()
+
+    # Topics
+
+    def create_topic(self, topic: str, partitions: Optional[int] = None):
+        """Create a topic, or grow an existing one to the requested partition count"""
+        with self._cond:
+            logs = self._topics.setdefault(topic, [])
+            target = partitions or self.default_partitions
+            grew = len(logs) < target
+            while len(logs) < target:
+                logs.append([])
+            if grew:
+                for group_id in self._groups:
+                    self._rebalance(group_id)
+
+    def set_topic_configs(self, topic: str, configs: Dict[str, str]):
+        with self._cond:
+            self._topic_configs[topic] = dict(configs or {})
+
+    def topic_configs(self, topic: str) -> Dict[str, str]:
+        with self._cond:
+            return dict(self._topic_configs.get(topic, {}))
+
+    def partitions_for_topic(self, topic: str) -> set:
+        with self._cond:
+            self._ensure_topic(topic)
+            return set(range(len(self._topics[topic])))
+
+    def topics(self) -> List[str]:
+        with self._cond:
+            return list(self._topics)
+
+    def _ensure_topic(self, topic: str):
+        if topic not in self._topics:
+            # Mirrors broker-side auto topic creation
+            self._topics[topic] = [[] for _ in range(self.default_partitions)]
+
+    # Produce / fetch
+
+    def append(self, topic: str, key: Optional[bytes], value: bytes,
+               partition: Optional[int] = None, headers=None) -> RecordMetadata:
+        with self._cond:
+            self._ensure_topic(topic)
+            logs = self._topics[topic]
+            if partition is None and key is None:
+                # Deterministic round-robin instead of Kafka's random choice
+                counter = self._round_robin.setdefault(topic, itertools.count())
+                partition = next(counter) % len(logs)
+            elif partition is None:
+                all_partitions = list(range(len(logs)))
+                partition = self._partitioner(key, all_partitions, all_partitions)
+            log = logs[partition]
+            timestamp = int(time.time() * 1000)
+            offset = len(log)
+            log.append(MemoryRecord(topic, partition, offset, timestamp, key, value, headers or []))
+            self._cond.notify_all()
+            return RecordMetadata(topic, partition, TopicPartition(topic, partition), offset, timestamp)
+
+    def fetch(self, tp: TopicPartition, offset: int, max_records: int) -> list:
+        with self._cond:
+            logs = self._topics.get(tp.topic, [])
+            if tp.partition >= len(logs):
+                return []
+            return logs[tp.partition][offset:offset + max_records]
+
+    def end_offset(self, tp: TopicPartition) -> int:
+        with self._cond:
+            logs = self._topics.get(tp.topic, [])
+            return len(logs[tp.partition]) if tp.partition < len(logs) else 0
+
+    def wait_for_data(self, timeout: float):
+        with self._cond:
+            self._cond.wait(timeout)
+
+    # Consumer groups
+
+    def commit(self, group_id: str, offsets: Dict[TopicPartition, int]):
+        with self._cond:
+            for tp, offset in offsets.items():
+                self._committed[(group_id, tp)] = offset
+
+    def committed(self, group_id: str, tp: TopicPartition) -> Optional[int]:
+        with self._cond:
+            return self._committed.get((group_id, tp))
+
+    def groups(self) -> List[str]:
+        """Groups with active members or committed offsets"""
+        with self._cond:
+            return sorted(set(self._groups) | {group_id for group_id, _ in self._committed})
+
+    def join(self, group_id: str, member: "MemoryKafkaConsumer"):
+        with self._cond:
+            for topic in member.subscription():
+                self._ensure_topic(topic)
+            members = self._groups.setdefault(group_id, [])
+            if member not in members:
+                member.member_id = next(self._member_ids)
+                members.append(member)
+            self._rebalance(group_id)
+
+    def leave(self, group_id: str, member: "MemoryKafkaConsumer"):
+        with self._cond:
+            members = self._groups.get(group_id, [])
+            if member in members:
+                members.remove(member)
+                self._rebalance(group_id)
+
+    def _rebalance(self, group_id: str):
+        """Range-assign partitions; members apply the result on their next poll"""
+        members = sorted(self._groups.get(group_id, []), key=lambda m: m.member_id)
+        assignments = {member: set() for member in members}
+
+        topics = sorted({topic for member in members for topic in member.subscription()})
+        for topic in topics:
+            subscribers = [m for m in members if topic in m.subscription()]
+            partitions = len(self._topics.get(topic, []))
+            per_member, extra = divmod(partitions, len(subscribers))
+            start = 0
+            for i, member in enumerate(subscribers):
+                count = per_member + (1 if i < extra else 0)
+                assignments[member].update(TopicPartition(topic, p) for p in range(start, start + count))
+                start += count
+
+        for member, assigned in assignments.items():
+            member._pending_assignment = assigned
+        self._cond.notify_all()
+
+class _MemoryFuture:
+    """Already-resolved stand-in for kafka-python's FutureRecordMetadata"""
+
+    def __init__(self, value=None, exception=None):
+        self.value = value
+        self.exception = exception
+
+    def is_done(self) -> bool:
+        return True
+
+    def succeeded(self) -> bool:
+        return self.exception is None
+
+    def get(self, timeout=None):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def add_callback(self, fn, *args, **kwargs):
+        if self.exception is None:
+            fn(*args, self.value, **kwargs)
+        return self
+
+    def add_errback(self, fn, *args, **kwargs):
+        if self.exception is not None:
+            fn(*args, self.exception, **kwargs)
+        return self
+
+class MemoryKafkaProducer:
+    """In-process replacement for kafka.KafkaProducer"""
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None, value_serializer=None,
+                 key_serializer=None, **kwargs):
+        self.broker = broker or get_broker()
+        self.value_serializer = value_serializer
+        self.key_serializer = key_serializer
+        self._closed = False
+
+    def send(self, topic: str, value=None, key=None, headers=None, partition=None):
+        if self._closed:
+            return _MemoryFuture(exception=RuntimeError("Producer is closed"))
+        key_bytes = self.key_serializer(key) if self.key_serializer else key
+        value_bytes = self.value_serializer(value) if self.value_serializer else value
+        metadata = self.broker.append(topic, key_bytes, value_bytes, partition, headers)
+        return _MemoryFuture(value=metadata)
+
+    def flush(self, timeout=None):
+        pass
+
+    def bootstrap_connected(self) -> bool:
+        return not self._closed
+
+    def close(self, timeout=None):
+        self._closed = True
+
+class MemoryKafkaConsumer:
+    """In-process replacement for kafka.KafkaConsumer"""
+
+    def __init__(self, *topics, group_id: Optional[str] = None, value_deserializer=None,
+                 auto_offset_reset: str = 'latest', broker: Optional[InMemoryBroker] = None, **kwargs):
+        self.broker = broker or get_broker()
+        self.group_id = group_id or config.KAFKA_GROUP_ID
+        self.value_deserializer = value_deserializer
+        self.auto_offset_reset = auto_offset_reset
+        self.member_id = None
+        self._subscription = set()
+        self._listener = None
+        self._assignment = set()
+        self._pending_assignment = None
+        self._positions = {}
+        self._paused = set()
+        self._closed = False
+        if topics:
+            self.subscribe(topics=list(topics))
+
+    def subscribe(self, topics: list, listener=None):
+        self._subscription = set(topics)
+        self._listener = listener
+        self.broker.join(self.group_id, self)
+
+    def subscription(self) -> set:
+        return set(self._subscription)
+
+    def assignment(self) -> set:
+        return set(self._assignment)
+
+    def pause(self, *partitions):
+        self._paused.update(partitions)
+
+    def resume(self, *partitions):
+        self._paused.difference_update(partitions)
+
+    def paused(self) -> set:
+        return set(self._paused)
+
+    def assign(self, partitions):
+        """Manually assign partitions outside any consumer group"""
+        self._assignment = set(partitions)
+        self._paused &= self._assignment
+        self._positions = {tp: self.broker.end_offset(tp) for tp in self._assignment}
+
+    def seek(self, tp: TopicPartition, offset: int):
+        self._positions[tp] = offset
+
+    def partitions_for_topic(self, topic: str) -> set:
+        return self.broker.partitions_for_topic(topic)
+
+    def end_offsets(self, partitions) -> Dict[TopicPartition, int]:
+        return {tp: self.broker.end_offset(tp) for tp in partitions}
+
+    def beginning_offsets(self, partitions) -> Dict[TopicPartition, int]:
+        return {tp: 0 for tp in partitions}
+
+    def committed(self, tp: TopicPartition) -> Optional[int]:
+        return self.broker.committed(self.group_id, tp)
+
+    def position(self, tp: TopicPartition) -> int:
+        return self._positions[tp]
+
+    def _apply_rebalance(self):
+        assigned = self._pending_assignment
+        if assigned is None:
+            return
+        self._pending_assignment = None
+
+        if self._listener is not None and self._assignment:
+            self._listener.on_partitions_revoked(set(self._assignment))
+
+        self._assignment = set(assigned)
+        self._paused &= self._assignment
+        self._positions = {}
+        for tp in self._assignment:
+            committed = self.broker.committed(self.group_id, tp)
+            if committed is not None:
+                self._positions[tp] = committed
+            elif self.auto_offset_reset == 'earliest':
+                self._positions[tp] = 0
+            else:
+                self._positions[tp] = self.broker.end_offset(tp)
+
+        if self._listener is not None:
+            self._listener.on_partitions_assigned(set(self._assignment))
+
+    def poll(self, timeout_ms: int = 0, max_records: Optional[int] = None) -> Dict[TopicPartition, list]:
+        max_records = max_records or 500
+        deadline = time.monotonic() + timeout_ms / 1000
+
+        while not self._closed:
+            self._apply_rebalance()
+
+            records = {}
+            remaining = max_records
+            for tp in sorted(self._assignment - self._paused):
+                if remaining <= 0:
+                    break
+                batch = self.broker.fetch(tp, self._positions[tp], remaining)
+                if not batch:
+                    continue
+                records[tp] = [self._deserialize(record) for record in batch]
+                self._positions[tp] = batch[-1].offset + 1
+                remaining -= len(batch)
+
+            if records:
+                return records
+
+            wait = deadline - time.monotonic()
+            if wait <= 0:
+                return {}
+            self.broker.wait_for_data(wait)
+
+        return {}
+
+    def _deserialize(self, record: MemoryRecord) -> MemoryRecord:
+        value = self.value_deserializer(record.value) if self.value_deserializer else record.value
+        return record._replace(value=value)
+
+    def commit(self, offsets: Optional[Dict] = None):
+        if offsets is None:
+            offsets = {tp: self._positions[tp] for tp in self._assignment}
+        else:
+            offsets = {tp: getattr(meta, "offset", meta) for tp, meta in offsets.items()}
+        self.broker.commit(self.group_id, offsets)
+
+    def __iter__(self):
+        while not self._closed:
+            for records in self.poll(timeout_ms=1000).values():
+                for record in records:
+                    yield record
+
+    def close(self, autocommit=True):
+        if self._closed:
+            return
+        self._closed = True
+        self.broker.leave(self.group_id, self)
+
+class MemoryKafkaAdminClient:
+    """In-process replacement for the kafka.KafkaAdminClient group and topic calls"""
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None, **kwargs):
+        self.broker = broker or get_broker()
+
+    def list_topics(self) -> List[str]:
+        return self.broker.topics()
+
+    def describe_topics(self, topics=None) -> List[dict]:
+        return [{"topic": topic, "partitions": [{"partition": p} for p in sorted(self.broker.partitions_for_topic(topic))]}
+                for topic in (topics or self.broker.topics())]
+
+    def create_topics(self, new_topics, **kwargs):
+        for new_topic in new_topics:
+            self.broker.create_topic(new_topic.name, new_topic.num_partitions)
+            self.broker.set_topic_configs(new_topic.name, new_topic.topic_configs)
+
+    def create_partitions(self, topic_partitions, **kwargs):
+        for topic, new_partitions in topic_partitions.items():
+            self.broker.create_topic(topic, new_partitions.total_count)
+
+    def alter_configs(self, config_resources):
+        for resource in config_resources:
+            self.broker.set_topic_configs(resource.name, resource.configs)
+
+    def list_consumer_groups(self) -> list:
+        return [(group_id, "consumer") for group_id in self.broker.groups()]
+
+    def list_consumer_group_offsets(self, group_id: str, partitions=None) -> Dict[TopicPartition, OffsetAndMetadata]:
+        if partitions is None:
+            partitions = [TopicPartition(topic, p) for topic in self.broker.topics()
+                          for p in self.broker.partitions_for_topic(topic)]
+        offsets = {}
+        for tp in partitions:
+            committed = self.broker.committed(group_id, tp)
+            if committed is not None:
+                offsets[tp] = OffsetAndMetadata(committed, None)
+        return offsets
+
+    def close(self):
+        pass
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker() -> InMemoryBroker:
+    """Get the process-wide in-memory broker"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = InMemoryBroker()
+        return _broker
+
+def reset_broker():
+    """Discard all topics, offsets and groups (for tests and benchmarks)"""
+    global _broker
+    with _broker_lock:
+        _broker = None
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from utils.config import config
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PartitionCache:
+    """
+    Worker-local cache of per-job data, scoped to the partitions this process owns
+
+    Handoffs are keyed by job_id, so a job's messages for a stage always land
+    on the same partition and the consumer owning it is the only one working
+    the job there. The consumer binds each job to the partition it was read
+    from; when that partition is revoked the job's entries are dropped, since
+    its next message may be handled (and the data changed) elsewhere.
+
+    Values for jobs that were not delivered by a consumer are never cached.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None):
+        self.max_jobs = config.PARTITION_CACHE_MAX_JOBS if max_jobs is None else max_jobs
+        self._jobs = OrderedDict()  # job_id -> {"partitions": set, "values": dict}
+        self._lock = threading.Lock()
+
+    def bind(self, job_id: str, tp):
+        """Record that a message for the job was read from a partition"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = {"partitions": set(), "values": {}}
+            job["partitions"].add(tp)
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id: str, name: str, loader: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Get a cached value for a job, loading and caching it on a miss
+
+        Args:
+            job_id: Job the value belongs to
+            name: Value name, e.g. "job" or "user_email"
+            loader: Called on a miss; None results are not cached
+
+        Returns:
+            The cached or loaded value, or None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and name in job["values"]:
+                return job["values"][name]
+        if loader is None:
+            return None
+
+        value = loader()
+        if value is not None:
+            self.put(job_id, name, value)
+        return value
+
+    def put(self, job_id: str, name: str, value: Any):
+        """Cache a value for a job bound to an owned partition"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["values"][name] = value
+
+    def invalidate(self, job_id: str, name: Optional[str] = None):
+        """Forget one value, or everything, cached for a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if name is None:
+                job["values"].clear()
+            else:
+                job["values"].pop(name, None)
+
+    def drop(self, partitions) -> int:
+        """Forget every job bound to any of the given partitions"""
+        partitions = set(partitions)
+        with self._lock:
+            dropped = [job_id for job_id, job in self._jobs.items() if job["partitions"] & partitions]
+            for job_id in dropped:
+                del self._jobs[job_id]
+        if dropped:
+            logger.info(f"Dropped cached data for {len(dropped)} jobs on revoked partitions")
+        return len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_partition_cache() -> PartitionCache:
+    """Get the process-wide partition-affine cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PartitionCache()
+        return _cache
@@ -0,0 +1,30 @@
+from kafka.partitioner.default import DefaultPartitioner
+from typing import Any, Callable, Optional
+from utils.config import config
+import random
+import zlib
+
+def crc32_partitioner(key: Optional[bytes], all_partitions: list, available: list) -> int:
+    """librdkafka's "consistent_random": CRC32 of the key, random for unkeyed messages"""
+    if key is None:
+        return random.choice(available or all_partitions)
+    return all_partitions[zlib.crc32(key) % len(all_partitions)]
+
+# Name -> callable(key_bytes, all_partitions, available_partitions), as accepted by KafkaProducer
+PARTITIONERS = {
+    "murmur2": DefaultPartitioner(),
+    "crc32": crc32_partitioner,
+}
+
+def get_partitioner(name: Optional[str] = None) -> Callable:
+    """Get the partitioner configured by KAFKA_PARTITIONER"""
+    name = (name or config.KAFKA_PARTITIONER or "murmur2").lower()
+    if name not in PARTITIONERS:
+        raise ValueError(f"Unknown partitioner '{name}', expected one of: {', '.join(PARTITIONERS)}")
+    return PARTITIONERS[name]
+
+def job_key(message: Any) -> str:
+    """Default record key: the job ID, so all of a job's messages share a partition"""
+    if isinstance(message, dict) and message.get("job_id"):
+        return str(message["job_id"])
+    return ""
@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional, Tuple
+from messaging.fairness import FairQueue, record_tenant
+from messaging.topics import KafkaTopics
+from utils.config import config
+from utils.monitoring import metrics
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def parse_weights(spec: Optional[str] = None) -> Dict[str, int]:
+    """
+    Parse lane weights such as "high:6,normal:3,low:1"
+
+    Every priority gets a weight of at least 1, so no lane can be starved;
+    priorities missing from the spec default to 1.
+    """
+    spec = config.PRIORITY_LANE_WEIGHTS if spec is None else spec
+    weights = {priority: 1 for priority in KafkaTopics.PRIORITIES}
+    for item in (spec or "").split(","):
+        name, _, weight = item.strip().partition(":")
+        if not name:
+            continue
+        if name not in weights:
+            raise ValueError(f"Unknown priority '{name}', expected one of: {', '.join(KafkaTopics.PRIORITIES)}")
+        weights[name] = max(1, int(weight or 1))
+    return weights
+
+def normalize_priority(value: Any) -> Optional[str]:
+    """Map a brief/message priority (str or PodcastPriority) to a lane name, None if unset or unknown"""
+    value = getattr(value, "value", value)
+    if isinstance(value, str) and value.lower() in KafkaTopics.PRIORITIES:
+        return value.lower()
+    return None
+
+def message_priority(message: Any) -> str:
+    """
+    Priority of a stage message
+
+    Taken from the message, then its brief, then the record currently being
+    handled on this thread, so handoffs inherit the lane of their input.
+    """
+    if isinstance(message, dict):
+        priority = normalize_priority(message.get("priority"))
+        if priority is None and isinstance(message.get("brief"), dict):
+            priority = normalize_priority(message["brief"].get("priority"))
+        if priority is not None:
+            return priority
+
+    from messaging.retry import current_delivery
+    record = current_delivery()
+    if record is not None:
+        value = record.value if isinstance(record.value, dict) else {}
+        priority = normalize_priority(value.get("priority"))
+        if priority is not None:
+            return priority
+        return KafkaTopics.split_priority(record.topic)[1]
+
+    return KafkaTopics.DEFAULT_PRIORITY
+
+def lane_topic(topic: str, priority: Optional[str]) -> str:
+    """Topic to publish a stage message of this priority to"""
+    if not config.PRIORITY_LANES_ENABLED:
+        return topic
+    return KafkaTopics.priority_topic(topic, priority or KafkaTopics.DEFAULT_PRIORITY)
+
+def route(topic: str, message: Any) -> Tuple[str, Any]:
+    """Stamp the priority on a stage message and pick its lane"""
+    if topic not in KafkaTopics.PRIORITY_TOPICS or not isinstance(message, dict):
+        return topic, message
+    priority = message_priority(message)
+    if priority != KafkaTopics.DEFAULT_PRIORITY and message.get("priority") != priority:
+        message = {**message, "priority": priority}
+    return lane_topic(topic, priority), message
+
+class WeightedLaneBuffer:
+    """
+    Per-priority buffers of fetched records, drained by smooth weighted round robin
+
+    With weights high:6,normal:3,low:1 and every lane backlogged, each run of
+    10 records holds 6 high, 3 normal and 1 low, interleaved. Lanes without
+    buffered records are skipped, so an idle high lane costs nothing. Topics
+    without lanes all land in the normal lane.
+
+    Within a lane records leave in fetch order, or by the sort key of order
+    (e.g. messaging.deadline.DeadlineOrder) when one is given. With
+    tenant_weights, each lane is shared between tenants by deficit round
+    robin, so one submitter's backlog cannot hold up everyone else's.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None, capacity: Optional[int] = None,
+                 order=None, tenant_weights: Optional[Dict[str, float]] = None):
+        self.weights = weights or parse_weights()
+        self.capacity = capacity or config.PRIORITY_LANE_BUFFER
+        self.order = order
+        self.fair_share = tenant_weights is not None
+        # Items are (key, tp, record); without fair sharing every record belongs to one tenant
+        self._lanes = {priority: FairQueue(tenant_weights) for priority in self.weights}
+        self._current = {priority: 0 for priority in self.weights}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def add(self, tp, records: list):
+        """Buffer records fetched from one partition"""
+        lane = self._lanes[KafkaTopics.split_priority(tp.topic)[1]]
+        for record in records:
+            key = self.order.key(record) if self.order is not None else (next(self._sequence),)
+            lane.push(record_tenant(record) if self.fair_share else "", (key, tp, record))
+
+    def take(self, limit: Optional[int] = None) -> List[Tuple]:
+        """Remove up to limit (tp, record) pairs in weighted order"""
+        taken = []
+        while (limit is None or len(taken) < limit) and len(self):
+            ready = [priority for priority, lane in self._lanes.items() if lane]
+            total = sum(self.weights[priority] for priority in ready)
+            for priority in self._current:
+                # Idle lanes bank no credit, so a lane that refills cannot burst past its share
+                self._current[priority] = self._current[priority] + self.weights[priority] if priority in ready else 0
+            chosen = max(ready, key=lambda priority: self._current[priority])
+            self._current[chosen] -= total
+            tenant, (_, tp, record) = self._lanes[chosen].pop()
+            if self.fair_share:
+                # Time since the record was produced: queueing in Kafka plus this buffer
+                metrics.record_duration("dispatch_wait", max(0.0, time.time() - record.timestamp / 1000),
+                                        {"tenant": tenant})
+            taken.append((tp, record))
+        return taken
+
+    def full_lanes(self) -> set:
+        """Priorities whose buffer is at capacity; their partitions should stop fetching"""
+        return {priority for priority, lane in self._lanes.items() if len(lane) >= self.capacity}
+
+    def retain(self, partitions):
+        """Drop buffered records of partitions that are no longer assigned; the next owner fetches them again"""
+        partitions = set(partitions)
+        for lane in self._lanes.values():
+            lane.retain(lambda item: item[1] in partitions)
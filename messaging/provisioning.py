@@ -0,0 +1,185 @@
+from collections import namedtuple
+from kafka.admin import ConfigResource, ConfigResourceType, KafkaAdminClient, NewPartitions, NewTopic
+from typing import Dict, List, Optional
+from messaging.memory_broker import MemoryKafkaAdminClient
+from messaging.topics import KafkaTopics
+from utils.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+TopicSpec = namedtuple("TopicSpec", ["name", "partitions", "replication_factor", "configs"])
+
+HOUR_MS = 3600 * 1000
+
+# Stage name (as in WORKER_HOST_STAGES) -> the topic its consumers read
+STAGE_TOPICS = {
+    "outline": KafkaTopics.OUTLINE_GENERATION,
+    "outline_guardrails": KafkaTopics.OUTLINE_GUARDRAILS,
+    "outline_evaluation": KafkaTopics.OUTLINE_EVALUATION,
+    "outline_approval": KafkaTopics.OUTLINE_APPROVAL,
+    "script": KafkaTopics.SCRIPT_GENERATION,
+    "script_guardrails": KafkaTopics.SCRIPT_GUARDRAILS,
+    "script_evaluation": KafkaTopics.SCRIPT_EVALUATION,
+    "script_approval": KafkaTopics.SCRIPT_APPROVAL,
+    "tts": KafkaTopics.TTS_GENERATION,
+    "tts_evaluation": KafkaTopics.TTS_EVALUATION,
+    "audio_approval": KafkaTopics.AUDIO_APPROVAL,
+    "publishing": KafkaTopics.PUBLISHING,
+}
+
+def parse_concurrency(spec: Optional[str] = None) -> Dict[str, int]:
+    """
+    Parse desired handler concurrency per stage, e.g. "tts=8,script=4"
+
+    The count is the total across all replicas of the stage. Stages not
+    listed (and "retry", the retry relay) get KAFKA_DEFAULT_STAGE_CONCURRENCY.
+    """
+    spec = config.KAFKA_STAGE_CONCURRENCY if spec is None else spec
+    concurrency = {stage: config.KAFKA_DEFAULT_STAGE_CONCURRENCY for stage in list(STAGE_TOPICS) + ["retry"]}
+    for item in (spec or "").split(","):
+        name, _, value = item.strip().partition("=")
+        if not name:
+            continue
+        if name not in concurrency:
+            raise ValueError(f"Unknown stage '{name}', expected one of: {', '.join(concurrency)}")
+        if int(value or 0) < 1:
+            raise ValueError(f"Concurrency for stage '{name}' must be at least 1")
+        concurrency[name] = int(value)
+    return concurrency
+
+def topic_configs(topic: str) -> Dict[str, str]:
+    """Retention, compaction and compression for a topic"""
+    compression = {"compression.type": config.KAFKA_TOPIC_COMPRESSION}
+    if topic == KafkaTopics.DLQ_REPLAYED:
+        # Replay markers are keyed by job and topic; only the latest per key matters
+        return {"cleanup.policy": "compact", **compression}
+    if topic == KafkaTopics.DLQ:
+        return {"retention.ms": str(config.KAFKA_DLQ_RETENTION_DAYS * 24 * HOUR_MS), **compression}
+    if ".retry." in topic or topic in (KafkaTopics.SUPERVISOR_CONTROL, KafkaTopics.JOB_STATUS):
+        # Retries wait at most the slowest tier; control messages are only useful while fresh
+        return {"retention.ms": str(24 * HOUR_MS), **compression}
+    return {"retention.ms": str(config.KAFKA_STAGE_RETENTION_HOURS * HOUR_MS), **compression}
+
+def plan_topics(concurrency: Optional[Dict[str, int]] = None, headroom: Optional[int] = None,
+                replication_factor: Optional[int] = None) -> List[TopicSpec]:
+    """
+    Desired layout for every topic in KafkaTopics.get_all_topics()
+
+    A stage topic (and each of its priority lanes) gets concurrency x
+    headroom partitions: every handler thread can own a partition, with
+    room to add replicas later without repartitioning. Retry tiers are
+    sized for the retry relay; the DLQ and control topics keep one
+    partition so they stay totally ordered.
+    """
+    concurrency = concurrency or parse_concurrency()
+    headroom = headroom or config.KAFKA_PARTITION_HEADROOM
+    replication_factor = replication_factor or config.KAFKA_REPLICATION_FACTOR
+    stage_of = {topic: stage for stage, topic in STAGE_TOPICS.items()}
+
+    specs = []
+    for topic in KafkaTopics.get_all_topics():
+        base = KafkaTopics.split_priority(topic)[0]
+        if base in stage_of:
+            partitions = concurrency[stage_of[base]] * headroom
+        elif ".retry." in topic:
+            partitions = concurrency["retry"] * headroom
+        else:
+            partitions = 1
+        specs.append(TopicSpec(topic, partitions, replication_factor, topic_configs(topic)))
+    return specs
+
+class TopicProvisioner:
+    """
+    Create topics, grow their partition counts and apply their configs
+
+    Partitions are only ever added (Kafka cannot remove them). Adding
+    partitions re-maps job keys, so a job's next handoff may land on a
+    different partition than messages of it still waiting in the old one;
+    topics with pending messages for the pipeline group are therefore
+    skipped unless forced. Topic configs are set as a whole: overrides not
+    in the spec are reset to the broker default.
+    """
+
+    def __init__(self, admin=None, stats=None):
+        if admin is None:
+            if config.MESSAGE_BACKEND == "memory":
+                admin = MemoryKafkaAdminClient()
+            else:
+                admin = KafkaAdminClient(bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS)
+        self.admin = admin
+        self._stats = stats
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            from messaging.queue_manager import queue_stats
+            self._stats = queue_stats
+        return self._stats
+
+    def current_partitions(self, topics: List[str]) -> Dict[str, int]:
+        """Partition count of each topic that exists"""
+        existing = set(self.admin.list_topics()) & set(topics)
+        if not existing:
+            return {}
+        return {item["topic"]: len(item["partitions"]) for item in self.admin.describe_topics(sorted(existing))}
+
+    def provision(self, specs: List[TopicSpec], dry_run: bool = False, force: bool = False) -> Dict:
+        """
+        Bring topics in line with their specs
+
+        Args:
+            specs: Desired topics, e.g. from plan_topics()
+            dry_run: Only report what would change
+            force: Add partitions even to topics with pending messages
+
+        Returns:
+            Dict with created, expanded ({topic: [from, to]}), configured and
+            skipped ({topic: reason}) topics
+        """
+        current = self.current_partitions([spec.name for spec in specs])
+        report = {"created": [], "expanded": {}, "configured": [], "skipped": {}}
+
+        missing = [spec for spec in specs if spec.name not in current]
+        growing = [spec for spec in specs if spec.name in current and spec.partitions > current[spec.name]]
+        for spec in specs:
+            if spec.name in current and spec.partitions < current[spec.name]:
+                report["skipped"][spec.name] = (f"has {current[spec.name]} partitions, more than the "
+                                                f"{spec.partitions} planned; partitions cannot be removed")
+
+        if growing and not force:
+            backlog = self.stats.get_stats(refresh=True).get("backlog", {})
+            for spec in list(growing):
+                pending = backlog.get(spec.name, 0)
+                if pending:
+                    growing.remove(spec)
+                    report["skipped"][spec.name] = (f"{pending} pending messages would be reordered per job; "
+                                                    f"drain the topic or force")
+
+        report["created"] = [spec.name for spec in missing]
+        report["expanded"] = {spec.name: [current[spec.name], spec.partitions] for spec in growing}
+        report["configured"] = [spec.name for spec in specs if spec.name in current]
+        if dry_run:
+            return report
+
+        if missing:
+            self.admin.create_topics([
+                NewTopic(spec.name, spec.partitions, spec.replication_factor, topic_configs=spec.configs)
+                for spec in missing
+            ])
+            logger.info(f"Created {len(missing)} topics")
+        if growing:
+            self.admin.create_partitions({spec.name: NewPartitions(spec.partitions) for spec in growing})
+            for spec in growing:
+                logger.info(f"Expanded {spec.name} from {current[spec.name]} to {spec.partitions} partitions")
+        existing = [spec for spec in specs if spec.name in current]
+        if existing:
+            self.admin.alter_configs([
+                ConfigResource(ConfigResourceType.TOPIC, spec.name, configs=spec.configs) for spec in existing
+            ])
+        for topic, reason in report["skipped"].items():
+            logger.warning(f"Left {topic} as is: {reason}")
+        return report
+
+    def close(self):
+        self.admin.close()
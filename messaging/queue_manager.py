@@ -1,9 +1,17 @@
+import copy
 import json
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
-from messaging.kafka_producer import KafkaProducerClient
+from kafka import KafkaAdminClient, KafkaConsumer
+from kafka.structs import TopicPartition
+from messaging.kafka_producer import get_shared_producer
+from messaging.memory_broker import MemoryKafkaAdminClient, MemoryKafkaConsumer
+from messaging.priority import lane_topic, message_priority
 from messaging.topics import KafkaTopics
+from utils.config import config
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +19,7 @@ class QueueManager:
     """Manage job queues and message routing"""
     
     def __init__(self):
-        self.producer = KafkaProducerClient()
+        self.producer = get_shared_producer()
         self.topic_mapping = {
             "outline": KafkaTopics.OUTLINE_GENERATION,
             "script": KafkaTopics.SCRIPT_GENERATION,
@@ -30,18 +38,190 @@ class QueueManager:
             # Add timestamp
             job_data["enqueued_at"] = datetime.now(timezone.utc).isoformat()
             
-            return self.producer.send_message(topic, job_data)
+            # Route to the job's priority lane
+            job_data["priority"] = message_priority(job_data)
+            return self.producer.send_message(lane_topic(topic, job_data["priority"]), job_data)
         
         except Exception as e:
             logger.error(f"Failed to enqueue job: {str(e)}")
             return False
     
-    def get_queue_stats(self) -> Dict[str, int]:
-        """Get queue statistics (simplified)"""
-        # In a real implementation, this would query Kafka for queue depths
+    def get_queue_stats(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get per-topic, per-partition and per-group queue depth and lag"""
+        stats = queue_stats.get_stats(refresh=refresh)
+        for stage, topic in self.topic_mapping.items():
+            stats[f"{stage}_queue"] = sum(stats["backlog"].get(lane, 0) for lane in KafkaTopics.priority_topics(topic))
+        return stats
+
+class QueueStatsCollector:
+    """Computes consumer lag from end offsets versus committed offsets, cached with a short TTL"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = config.QUEUE_STATS_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._admin = None
+        self._probe = None
+        self._cached = None
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_stats(self, refresh: bool = False) -> Dict[str, Any]:
+        """Return cached stats, collecting fresh ones when the TTL has expired"""
+        with self._lock:
+            if refresh or self._cached is None or time.monotonic() - self._cached_at >= self.ttl_seconds:
+                try:
+                    self._cached = self._collect()
+                except Exception as e:
+                    logger.error(f"Failed to collect queue stats: {str(e)}")
+                    self.close()
+                    stale = dict(self._cached) if self._cached else self._empty_stats()
+                    stale["error"] = str(e)
+                    return copy.deepcopy(stale)
+                self._cached_at = time.monotonic()
+            return copy.deepcopy(self._cached)
+
+    def _clients(self):
+        """Lazily connect the admin client and the offset probe consumer"""
+        if self._admin is None:
+            if config.MESSAGE_BACKEND == "memory":
+                self._admin = MemoryKafkaAdminClient()
+                self._probe = MemoryKafkaConsumer()
+            else:
+                self._admin = KafkaAdminClient(bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS)
+                # Group-less consumer: only used for offset lookups and timestamp probes
+                self._probe = KafkaConsumer(bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS,
+                                            group_id=None, enable_auto_commit=False)
+        return self._admin, self._probe
+
+    def _empty_stats(self) -> Dict[str, Any]:
+        return {
+            "collected_at": None,
+            "topics": {},
+            "groups": {},
+            "backlog": {topic: 0 for topic in KafkaTopics.get_all_topics()},
+            "bottleneck": None
+        }
+
+    def _collect(self) -> Dict[str, Any]:
+        admin, probe = self._clients()
+
+        partitions = []
+        for topic in KafkaTopics.get_all_topics():
+            for partition in sorted(probe.partitions_for_topic(topic) or []):
+                partitions.append(TopicPartition(topic, partition))
+
+        end_offsets = probe.end_offsets(partitions)
+        beginning_offsets = probe.beginning_offsets(partitions)
+
+        topics = {}
+        for tp in partitions:
+            topic_stats = topics.setdefault(tp.topic, {"partitions": 0, "end_offset": 0, "retained": 0})
+            topic_stats["partitions"] += 1
+            topic_stats["end_offset"] += end_offsets[tp]
+            topic_stats["retained"] += end_offsets[tp] - beginning_offsets[tp]
+
+        # The pipeline group always reports; other groups only where they have commits
+        group_ids = {config.KAFKA_GROUP_ID}
+        group_ids.update(group[0] for group in admin.list_consumer_groups())
+
+        committed_by_group = {}
+        for group_id in sorted(group_ids):
+            offsets = admin.list_consumer_group_offsets(group_id)
+            committed = {tp: meta.offset for tp, meta in offsets.items() if tp in end_offsets}
+            if committed or group_id == config.KAFKA_GROUP_ID:
+                committed_by_group[group_id] = committed
+
+        # Where each group resumes; workers use auto_offset_reset='earliest'
+        positions = {}
+        for group_id, committed in committed_by_group.items():
+            for tp in partitions:
+                offset = committed.get(tp)
+                positions[(group_id, tp)] = beginning_offsets[tp] if offset is None or offset < 0 else offset
+
+        lagging = {(tp, offset) for (_, tp), offset in positions.items() if offset < end_offsets[tp]}
+        timestamps = self._probe_timestamps(probe, lagging)
+        now_ms = time.time() * 1000
+
+        groups = {}
+        backlog = {topic: 0 for topic in KafkaTopics.get_all_topics()}
+        for (group_id, tp), offset in positions.items():
+            lag = max(0, end_offsets[tp] - offset)
+            timestamp = timestamps.get((tp, offset)) if lag else None
+            age = round(max(0.0, (now_ms - timestamp) / 1000), 3) if timestamp is not None else None
+
+            topic_stats = groups.setdefault(group_id, {}).setdefault(tp.topic, {
+                "lag": 0,
+                "oldest_message_age_seconds": None,
+                "partitions": {}
+            })
+            topic_stats["lag"] += lag
+            if age is not None:
+                topic_stats["oldest_message_age_seconds"] = max(age, topic_stats["oldest_message_age_seconds"] or 0)
+            topic_stats["partitions"][str(tp.partition)] = {
+                "committed": committed_by_group[group_id].get(tp),
+                "end_offset": end_offsets[tp],
+                "lag": lag,
+                "oldest_message_age_seconds": age
+            }
+            if group_id == config.KAFKA_GROUP_ID:
+                backlog[tp.topic] += lag
+
         return {
-            "outline_queue": 0,
-            "script_queue": 0,
-            "tts_queue": 0,
-            "publishing_queue": 0
+            "collected_at": datetime.now(timezone.utc).isoformat(),
+            "topics": topics,
+            "groups": groups,
+            "backlog": backlog,
+            "bottleneck": self._find_bottleneck(groups.get(config.KAFKA_GROUP_ID, {}))
         }
+
+    def _probe_timestamps(self, probe, lagging) -> Dict[Tuple[TopicPartition, int], int]:
+        """Fetch the timestamp of the oldest unconsumed record for each (partition, offset)"""
+        timestamps = {}
+        pending = set(lagging)
+        deadline = time.monotonic() + config.QUEUE_STATS_PROBE_TIMEOUT_MS / 1000
+
+        while pending and time.monotonic() < deadline:
+            # One offset per partition per round; groups usually share positions
+            round_offsets = {}
+            for tp, offset in sorted(pending):
+                round_offsets.setdefault(tp, offset)
+            pending -= set(round_offsets.items())
+
+            probe.assign(list(round_offsets))
+            for tp, offset in round_offsets.items():
+                probe.seek(tp, offset)
+
+            waiting = set(round_offsets)
+            while waiting and time.monotonic() < deadline:
+                timeout_ms = max(1, int((deadline - time.monotonic()) * 1000))
+                for tp, records in probe.poll(timeout_ms=timeout_ms).items():
+                    if tp in waiting and records:
+                        timestamps[(tp, round_offsets[tp])] = records[0].timestamp
+                        waiting.discard(tp)
+                        probe.pause(tp)
+            probe.resume(*round_offsets)
+
+        if pending:
+            logger.warning(f"Queue stats probe timed out for {len(pending)} partitions")
+        return timestamps
+
+    def _find_bottleneck(self, group_stats: Dict[str, Dict]) -> Optional[Dict[str, Any]]:
+        """Pick the topic whose oldest waiting message is the oldest (ties broken by lag)"""
+        candidates = [(stats["oldest_message_age_seconds"] or 0, stats["lag"], topic)
+                      for topic, stats in group_stats.items() if stats["lag"] > 0]
+        if not candidates:
+            return None
+        age, lag, topic = max(candidates)
+        return {"topic": topic, "lag": lag, "oldest_message_age_seconds": age}
+
+    def close(self):
+        for client in (self._probe, self._admin):
+            try:
+                if client is not None:
+                    client.close()
+            except Exception as e:
+                logger.error(f"Failed to close queue stats client: {str(e)}")
+        self._admin = None
+        self._probe = None
+
+# Global queue stats collector
+queue_stats = QueueStatsCollector()
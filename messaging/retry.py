@@ -0,0 +1,292 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from kafka import KafkaConsumer
+from kafka.structs import OffsetAndMetadata
+from typing import Dict, Optional
+from messaging.deadline import DEADLINE_HEADER
+from messaging.fairness import TENANT_HEADER
+from messaging.kafka_producer import KafkaProducerClient, get_shared_producer
+from messaging.memory_broker import MemoryKafkaConsumer
+from messaging.serialization import default_serializer
+from messaging.topics import KafkaTopics
+from utils.config import config
+from utils.exceptions import ProviderUnavailableError
+from utils.settings import settings
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Record headers carried through the retry tiers
+ATTEMPT_HEADER = "retry-attempt"
+ORIGINAL_TOPIC_HEADER = "retry-original-topic"
+ERROR_HEADER = "retry-error"
+
+# Exception class names (anywhere in the MRO) that indicate a provider hiccup
+# rather than a bad message: OpenAI, Google Cloud, botocore, requests, smtplib, kafka
+TRANSIENT_ERROR_NAMES = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError",
+    "ServiceUnavailable", "DeadlineExceeded", "TooManyRequests", "ResourceExhausted",
+    "EndpointConnectionError", "ConnectTimeoutError", "ReadTimeoutError",
+    "Timeout", "ConnectTimeout", "ReadTimeout",
+    "SMTPServerDisconnected", "SMTPConnectError",
+    "KafkaTimeoutError", "NoBrokersAvailable",
+    "ProviderUnavailableError",  # utils.circuit_breaker
+}
+
+# HTTP statuses worth retrying; any other 4xx is the caller's fault
+TRANSIENT_STATUS_CODES = {408, 425, 429}
+
+# botocore ClientError codes for throttling
+TRANSIENT_AWS_CODES = {"Throttling", "ThrottlingException", "SlowDown", "RequestTimeout",
+                       "ServiceUnavailable", "InternalError"}
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Classify an exception as transient (retry later) or permanent (dead-letter now)"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+
+        if isinstance(exc, (ConnectionError, TimeoutError)):
+            return True
+        if getattr(exc, "retriable", False):  # kafka-python errors
+            return True
+        if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(exc).__mro__):
+            return True
+
+        status = _status_code(exc)
+        if status is not None and 100 <= status < 600:
+            return status in TRANSIENT_STATUS_CODES or status >= 500
+
+        response = getattr(exc, "response", None)
+        if isinstance(response, dict) and "Error" in response:  # botocore ClientError
+            return response["Error"].get("Code") in TRANSIENT_AWS_CODES
+
+        exc = exc.__cause__ or exc.__context__
+
+    return False
+
+def provider_outage(exc: BaseException) -> Optional[ProviderUnavailableError]:
+    """The ProviderUnavailableError in an exception chain, if a circuit breaker was open"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, ProviderUnavailableError):
+            return exc
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+# The record currently being handled on this thread, set by KafkaConsumerClient
+_delivery = threading.local()
+
+@contextmanager
+def delivery_context(record):
+    """Expose the consumer record to code running inside a message handler"""
+    previous = getattr(_delivery, "record", None)
+    _delivery.record = record
+    try:
+        yield
+    finally:
+        _delivery.record = previous
+
+def current_delivery():
+    """Get the consumer record being handled on this thread, if any"""
+    return getattr(_delivery, "record", None)
+
+def record_headers(record) -> Dict[str, str]:
+    """Decode kafka-python (key, bytes) header pairs into a dict"""
+    headers = {}
+    pairs = getattr(record, "headers", None)
+    for name, value in (pairs if isinstance(pairs, (list, tuple)) else []):
+        headers[name] = value.decode('utf-8') if isinstance(value, bytes) else str(value)
+    return headers
+
+def retry_tier(attempt: int) -> str:
+    """Delay tier for a retry attempt (1-based); later attempts stay on the slowest tier"""
+    tiers = list(KafkaTopics.RETRY_TIERS)
+    return tiers[min(attempt, len(tiers)) - 1]
+
+def schedule_retry(producer: KafkaProducerClient, message: dict, exc: BaseException) -> Optional[int]:
+    """
+    Route a failed message to its next delay tier
+
+    Args:
+        producer: Producer used to publish the retry
+        message: The message that failed
+        exc: The exception raised while handling it
+
+    Failures caused by a provider outage (open circuit breaker) are parked on
+    the first tier without using up an attempt: the stage consumer is paused
+    until the provider recovers, so the message waits there instead of failing.
+
+    Returns:
+        The retry attempt number, or None if the failure should be dead-lettered
+        (permanent error, attempts exhausted, or not called from a consumer handler)
+    """
+    record = current_delivery()
+    if record is None or not is_transient_error(exc):
+        return None
+
+    headers = record_headers(record)
+    topic = headers.get(ORIGINAL_TOPIC_HEADER, record.topic)
+    # Priority lanes share their stage's retry tiers; the header returns the message to its lane
+    base_topic = KafkaTopics.split_priority(topic)[0]
+    if base_topic not in KafkaTopics.RETRYABLE_TOPICS:
+        return None
+
+    outage = provider_outage(exc)
+    attempt = int(headers.get(ATTEMPT_HEADER, 0)) + (0 if outage else 1)
+    max_retries = int(settings.get("retry_settings.max_retries", 3))
+    if attempt > max_retries and not outage:
+        logger.warning(f"Retries exhausted for {topic} after {attempt - 1} attempts")
+        return None
+
+    key = record.key.decode('utf-8') if isinstance(record.key, bytes) else (record.key or "")
+    retry_topic = KafkaTopics.retry_topic(base_topic, retry_tier(1 if outage else attempt))
+    sent = producer.send_message(retry_topic, message, key=key, headers={
+        ATTEMPT_HEADER: attempt,
+        ORIGINAL_TOPIC_HEADER: topic,
+        ERROR_HEADER: f"{type(exc).__name__}: {str(exc)}"[:256]
+    })
+    if not sent:
+        return None
+
+    if outage:
+        logger.info(f"{outage.provider} unavailable, parked {topic} message on {retry_topic}")
+    else:
+        logger.info(f"Scheduled retry {attempt}/{max_retries} for {topic} via {retry_topic}")
+    return attempt
+
+def retry_or_dead_letter(producer: KafkaProducerClient, stage: str, topic: Optional[str], message: dict,
+                         exc: BaseException, extra: Optional[dict] = None) -> Optional[int]:
+    """
+    Schedule a retry for a failed message, or dead-letter it
+
+    Transient failures, an open circuit breaker included, wait on the retry
+    tiers; everything else goes to the DLQ with the fields the replay tool reads.
+
+    Args:
+        producer: Producer used to publish the retry or DLQ entry
+        stage: Stage name recorded on the DLQ entry (e.g. "outline_evaluation")
+        topic: Topic to replay to; defaults to the topic of the record being handled
+        message: The message that failed
+        exc: The exception raised while handling it
+        extra: Additional fields for the DLQ entry
+
+    Returns:
+        The retry attempt number, or None if the message was dead-lettered
+    """
+    attempt = schedule_retry(producer, message, exc)
+    if attempt is not None:
+        return attempt
+
+    if topic is None:
+        record = current_delivery()
+        topic = record_headers(record).get(ORIGINAL_TOPIC_HEADER, record.topic) if record else None
+    producer.send_message(KafkaTopics.DLQ, {
+        "job_id": message.get("job_id"),
+        "error": str(exc),
+        "stage": stage,
+        "original_topic": topic,
+        "message": message,
+        "error_class": type(exc).__name__,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **(extra or {})
+    })
+    return None
+
+class RetryRelay:
+    """
+    Holds messages on the retry tier topics until their delay has elapsed,
+    then republishes them to the original stage topic
+
+    Every message on a tier waits the same delay, so each partition is FIFO by
+    due time: the relay pauses a partition until its head is due instead of
+    spinning on it.
+    """
+
+    def __init__(self, topics: Optional[list] = None, producer: Optional[KafkaProducerClient] = None):
+        self.topics = topics or KafkaTopics.get_retry_topics()
+        self.producer = producer or get_shared_producer()
+        self.max_workers = 1
+        consumer_class = MemoryKafkaConsumer if config.MESSAGE_BACKEND == "memory" else KafkaConsumer
+        self.consumer = consumer_class(
+            *self.topics,
+            bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS,
+            group_id=f"{config.KAFKA_GROUP_ID}.retry",
+            value_deserializer=default_serializer.deserialize,
+            enable_auto_commit=False,
+            auto_offset_reset='earliest'
+        )
+        self._held = {}  # TopicPartition -> time its head message is due
+        self._running = False
+
+    def start_consuming(self):
+        """Relay due messages until stop() is called"""
+        logger.info(f"Starting retry relay for {len(self.topics)} topics")
+        self._running = True
+        try:
+            while self._running:
+                self._resume_due()
+                records = self.consumer.poll(timeout_ms=self._poll_timeout_ms())
+                for tp, batch in records.items():
+                    self._relay_partition(tp, batch)
+        finally:
+            self.consumer.close()
+
+    def stop(self):
+        """Ask the relay loop to exit after the current iteration"""
+        self._running = False
+
+    def _tier_delay(self, topic: str) -> int:
+        return KafkaTopics.RETRY_TIERS[topic.rsplit(".", 1)[-1]]
+
+    def _relay_partition(self, tp, batch):
+        delay = self._tier_delay(tp.topic)
+        for record in batch:
+            due = record.timestamp / 1000 + delay
+            if due > time.time() or not self._republish(record):
+                if due <= time.time():
+                    due = time.time() + 1  # Republish failed, back off briefly
+                # Rewind and hold the partition until its head is due
+                self.consumer.seek(tp, record.offset)
+                self.consumer.pause(tp)
+                self._held[tp] = due
+                return
+            self.consumer.commit({tp: OffsetAndMetadata(record.offset + 1, None)})
+
+    def _republish(self, record) -> bool:
+        headers = record_headers(record)
+        topic = headers.get(ORIGINAL_TOPIC_HEADER) or record.topic.rsplit(".retry.", 1)[0]
+        key = record.key.decode('utf-8') if isinstance(record.key, bytes) else (record.key or "")
+        relayed = {
+            ATTEMPT_HEADER: headers.get(ATTEMPT_HEADER, 1),
+            ORIGINAL_TOPIC_HEADER: topic
+        }
+        for name in (DEADLINE_HEADER, TENANT_HEADER):
+            if name in headers:
+                relayed[name] = headers[name]
+        return self.producer.send_message(topic, record.value, key=key, headers=relayed)
+
+    def _resume_due(self):
+        now = time.time()
+        assigned = self.consumer.assignment()
+        for tp, due in list(self._held.items()):
+            if due > now and tp in assigned:
+                continue
+            del self._held[tp]
+            if tp in assigned:
+                self.consumer.resume(tp)
+
+    def _poll_timeout_ms(self) -> int:
+        if not self._held:
+            return 1000
+        wait = min(self._held.values()) - time.time()
+        return int(min(1000, max(10, wait * 1000)))
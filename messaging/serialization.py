@@ -0,0 +1,160 @@
+import json
+import logging
+import struct
+from typing import Any, Optional
+from utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Optional fast encoders / compressors, fall back to plain JSON if missing
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    import lz4.frame
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+# Framed messages start with a byte that can never begin a JSON document,
+# so legacy JSON payloads keep decoding during rollout.
+MAGIC = 0xA7
+SCHEMA_VERSION = 1
+HEADER = struct.Struct("!BBBB")  # magic, schema version, codec, compression
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+CODEC_ORJSON = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+COMPRESSION_LZ4 = 2
+
+_CODEC_IDS = {"json": CODEC_JSON, "msgpack": CODEC_MSGPACK, "orjson": CODEC_ORJSON}
+_COMPRESSION_IDS = {None: COMPRESSION_NONE, "none": COMPRESSION_NONE,
+                    "zstd": COMPRESSION_ZSTD, "lz4": COMPRESSION_LZ4}
+
+def _encode(codec: int, value: Any) -> bytes:
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(value, default=str, use_bin_type=True)
+    if codec == CODEC_ORJSON:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str).encode('utf-8')
+
+def _decode(codec: int, data: bytes) -> Any:
+    if codec == CODEC_MSGPACK:
+        if not HAS_MSGPACK:
+            raise ValueError("Received msgpack message but msgpack is not installed")
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    if codec == CODEC_ORJSON:
+        return orjson.loads(data) if HAS_ORJSON else json.loads(data.decode('utf-8'))
+    return json.loads(data.decode('utf-8'))
+
+def _compress(compression: int, data: bytes) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if compression == COMPRESSION_LZ4:
+        return lz4.frame.compress(data)
+    return data
+
+def _decompress(compression: int, data: bytes) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        if not HAS_ZSTD:
+            raise ValueError("Received zstd message but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == COMPRESSION_LZ4:
+        if not HAS_LZ4:
+            raise ValueError("Received lz4 message but lz4 is not installed")
+        return lz4.frame.decompress(data)
+    if compression != COMPRESSION_NONE:
+        raise ValueError(f"Unknown compression id: {compression}")
+    return data
+
+class MessageSerializer:
+    """
+    Versioned wire format for pipeline messages
+
+    ``codec="json"`` without compression writes plain legacy JSON so old
+    consumers keep working. Any other setting writes a 4-byte header
+    (magic, schema version, codec, compression) followed by the payload.
+    ``deserialize`` accepts both forms.
+    """
+
+    def __init__(self, codec: Optional[str] = None, compression: Optional[str] = None,
+                 compression_threshold: Optional[int] = None):
+        codec = (codec or config.KAFKA_MESSAGE_CODEC).lower()
+        compression = compression or config.KAFKA_MESSAGE_COMPRESSION
+        compression = compression.lower() if compression else None
+
+        if codec not in _CODEC_IDS:
+            raise ValueError(f"Unknown message codec: {codec}")
+        if compression not in _COMPRESSION_IDS:
+            raise ValueError(f"Unknown message compression: {compression}")
+
+        if codec == "msgpack" and not HAS_MSGPACK:
+            logger.warning("msgpack is not installed, falling back to JSON encoding")
+            codec = "json"
+        if codec == "orjson" and not HAS_ORJSON:
+            logger.warning("orjson is not installed, falling back to JSON encoding")
+            codec = "json"
+        if compression == "zstd" and not HAS_ZSTD:
+            logger.warning("zstandard is not installed, message compression disabled")
+            compression = None
+        if compression == "lz4" and not HAS_LZ4:
+            logger.warning("lz4 is not installed, message compression disabled")
+            compression = None
+
+        self.codec = _CODEC_IDS[codec]
+        self.compression = _COMPRESSION_IDS[compression]
+        self.compression_threshold = (config.KAFKA_COMPRESSION_THRESHOLD
+                                      if compression_threshold is None else compression_threshold)
+
+    @property
+    def legacy(self) -> bool:
+        """Whether this serializer emits plain, unframed JSON"""
+        return self.codec == CODEC_JSON and self.compression == COMPRESSION_NONE
+
+    def serialize(self, value: Any) -> bytes:
+        """Encode a message for the wire"""
+        payload = _encode(self.codec, value)
+        if self.legacy:
+            return payload
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compression_threshold:
+            payload = _compress(self.compression, payload)
+            compression = self.compression
+
+        return HEADER.pack(MAGIC, SCHEMA_VERSION, self.codec, compression) + payload
+
+    def deserialize(self, data: bytes) -> Any:
+        """Decode a framed or legacy JSON message"""
+        if data is None:
+            return None
+        if not data or data[0] != MAGIC:
+            return json.loads(data.decode('utf-8'))
+
+        _, version, codec, compression = HEADER.unpack_from(data)
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Unsupported message schema version: {version}")
+
+        payload = _decompress(compression, data[HEADER.size:])
+        return _decode(codec, payload)
+
+# Shared default serializer configured from the environment
+default_serializer = MessageSerializer()
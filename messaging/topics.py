@@ -25,6 +25,53 @@ class KafkaTopics:
     
     # Error handling
     DLQ = "podcast.dlq"
+    DLQ_REPLAYED = "podcast.dlq.replayed"  # replay markers, keyed by job and topic
+    
+    # Delay tiers for transient failures: "<topic>.retry.<tier>" -> delay in seconds
+    RETRY_TIERS = {"10s": 10, "1m": 60, "10m": 600}
+    RETRYABLE_TOPICS = [OUTLINE_GENERATION, SCRIPT_GENERATION, TTS_GENERATION, PUBLISHING,
+                        OUTLINE_GUARDRAILS, OUTLINE_EVALUATION, SCRIPT_GUARDRAILS, SCRIPT_EVALUATION]
+    
+    # Priority lanes: "<topic>.high" / "<topic>.low"; normal traffic stays on the base topic
+    PRIORITIES = ["high", "normal", "low"]
+    DEFAULT_PRIORITY = "normal"
+    PRIORITY_TOPICS = [
+        OUTLINE_GENERATION, OUTLINE_GUARDRAILS, OUTLINE_EVALUATION, OUTLINE_APPROVAL,
+        SCRIPT_GENERATION, SCRIPT_GUARDRAILS, SCRIPT_EVALUATION, SCRIPT_APPROVAL,
+        TTS_GENERATION, TTS_EVALUATION, AUDIO_APPROVAL, PUBLISHING
+    ]
+    
+    @classmethod
+    def priority_topic(cls, topic: str, priority: str) -> str:
+        """Get the lane of a stage topic for a priority"""
+        if topic not in cls.PRIORITY_TOPICS or priority == cls.DEFAULT_PRIORITY or priority not in cls.PRIORITIES:
+            return topic
+        return f"{topic}.{priority}"
+    
+    @classmethod
+    def priority_topics(cls, topic: str) -> list:
+        """Get every lane of a stage topic, highest priority first"""
+        if topic not in cls.PRIORITY_TOPICS:
+            return [topic]
+        return [cls.priority_topic(topic, priority) for priority in cls.PRIORITIES]
+    
+    @classmethod
+    def split_priority(cls, topic: str) -> tuple:
+        """podcast.tts.generation.high -> (podcast.tts.generation, high)"""
+        base, _, suffix = topic.rpartition(".")
+        if suffix in cls.PRIORITIES and base in cls.PRIORITY_TOPICS:
+            return base, suffix
+        return topic, cls.DEFAULT_PRIORITY
+    
+    @classmethod
+    def retry_topic(cls, topic: str, tier: str) -> str:
+        """Get the retry topic for a stage topic and delay tier"""
+        return f"{topic}.retry.{tier}"
+    
+    @classmethod
+    def get_retry_topics(cls) -> list:
+        """Get list of all retry tier topics"""
+        return [cls.retry_topic(topic, tier) for topic in cls.RETRYABLE_TOPICS for tier in cls.RETRY_TIERS]
     
     @classmethod
     def get_all_topics(cls) -> list:
@@ -44,5 +91,8 @@ class KafkaTopics:
             cls.AUDIO_APPROVAL,
             cls.SUPERVISOR_CONTROL,
             cls.JOB_STATUS,
-            cls.DLQ
+            cls.DLQ,
+            cls.DLQ_REPLAYED
+        ] + cls.get_retry_topics() + [
+            lane for topic in cls.PRIORITY_TOPICS for lane in cls.priority_topics(topic) if lane != topic
         ]
\ No newline at end of file
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark job status updates: database round trips and latency per call
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from database.models import Base, JobStatus, PodcastJob
+from database.repositories import PodcastRepository
+
+STATUSES = [JobStatus.OUTLINE_GENERATION.value, JobStatus.SCRIPT_GENERATION.value, JobStatus.TTS_GENERATION.value]
+
+def legacy_update_job(repo: PodcastRepository, job_id: str, updates: dict):
+    """The previous update_job: SELECT, set attributes, commit, refresh"""
+    session = repo._get_session()
+    try:
+        job = session.query(PodcastJob).filter(PodcastJob.job_id == job_id).first()
+        if job:
+            for key, value in updates.items():
+                if hasattr(job, key):
+                    setattr(job, key, value)
+            session.commit()
+            session.refresh(job)
+        return job
+    finally:
+        session.close()
+
+class RoundTripCounter:
+    """Count statements and commits sent to the database"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+        event.listen(engine, "commit", self._count)
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+def bench(update, job_ids: list, counter: RoundTripCounter) -> tuple:
+    """Return (round trips, latency ms) per call"""
+    counter.count = 0
+    start = time.perf_counter()
+    for i, job_id in enumerate(job_ids):
+        update(job_id, {"status": STATUSES[i % len(STATUSES)]})
+    elapsed = time.perf_counter() - start
+    return counter.count / len(job_ids), elapsed / len(job_ids) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PodcastRepository job updates")
+    parser.add_argument("--database-url", help="Database to run against (default: a temporary SQLite file)")
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    repo = PodcastRepository()
+    repo.session_factory = sessionmaker(bind=engine)
+    counter = RoundTripCounter(engine)
+
+    job_ids = [f"bench_{uuid.uuid4().hex[:12]}" for _ in range(args.jobs)]
+    for job_id in job_ids:
+        repo.create_job(job_id, {"topic": "Benchmark"})
+
+    variants = [
+        ("select + refresh (legacy)", lambda job_id, updates: legacy_update_job(repo, job_id, updates)),
+        ("update_job (returning)", repo.update_job),
+        ("update_job_fields", repo.update_job_fields),
+    ]
+
+    session = repo._get_session()
+    print(f"database: {engine.url.get_backend_name()}, returning: {repo._supports_returning(session)}")
+    session.close()
+    print(f"{'path':<28}{'round trips':>13}{'ms/call':>10}")
+    for label, update in variants:
+        round_trips, latency_ms = bench(update, job_ids, counter)
+        print(f"{label:<28}{round_trips:>13.1f}{latency_ms:>10.3f}")
+
+    session = repo._get_session()
+    try:
+        session.query(PodcastJob).filter(PodcastJob.job_id.in_(job_ids)).delete(synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark message wire formats: bytes on the wire and CPU per message
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messaging.serialization import MessageSerializer
+
+def build_message(script_words: int) -> dict:
+    """Build a representative SCRIPT_EVALUATION message"""
+    # Seeded pseudo-prose so compression ratios are not flattered by repetition
+    rng = random.Random(42)
+    vocab = ("the a of and to in model data we language learning neural network research "
+             "history early researchers computer intelligence systems logic rules symbolic "
+             "training breakthrough decades later today listeners episode question answer "
+             "[pause] **important** because however finally remember think imagine").split()
+    script = " ".join(rng.choice(vocab) for _ in range(script_words))
+    sentence = " ".join(rng.choice(vocab) for _ in range(40))
+    return {
+        "job_id": "job_0123456789ab",
+        "brief": {
+            "topic": "The History of Artificial Intelligence",
+            "tone": "educational",
+            "length_minutes": 30,
+            "target_audience": "tech enthusiasts",
+            "key_points": ["symbolic AI", "neural networks", "transformers"],
+            "voice_preference": "professional_female",
+            "user_email": "test@example.com"
+        },
+        "outline": {
+            "title": "From Logic to Learning",
+            "introduction": "A short tour of seventy years of AI research.",
+            "sections": [
+                {"title": f"Section {i}", "content": sentence} for i in range(6)
+            ],
+            "conclusion": "Where the field is heading next.",
+            "estimated_duration": 30
+        },
+        "script": script
+    }
+
+def bench(serializer: MessageSerializer, message: dict, iterations: int) -> tuple:
+    """Return (bytes, encode_us, decode_us) per message"""
+    data = serializer.serialize(message)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.serialize(message)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.deserialize(data)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    return len(data), encode_us, decode_us
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Kafka message serialization")
+    parser.add_argument("--script-words", type=int, default=4500, help="Script length (~30 min episode)")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    message = build_message(args.script_words)
+    variants = [
+        ("json (legacy)", "json", None),
+        ("orjson", "orjson", None),
+        ("msgpack", "msgpack", None),
+        ("orjson + zstd", "orjson", "zstd"),
+        ("msgpack + zstd", "msgpack", "zstd"),
+        ("msgpack + lz4", "msgpack", "lz4"),
+    ]
+
+    print(f"{'format':<18}{'bytes':>10}{'encode us':>12}{'decode us':>12}")
+    for label, codec, compression in variants:
+        serializer = MessageSerializer(codec=codec, compression=compression, compression_threshold=0)
+        size, encode_us, decode_us = bench(serializer, message, args.iterations)
+        print(f"{label:<18}{size:>10}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+if __name__ == "__main__":
+    main()
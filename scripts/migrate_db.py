@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Apply pending database migrations
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.migrations.runner import MigrationRunner
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations in version order")
+    parser.add_argument("--target", type=int, help="Last version to apply (default: all)")
+    parser.add_argument("--status", action="store_true", help="Only list applied and pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="Log the statements without running them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    runner = MigrationRunner()
+    if args.status:
+        applied = runner.applied()
+        print(json.dumps({
+            "applied": {version: applied_at.isoformat() for version, applied_at in sorted(applied.items())},
+            "pending": [f"{migration.version}: {migration.name}" for migration in runner.pending(args.target)]
+        }, indent=2))
+        return
+
+    versions = runner.run(target=args.target, dry_run=args.dry_run)
+    print(json.dumps({"dry_run" if args.dry_run else "applied": versions}))
+
+if __name__ == "__main__":
+    main()
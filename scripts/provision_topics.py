@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Create and resize the pipeline's Kafka topics
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messaging.provisioning import TopicProvisioner, parse_concurrency, plan_topics
+from utils.config import config
+
+def main():
+    parser = argparse.ArgumentParser(description="Create topics and size their partitions from stage concurrency")
+    parser.add_argument("--concurrency", default=config.KAFKA_STAGE_CONCURRENCY,
+                        help='Handlers per stage across all replicas, e.g. "tts=8,script=4"')
+    parser.add_argument("--headroom", type=int, default=config.KAFKA_PARTITION_HEADROOM,
+                        help="Partitions per planned handler")
+    parser.add_argument("--replication-factor", type=int, default=config.KAFKA_REPLICATION_FACTOR)
+    parser.add_argument("--force", action="store_true",
+                        help="Add partitions even to topics with pending messages")
+    parser.add_argument("--plan", action="store_true", help="Only print the planned topics")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    specs = plan_topics(parse_concurrency(args.concurrency), args.headroom, args.replication_factor)
+    if args.plan:
+        print(json.dumps({spec.name: {"partitions": spec.partitions, "configs": spec.configs} for spec in specs},
+                         indent=2))
+        return
+
+    provisioner = TopicProvisioner()
+    try:
+        report = provisioner.provision(specs, dry_run=args.dry_run, force=args.force)
+    finally:
+        provisioner.close()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Inspect and replay the dead letter queue
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.repositories import PodcastRepository
+from messaging.dlq_replay import DLQReplayer
+from utils.config import config
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay podcast.dlq entries to their original topics")
+    parser.add_argument("--job", help="Only this job ID")
+    parser.add_argument("--stage", help='Only this stage, e.g. "tts" or "outline_evaluation"')
+    parser.add_argument("--error-class", help='Only this exception class, e.g. "RateLimitError"')
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only failures at or after this ISO time")
+    parser.add_argument("--rate", type=float, default=config.DLQ_REPLAY_RATE, help="Messages per second")
+    parser.add_argument("--concurrency", type=int, default=config.DLQ_REPLAY_CONCURRENCY)
+    parser.add_argument("--include-replayed", action="store_true", help="Re-drive jobs that were already replayed")
+    parser.add_argument("--skip-status-check", action="store_true",
+                        help="Replay even if the job is no longer FAILED in the database")
+    parser.add_argument("--list", action="store_true", help="Only print the DLQ summary")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    replayer = DLQReplayer(repo=None if args.skip_status_check else PodcastRepository())
+    index = replayer.load_index()
+
+    if args.list:
+        print(json.dumps(index.summary(), indent=2))
+        return
+
+    entries = index.query(job_id=args.job, stage=args.stage, error_class=args.error_class,
+                          since=args.since, include_replayed=args.include_replayed)
+    print(f"Matched {len(entries)} replayable entries")
+
+    result = replayer.replay(index, entries, rate=args.rate, concurrency=args.concurrency,
+                             dry_run=args.dry_run, include_replayed=args.include_replayed)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+from messaging.fairness import DEFAULT_TENANT, FairQueue, brief_tenant, parse_tenant_weights
+from messaging.topics import KafkaTopics
+from utils.config import config
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ACCEPT = "accept"
+QUEUE = "queue"
+REJECT = "reject"
+
+AdmissionDecision = namedtuple("AdmissionDecision", ["action", "queue_position", "estimated_start_at",
+                                                     "retry_after_seconds"])
+
+# Statuses in which a job occupies pipeline workers; approval waits on a human and does not
+# (the partial index ix_podcast_jobs_active_created_at, database/migrations/versions.py, matches this list)
+ACTIVE_STATUSES = [
+    "OUTLINE_GENERATION", "OUTLINE_EVALUATION",
+    "SCRIPT_GENERATION", "SCRIPT_EVALUATION",
+    "TTS_GENERATION", "TTS_EVALUATION",
+    "PUBLISHING"
+]
+
+# Status of a job held back at admission until the pipeline has room for it
+HELD_STATUS = "PENDING"
+
+# Work topics whose consumer lag competes with a new job for the same workers
+STAGE_TOPICS = [KafkaTopics.OUTLINE_GENERATION, KafkaTopics.SCRIPT_GENERATION,
+                KafkaTopics.TTS_GENERATION, KafkaTopics.PUBLISHING]
+
+class AdmissionController:
+    """
+    Decide whether a new job starts now, is held back, or is turned away
+
+    Load is the number of active jobs and of held jobs (database) plus the
+    pipeline group's lag on the work topics (Kafka). Both are snapshotted
+    for a few seconds, refreshed outside the decision lock by one caller
+    while the others decide on the previous snapshot; admissions made since
+    the snapshot are counted on top, so a burst cannot all slip in on one
+    stale reading. Any failure to read load fails open.
+
+    A queued job is created PENDING and not started: release() starts held
+    jobs, oldest first, as active jobs finish. Whoever moves a job out of
+    PENDING (PodcastRepository.claim_pending_job) starts it, so a request
+    and a release, or two API processes, never both do.
+
+    With fair share, once jobs have to wait each submitter (tenant) may hold
+    at most its weighted share of the in-flight and queue slots, split
+    between the tenants that currently have jobs, and held jobs are released
+    taking turns between tenants by weight. A tenant under its share is
+    queued even when the queue is full, so one submitter's burst cannot
+    lock everyone else out; the share bounds the overshoot.
+    """
+
+    def __init__(self, repo=None, stats=None, max_in_flight: Optional[int] = None,
+                 queue_limit: Optional[int] = None, throughput_per_minute: Optional[float] = None,
+                 ttl_seconds: Optional[float] = None, tenant_weights: Optional[Dict[str, float]] = None):
+        self._repo = repo
+        self._stats = stats
+        self.max_in_flight = config.ADMISSION_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.queue_limit = config.ADMISSION_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self.throughput_per_minute = throughput_per_minute or config.ADMISSION_THROUGHPUT_PER_MINUTE
+        self.ttl_seconds = config.ADMISSION_SNAPSHOT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.tenant_weights = parse_tenant_weights() if tenant_weights is None else tenant_weights
+        self.decisions = Counter()
+        self.tenant_decisions = {}  # tenant -> Counter of actions
+        self._snapshot = None  # (active jobs, held jobs, stage lag)
+        self._snapshot_at = 0.0
+        self._admitted = 0  # jobs started since the snapshot was taken
+        self._queued = 0  # jobs held since the snapshot was taken
+        self._tenants = {}  # tenant -> {"jobs", "held", "oldest_created_at"} among active and held jobs
+        self._admitted_by_tenant = Counter()
+        self._held = FairQueue(self.tenant_weights)  # held job ids awaiting release, per tenant
+        self._held_briefs = {}  # job_id -> brief of the jobs in _held
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._release_lock = threading.Lock()
+        self._releaser = None
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            from database.repositories import PodcastRepository
+            self._repo = PodcastRepository()
+        return self._repo
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            from messaging.queue_manager import queue_stats
+            self._stats = queue_stats
+        return self._stats
+
+    def _load(self, force: bool = False) -> Tuple[int, int, int]:
+        """(active jobs, held jobs, stage lag), refreshed outside the decision lock when the snapshot expires"""
+        with self._lock:
+            snapshot, taken_at = self._snapshot, self._snapshot_at
+        if not force and snapshot is not None and time.monotonic() - taken_at < self.ttl_seconds:
+            return snapshot
+        # One caller reads the database and Kafka; the others decide on the previous snapshot meanwhile
+        if not self._refresh_lock.acquire(blocking=force or snapshot is None):
+            return snapshot
+        try:
+            with self._lock:
+                counted = (self._admitted, self._queued, Counter(self._admitted_by_tenant))
+            active = self.repo.count_jobs(ACTIVE_STATUSES)
+            held = self.repo.count_jobs([HELD_STATUS])
+            backlog = self.stats.get_stats().get("backlog", {})
+            lag = sum(backlog.get(lane, 0) for topic in STAGE_TOPICS for lane in KafkaTopics.priority_topics(topic))
+            tenants = self._tenants
+            if config.FAIR_SHARE_ENABLED:
+                tenants = {}
+                for statuses, is_held in ((ACTIVE_STATUSES, False), ([HELD_STATUS], True)):
+                    for tenant, load in self.repo.count_jobs_by_tenant(statuses).items():
+                        entry = tenants.setdefault(tenant or DEFAULT_TENANT,
+                                                   {"jobs": 0, "held": 0, "oldest_created_at": None})
+                        entry["jobs"] += load["jobs"]
+                        entry["held"] += load["jobs"] if is_held else 0
+                        oldest = load.get("oldest_created_at")
+                        if oldest and (entry["oldest_created_at"] is None or oldest < entry["oldest_created_at"]):
+                            entry["oldest_created_at"] = oldest
+            with self._lock:
+                self._snapshot = (active, held, lag)
+                self._snapshot_at = time.monotonic()
+                self._tenants = tenants
+                # Admissions made while reading are not in the counts yet
+                self._admitted -= counted[0]
+                self._queued -= counted[1]
+                self._admitted_by_tenant -= counted[2]
+                return self._snapshot
+        finally:
+            self._refresh_lock.release()
+
+    def _fair_share(self, tenant: str, waiting: int) -> AdmissionDecision:
+        """Queue the tenant if it holds less than its weighted share of the slots, else reject it"""
+        load = self._tenants.get(tenant, {})
+        holding = load.get("jobs", 0) + self._admitted_by_tenant[tenant]
+        contenders = {name for name, other in self._tenants.items() if other.get("jobs")} | {tenant}
+        weight = self.tenant_weights.get(tenant, 1.0)
+        total = sum(self.tenant_weights.get(name, 1.0) for name in contenders)
+        share = (self.max_in_flight + self.queue_limit) * weight / total
+        # Held jobs are released taking turns between tenants, so this tenant's jobs start at its share of the throughput
+        per_minute = self.throughput_per_minute * weight / total
+        if holding >= share:
+            retry_after = max(1, math.ceil((holding - share + 1) / per_minute * 60))
+            return AdmissionDecision(REJECT, None, None, retry_after)
+        ahead = load.get("held", 0) + self._admitted_by_tenant[tenant]
+        position = min(waiting, math.floor(ahead * total / weight)) + 1
+        start_at = datetime.now(timezone.utc) + timedelta(minutes=position / self.throughput_per_minute)
+        return AdmissionDecision(QUEUE, position, start_at, None)
+
+    def admit(self, tenant: Optional[str] = None) -> AdmissionDecision:
+        """Decide on one job creation request from a tenant (submitter)"""
+        tenant = tenant or DEFAULT_TENANT
+        if not config.ADMISSION_CONTROL_ENABLED:
+            return AdmissionDecision(ACCEPT, None, None, None)
+
+        try:
+            self._load()
+        except Exception as e:
+            logger.error(f"Admission control could not read load, accepting: {str(e)}")
+            return AdmissionDecision(ACCEPT, None, None, None)
+
+        with self._lock:
+            active, held, lag = self._snapshot
+            active += self._admitted
+            held += self._queued
+            if active < self.max_in_flight and lag == 0 and held == 0:
+                decision = AdmissionDecision(ACCEPT, None, None, None)
+            elif held < self.queue_limit:
+                position = held + 1
+                start_at = datetime.now(timezone.utc) + timedelta(minutes=position / self.throughput_per_minute)
+                decision = AdmissionDecision(QUEUE, position, start_at, None)
+            else:
+                excess = held - self.queue_limit + 1
+                retry_after = max(1, math.ceil(excess / self.throughput_per_minute * 60))
+                decision = AdmissionDecision(REJECT, None, None, retry_after)
+            if config.FAIR_SHARE_ENABLED and decision.action != ACCEPT:
+                decision = self._fair_share(tenant, held)
+
+            if decision.action == ACCEPT:
+                self._admitted += 1
+            elif decision.action == QUEUE:
+                self._queued += 1
+            if decision.action != REJECT:
+                self._admitted_by_tenant[tenant] += 1
+            self.decisions[decision.action] += 1
+            self.tenant_decisions.setdefault(tenant, Counter())[decision.action] += 1
+
+        if decision.action != ACCEPT:
+            logger.info(f"Admission {decision.action} for {tenant}: active={active}, held={held}, lag={lag}")
+        return decision
+
+    def release(self, start: Callable[[str, dict], bool]) -> int:
+        """
+        Start held jobs while the pipeline has room
+
+        Args:
+            start: Starts a claimed job from its job_id and brief; returns False on failure
+
+        Returns:
+            Number of jobs started
+        """
+        with self._release_lock:
+            active, held, lag = self._load(force=True)
+            room = self.max_in_flight - active if lag == 0 else 0
+            if room <= 0 or held == 0:
+                return 0
+
+            # Held jobs in creation order, each tenant's turn by weight (one line for all without fair share)
+            pending = self.repo.get_pending_jobs(limit=max(self.queue_limit, room))
+            waiting = {job_id for job_id, _ in pending}
+            self._held.retain(lambda item: item[1] in waiting)
+            for position, (job_id, brief) in enumerate(pending):
+                if job_id not in self._held_briefs:
+                    tenant = (brief_tenant(brief) or DEFAULT_TENANT) if config.FAIR_SHARE_ENABLED else DEFAULT_TENANT
+                    self._held.push(tenant, (position, job_id))
+            self._held_briefs = dict(pending)
+
+            started = 0
+            while started < room and len(self._held):
+                _, (_, job_id) = self._held.pop()
+                brief = self._held_briefs.pop(job_id)
+                if not self.repo.claim_pending_job(job_id):
+                    continue
+                if start(job_id, dict(brief or {})):
+                    started += 1
+                else:
+                    logger.error(f"Failed to start held job {job_id}")
+                    self.repo.update_job_fields(job_id, {"status": "FAILED",
+                                                         "error_message": "Failed to start held job"})
+
+        if started:
+            logger.info(f"Released {started} held jobs")
+            with self._lock:
+                # Counted as active until the next snapshot
+                self._admitted += started
+                self._queued -= started
+        return started
+
+    def start_releasing(self, start: Callable[[str, dict], bool], interval_seconds: Optional[float] = None):
+        """Release held jobs from a background thread every interval (once per process)"""
+        interval = config.ADMISSION_RELEASE_INTERVAL_SECONDS if interval_seconds is None else interval_seconds
+        with self._lock:
+            if self._releaser is not None:
+                return
+
+            def run():
+                while True:
+                    try:
+                        self.release(start)
+                    except Exception as e:
+                        logger.error(f"Failed to release held jobs: {str(e)}")
+                    time.sleep(interval)
+
+            self._releaser = threading.Thread(target=run, name="admission-release", daemon=True)
+        self._releaser.start()
+
+    def summary(self) -> Dict:
+        """Decision counts and the load snapshot, for /api/v1/metrics"""
+        with self._lock:
+            active, held, lag = self._snapshot or (None, None, None)
+            return {
+                "enabled": config.ADMISSION_CONTROL_ENABLED,
+                "max_in_flight": self.max_in_flight,
+                "queue_limit": self.queue_limit,
+                "active_jobs": active,
+                "held_jobs": held,
+                "stage_lag": lag,
+                "decisions": dict(self.decisions),
+                "fair_share": {
+                    "enabled": config.FAIR_SHARE_ENABLED,
+                    "tenants": self._tenant_summary()
+                }
+            }
+
+    def _tenant_summary(self) -> Dict:
+        """Per tenant: active and held jobs (queue depth), how long the oldest has been in the pipeline, decisions"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        tenants = {}
+        for tenant in set(self._tenants) | set(self.tenant_decisions):
+            load = self._tenants.get(tenant, {})
+            oldest = load.get("oldest_created_at")
+            tenants[tenant] = {
+                "weight": self.tenant_weights.get(tenant, 1.0),
+                "active_jobs": load.get("jobs", 0) - load.get("held", 0),
+                "held_jobs": load.get("held", 0),
+                "oldest_wait_seconds": round((now - oldest).total_seconds(), 1) if oldest else None,
+                "decisions": dict(self.tenant_decisions.get(tenant, {}))
+            }
+        return tenants
+
+admission = AdmissionController()
@@ -1,5 +1,6 @@
-from services.email_service import EmailApprovalService
+from services.email_service import EmailApprovalService, retry_later
 from database.repositories import PodcastRepository
+from messaging.partition_cache import get_partition_cache
 from utils.config import config
 import logging
 import time
@@ -14,6 +15,7 @@ class ApprovalMixin:
     def __init__(self):
         self.email_service = EmailApprovalService()
         self.approval_repo = PodcastRepository()
+        self.partition_cache = get_partition_cache()
         self.approval_enabled = getattr(config, 'EMAIL_APPROVAL_ENABLED', True)
         self.approval_timeout = getattr(config, 'APPROVAL_TIMEOUT_HOURS', 168)  # 7 days default
         self.check_interval = getattr(config, 'APPROVAL_CHECK_INTERVAL', 30)  # 30 seconds
@@ -38,6 +40,9 @@ class ApprovalMixin:
             
         Returns:
             bool: True if processed successfully
+            
+        Raises:
+            Exception: SMTP outages and transient send errors, so the message is delivered again
         """
         if not self.approval_enabled:
             logger.info(f"Email approval disabled, auto-approving {stage} for job {job_id}")
@@ -56,6 +61,7 @@ class ApprovalMixin:
             success = self._send_stage_email(job_id, stage, content_data, user_email)
             
             if not success:
+                # Permanent failure (e.g. no SMTP credentials), waiting would not help
                 logger.error(f"Failed to send approval email for job {job_id}, auto-approving")
                 return self._auto_approve_and_continue(job_id, next_topic, next_message, status_update)
             
@@ -66,6 +72,8 @@ class ApprovalMixin:
             return True
             
         except Exception as e:
+            if retry_later(e):
+                raise
             logger.error(f"Error in approval process for job {job_id}, stage {stage}: {e}")
             # Auto-approve on error to prevent pipeline blockage
             return self._auto_approve_and_continue(job_id, next_topic, next_message, status_update)
@@ -73,16 +81,20 @@ class ApprovalMixin:
     def _get_user_email(self, job_id: str) -> str:
         """Get user email from job data"""
         try:
-            job_data = self.approval_repo.get_job(job_id)
-            if hasattr(job_data, 'user_email'):
-                return job_data.user_email
-            elif hasattr(job_data, 'brief') and isinstance(job_data.brief, dict):
-                return job_data.brief.get('user_email')
-            return getattr(config, 'DEFAULT_APPROVAL_EMAIL', None)
+            # The email is fixed at job start, so later approvals of the job reuse it
+            return self.partition_cache.get(job_id, "user_email", lambda: self._load_user_email(job_id))
         except Exception as e:
             logger.error(f"Error getting user email for job {job_id}: {e}")
             return None
     
+    def _load_user_email(self, job_id: str) -> str:
+        job_data = self.approval_repo.get_job(job_id)
+        if hasattr(job_data, 'user_email'):
+            return job_data.user_email
+        elif hasattr(job_data, 'brief') and isinstance(job_data.brief, dict):
+            return job_data.brief.get('user_email')
+        return getattr(config, 'DEFAULT_APPROVAL_EMAIL', None)
+    
     def _send_stage_email(self, job_id: str, stage: str, content_data: dict, user_email: str) -> bool:
         """Send email for specific stage"""
         try:
@@ -96,6 +108,8 @@ class ApprovalMixin:
                 logger.error(f"Unknown approval stage: {stage}")
                 return False
         except Exception as e:
+            if retry_later(e):
+                raise
             logger.error(f"Error sending {stage} approval email: {e}")
             return False
     
@@ -117,7 +131,7 @@ class ApprovalMixin:
                 "updated_at": datetime.utcnow()
             }
             
-            self.approval_repo.update_job(job_id, approval_data)
+            self.approval_repo.update_job_fields(job_id, approval_data)
             logger.info(f"Job {job_id} marked as pending {stage} approval")
             
         except Exception as e:
@@ -127,9 +141,12 @@ class ApprovalMixin:
     def _auto_approve_and_continue(self, job_id: str, next_topic, next_message: dict, status_update: dict) -> bool:
         """Auto-approve and continue pipeline"""
         try:
-            from messaging.kafka_producer import KafkaProducerClient
+            from messaging.kafka_producer import get_shared_producer
             
-            producer = KafkaProducerClient()
+            producer = get_shared_producer()
+            
+            # Update status before handing off, so the next stage's own status update cannot be overwritten
+            self.approval_repo.update_job_fields(job_id, status_update)
             
             # Send to next stage
             success = producer.send_message(next_topic, next_message)
@@ -137,9 +154,6 @@ class ApprovalMixin:
                 logger.error(f"Failed to send message to next stage for job {job_id}")
                 return False
             
-            # Update status
-            self.approval_repo.update_job(job_id, status_update)
-            
             logger.info(f"Auto-approved and continued pipeline for job {job_id}")
             return True
             
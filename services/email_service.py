@@ -298,12 +298,18 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from typing import Dict, Any
+from messaging.retry import is_transient_error, provider_outage
+from utils.circuit_breaker import SMTP, get_breaker
 from utils.config import config
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+def retry_later(exc: BaseException) -> bool:
+    """Whether an email failure is an SMTP outage or transient error rather than a permanent one"""
+    return provider_outage(exc) is not None or is_transient_error(exc)
+
 class EmailApprovalService:
     """Service for sending approval emails and generating secure tokens"""
     
@@ -366,6 +372,8 @@ class EmailApprovalService:
             
             return success
         except Exception as e:
+            if retry_later(e):
+                raise
             logger.error(f"Failed to send outline approval email for job {job_id}: {e}")
             return False
     
@@ -390,6 +398,8 @@ class EmailApprovalService:
             
             return success
         except Exception as e:
+            if retry_later(e):
+                raise
             logger.error(f"Failed to send script approval email for job {job_id}: {e}")
             return False
     
@@ -414,6 +424,8 @@ class EmailApprovalService:
             
             return success
         except Exception as e:
+            if retry_later(e):
+                raise
             logger.error(f"Failed to send audio approval email for job {job_id}: {e}")
             return False
     
@@ -432,14 +444,19 @@ class EmailApprovalService:
             html_part = MIMEText(html_content, 'html')
             msg.attach(html_part)
             
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            with get_breaker(SMTP).guard():
+                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                    server.starttls()
+                    server.login(self.smtp_user, self.smtp_password)
+                    server.send_message(msg)
             
             logger.info(f"Approval email sent successfully to {to_email}")
             return True
         except Exception as e:
+            if retry_later(e):
+                # SMTP is down or throttling; the caller leaves the message to be delivered again
+                logger.warning(f"SMTP unavailable, email to {to_email} deferred: {e}")
+                raise
             logger.error(f"Failed to send email to {to_email}: {e}")
             return False
     
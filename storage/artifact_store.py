@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+from utils.config import config
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Marker key for claim-check references inside pipeline messages
+ARTIFACT_KEY = "__artifact__"
+
+# Message fields that are large enough to be worth offloading
+OFFLOAD_FIELDS = ("script", "outline")
+
+class ArtifactCache:
+    """Thread-safe LRU cache of resolved artifacts keyed by content hash"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str):
+        with self._lock:
+            if digest not in self._entries:
+                return None
+            self._entries.move_to_end(digest)
+            return self._entries[digest]
+
+    def put(self, digest: str, value: Any):
+        with self._lock:
+            self._entries[digest] = value
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class ArtifactStore(ABC):
+    """Content-addressed store for outlines and scripts"""
+
+    def __init__(self, cache: Optional[ArtifactCache] = None,
+                 offload_threshold: Optional[int] = None):
+        self.cache = cache or ArtifactCache(config.ARTIFACT_CACHE_SIZE)
+        self.offload_threshold = (config.ARTIFACT_OFFLOAD_THRESHOLD
+                                  if offload_threshold is None else offload_threshold)
+
+    @abstractmethod
+    def _write(self, key: str, data: bytes):
+        """Persist bytes under key if not already present"""
+        pass
+
+    @abstractmethod
+    def _read(self, key: str) -> bytes:
+        """Load bytes stored under key"""
+        pass
+
+    @staticmethod
+    def _key(kind: str, digest: str) -> str:
+        return f"artifacts/{kind}/{digest[:2]}/{digest}.json"
+
+    def put(self, kind: str, value: Any) -> dict:
+        """Store a value and return a reference to embed in messages"""
+        data = json.dumps(value, default=str, sort_keys=True).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        self._write(self._key(kind, digest), data)
+        self.cache.put(digest, value)
+        return {ARTIFACT_KEY: digest, "kind": kind, "size": len(data)}
+
+    def get(self, ref: dict) -> Any:
+        """Resolve a reference through the local read-through cache"""
+        digest = ref[ARTIFACT_KEY]
+        cached = self.cache.get(digest)
+        if cached is not None:
+            return cached
+
+        data = self._read(self._key(ref["kind"], digest))
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Artifact {digest} failed integrity check")
+
+        value = json.loads(data.decode('utf-8'))
+        self.cache.put(digest, value)
+        return value
+
+    def offload(self, message: dict) -> dict:
+        """Replace large fields with references to stored artifacts"""
+        if not isinstance(message, dict):
+            return message
+
+        offloaded = None
+        for field in OFFLOAD_FIELDS:
+            value = message.get(field)
+            if value is None or is_artifact_ref(value):
+                continue
+            size = len(value.encode('utf-8')) if isinstance(value, str) else len(json.dumps(value, default=str))
+            if size < self.offload_threshold:
+                continue
+            if offloaded is None:
+                offloaded = dict(message)
+            offloaded[field] = self.put(field, value)
+
+        return offloaded if offloaded is not None else message
+
+class LocalArtifactStore(ArtifactStore):
+    """Artifact store on the local (or shared) filesystem"""
+
+    def __init__(self, base_dir: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_dir = base_dir or config.ARTIFACT_STORE_PATH
+
+    def _write(self, key: str, data: bytes):
+        path = os.path.join(self.base_dir, key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write atomically so concurrent readers never see partial files
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_file.name, path)
+
+    def _read(self, key: str) -> bytes:
+        with open(os.path.join(self.base_dir, key), 'rb') as f:
+            return f.read()
+
+class S3ArtifactStore(ArtifactStore):
+    """Artifact store backed by storage.s3_client.S3Client"""
+
+    def __init__(self, s3_client=None, **kwargs):
+        super().__init__(**kwargs)
+        if s3_client is None:
+            from storage.s3_client import S3Client
+            s3_client = S3Client()
+        self.s3_client = s3_client
+
+    def _write(self, key: str, data: bytes):
+        # Content-addressed keys never change, so skip re-uploading retries
+        if not self.s3_client.file_exists(key):
+            self.s3_client.upload_content(data, key, 'application/json')
+
+    def _read(self, key: str) -> bytes:
+        return self.s3_client.get_file(key)
+
+def is_artifact_ref(value: Any) -> bool:
+    """Check whether a message field holds an artifact reference"""
+    return isinstance(value, dict) and ARTIFACT_KEY in value
+
+def resolve_artifacts(message: Any, store: Optional[ArtifactStore]) -> Any:
+    """Return the message with any artifact references replaced by their content"""
+    if not isinstance(message, dict):
+        return message
+
+    resolved = None
+    for field, value in message.items():
+        if not is_artifact_ref(value):
+            continue
+        if store is None:
+            raise ValueError(f"Message field '{field}' is an artifact reference "
+                             f"but ARTIFACT_STORE_BACKEND is not configured")
+        if resolved is None:
+            resolved = dict(message)
+        resolved[field] = store.get(value)
+
+    return resolved if resolved is not None else message
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """Get the process-wide artifact store, or None when claim-check is disabled"""
+    global _store
+    backend = (config.ARTIFACT_STORE_BACKEND or "none").lower()
+    if backend == "none":
+        return None
+
+    with _store_lock:
+        if _store is None:
+            if backend == "local":
+                _store = LocalArtifactStore()
+            elif backend == "s3":
+                _store = S3ArtifactStore()
+            else:
+                raise ValueError(f"Unknown artifact store backend: {backend}")
+            logger.info(f"Artifact store initialized: {backend}")
+        return _store
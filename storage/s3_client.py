@@ -1,5 +1,6 @@
 import boto3
 from botocore.exceptions import ClientError
+from utils.circuit_breaker import S3, get_breaker
 from utils.config import config
 import json
 import logging
@@ -20,7 +21,8 @@ class S3Client:
         """Upload file to S3"""
         try:
             # Remove ACL parameter to avoid AccessControlListNotSupported error
-            self.s3.upload_file(
+            get_breaker(S3).call(
+                self.s3.upload_file,
                 file_path, 
                 self.bucket, 
                 s3_key
@@ -39,7 +41,8 @@ class S3Client:
         """Upload content directly to S3"""
         try:
             # Remove ACL parameter to avoid AccessControlListNotSupported error
-            self.s3.put_object(
+            get_breaker(S3).call(
+                self.s3.put_object,
                 Bucket=self.bucket,
                 Key=s3_key,
                 Body=content,
@@ -63,7 +66,7 @@ class S3Client:
     def get_file(self, s3_key: str) -> bytes:
         """Download file from S3"""
         try:
-            response = self.s3.get_object(Bucket=self.bucket, Key=s3_key)
+            response = get_breaker(S3).call(self.s3.get_object, Bucket=self.bucket, Key=s3_key)
             return response['Body'].read()
             
         except ClientError as e:
@@ -73,7 +76,7 @@ class S3Client:
     def file_exists(self, s3_key: str) -> bool:
         """Check if file exists in S3"""
         try:
-            self.s3.head_object(Bucket=self.bucket, Key=s3_key)
+            get_breaker(S3).call(self.s3.head_object, Bucket=self.bucket, Key=s3_key)
             return True
         except ClientError:
             return False
\ No newline at end of file
@@ -69,7 +69,7 @@ class TestBaseAgent:
         agent = TestAgent("test")
         agent.update_job_status("test_job", "PROCESSING")
         
-        mock_repo_instance.update_job.assert_called_once_with("test_job", {"status": "PROCESSING"})
+        mock_repo_instance.update_job_fields.assert_called_once_with("test_job", {"status": "PROCESSING"})
 
     @patch('agents.base_agent.KafkaProducerClient')
     @patch('agents.base_agent.PodcastRepository')
@@ -94,7 +94,7 @@ class TestBaseAgent:
             "status": "FAILED",
             "error_message": "Test error"
         }
-        mock_repo_instance.update_job.assert_called_with("test_job", expected_update)
+        mock_repo_instance.update_job_fields.assert_called_with("test_job", expected_update)
         
         # Check that error was sent to DLQ
         expected_dlq_message = {
@@ -104,6 +104,102 @@ class TestBaseAgent:
         }
         mock_producer_instance.send_message.assert_called_with("podcast.dlq", expected_dlq_message)
 
+    @patch('agents.base_agent.KafkaProducerClient')
+    @patch('agents.base_agent.PodcastRepository')
+    def test_handle_error_retries_transient_failures(self, mock_repo, mock_producer):
+        """Test transient failures go to a retry tier instead of the DLQ"""
+        from messaging.memory_broker import MemoryRecord
+        from messaging.retry import delivery_context
+        from messaging.topics import KafkaTopics
+        
+        class TestAgent(BaseAgent):
+            def process(self, message: dict):
+                pass
+        
+        mock_producer_instance = Mock()
+        mock_producer_instance.send_message.return_value = True
+        mock_producer.return_value = mock_producer_instance
+        mock_repo_instance = Mock()
+        mock_repo.return_value = mock_repo_instance
+        
+        agent = TestAgent("test")
+        message = {"job_id": "test_job", "script": "Hello"}
+        record = MemoryRecord(KafkaTopics.TTS_GENERATION, 0, 0, 0, b"test_job", message, [])
+        
+        with delivery_context(record):
+            agent.handle_error("test_job", "TTS down", message=message, exc=ConnectionError("TTS down"))
+        
+        topic = mock_producer_instance.send_message.call_args[0][0]
+        assert topic == KafkaTopics.retry_topic(KafkaTopics.TTS_GENERATION, "10s")
+        mock_repo_instance.update_job_fields.assert_called_once_with("test_job", {"retry_count": 1})
+        
+        # Permanent failures are still dead-lettered
+        with delivery_context(record):
+            agent.handle_error("test_job", "Bad script", message=message, exc=ValueError("Bad script"))
+        dlq_topic, dlq_message = mock_producer_instance.send_message.call_args[0]
+        assert dlq_topic == "podcast.dlq"
+        assert dlq_message["original_topic"] == KafkaTopics.TTS_GENERATION
+        assert dlq_message["message"] == message
+        assert dlq_message["error_class"] == "ValueError"
+
+    @patch('agents.base_agent.get_ledger')
+    @patch('agents.base_agent.KafkaProducerClient')
+    @patch('agents.base_agent.PodcastRepository')
+    def test_process_once_skips_redelivered_messages(self, mock_repo, mock_producer, mock_get_ledger):
+        """Test that a redelivered message re-sends the recorded handoff instead of reprocessing"""
+        from messaging.ledger import MemoryLedger
+        
+        class TestAgent(BaseAgent):
+            calls = 0
+            
+            def process(self, message: dict):
+                TestAgent.calls += 1
+                self.send_to_next_stage("next.topic", {"job_id": message["job_id"], "result": "done"})
+        
+        mock_get_ledger.return_value = MemoryLedger(ttl_seconds=60)
+        mock_producer_instance = Mock()
+        mock_producer.return_value = mock_producer_instance
+        
+        agent = TestAgent("test")
+        agent.process_once({"job_id": "test_job", "brief": {"topic": "AI"}})
+        agent.process_once({"job_id": "test_job", "brief": {"topic": "AI"}})
+        
+        assert TestAgent.calls == 1
+        assert mock_producer_instance.send_message.call_count == 2
+        mock_producer_instance.send_message.assert_called_with(
+            "next.topic", {"job_id": "test_job", "result": "done"}, key="test_job")
+        
+        # Different content (e.g. regeneration feedback) is processed again
+        agent.process_once({"job_id": "test_job", "brief": {"topic": "AI"}, "feedback": "shorter"})
+        assert TestAgent.calls == 2
+
+    @patch('agents.base_agent.get_ledger')
+    @patch('agents.base_agent.KafkaProducerClient')
+    @patch('agents.base_agent.PodcastRepository')
+    def test_process_once_reruns_identical_regeneration_requests(self, mock_repo, mock_producer, mock_get_ledger):
+        """Test that two regeneration rounds with the same feedback both run, while redeliveries still replay"""
+        from messaging.ledger import REGENERATION_FIELD, MemoryLedger
+        
+        class TestAgent(BaseAgent):
+            calls = 0
+            
+            def process(self, message: dict):
+                TestAgent.calls += 1
+                self.send_to_next_stage("next.topic", {"job_id": message["job_id"], "result": "done"})
+        
+        mock_get_ledger.return_value = MemoryLedger(ttl_seconds=60)
+        mock_producer.return_value = Mock()
+        
+        agent = TestAgent("test")
+        request = {"job_id": "test_job", "brief": {"topic": "AI"}, "feedback": "shorter", "retry": True}
+        agent.process_once({**request, REGENERATION_FIELD: 1})
+        agent.process_once({**request, REGENERATION_FIELD: 2})
+        assert TestAgent.calls == 2
+        
+        # A redelivered round is still served from the ledger
+        agent.process_once({**request, REGENERATION_FIELD: 2})
+        assert TestAgent.calls == 2
+
 class TestOutlineAgent:
     
     @patch('agents.outline_agent.ChatOpenAI')
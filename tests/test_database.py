@@ -2,6 +2,7 @@ import pytest
 from database.connection import init_db, get_db
 from database.repositories import PodcastRepository
 from database.models import JobStatus
+from datetime import datetime, timedelta
 import uuid
 
 class TestDatabase:
@@ -64,4 +65,160 @@ class TestDatabase:
             self.repo.create_job(job_id, brief)
         
         jobs = self.repo.get_all_jobs()
-        assert len(jobs) >= 3
\ No newline at end of file
+        assert len(jobs) >= 3
+    
+    def test_update_job_fields(self):
+        """Test single-statement job update"""
+        job_id = f"test_{uuid.uuid4().hex[:8]}"
+        self.repo.create_job(job_id, {"topic": "Test"})
+        
+        # Keys that are not job columns are ignored
+        assert self.repo.update_job_fields(job_id, {"status": JobStatus.FAILED.value, "error_message": "boom",
+                                                    "approval_stage": "outline"})
+        job = self.repo.get_job(job_id)
+        assert job.status == JobStatus.FAILED
+        assert job.error_message == "boom"
+        
+        assert not self.repo.update_job_fields("missing_job", {"status": JobStatus.FAILED.value})
+    
+    def test_claim_pending_job(self):
+        """Test that a held job is listed until exactly one caller claims it"""
+        job_id = f"test_{uuid.uuid4().hex[:8]}"
+        self.repo.create_job(job_id, {"topic": "Test"})
+        
+        assert (job_id, {"topic": "Test"}) in self.repo.get_pending_jobs(limit=1000)
+        assert self.repo.claim_pending_job(job_id)
+        assert not self.repo.claim_pending_job(job_id)
+        assert self.repo.get_job(job_id).status == JobStatus.OUTLINE_GENERATION
+        assert job_id not in [pending_id for pending_id, _ in self.repo.get_pending_jobs(limit=1000)]
+    
+    def test_update_jobs(self):
+        """Test single-statement batch update with a different set of columns per job"""
+        from sqlalchemy import event
+        from database.connection import get_engine
+        
+        job_ids = [f"test_{uuid.uuid4().hex[:8]}" for _ in range(2)]
+        for job_id in job_ids:
+            self.repo.create_job(job_id, {"topic": "Test"})
+        
+        statements = []
+        count = lambda *args, **kwargs: statements.append(args[2])
+        event.listen(get_engine(), "before_cursor_execute", count)
+        try:
+            assert self.repo.update_jobs({
+                job_ids[0]: {"status": JobStatus.AUDIO_APPROVAL.value, "audio_url": "s3://audio.mp3"},
+                job_ids[1]: {"status": JobStatus.FAILED.value, "error_message": "boom", "approval_stage": "audio"},
+                "missing_job": {"status": JobStatus.FAILED.value}
+            }) == 2
+        finally:
+            event.remove(get_engine(), "before_cursor_execute", count)
+        assert len(statements) == 1
+        
+        first, second = (self.repo.get_job(job_id) for job_id in job_ids)
+        assert first.status == JobStatus.AUDIO_APPROVAL
+        assert first.audio_url == "s3://audio.mp3" and first.error_message is None
+        assert second.status == JobStatus.FAILED and second.error_message == "boom" and second.audio_url is None
+        assert self.repo.update_jobs({}) == 0
+    
+    def test_list_jobs_pages_by_cursor(self):
+        """Test keyset-paginated, projected job listing"""
+        # A window in the far future no other job falls in, distinct per run
+        start = datetime(2999, 1, 1) + (datetime.now() - datetime(2000, 1, 1))
+        end = start + timedelta(microseconds=2)
+        job_ids = [f"test_{uuid.uuid4().hex[:8]}" for _ in range(3)]
+        for i, job_id in enumerate(job_ids):
+            self.repo.create_job(job_id, {"topic": f"Test Topic {i}"})
+            # Two jobs share a creation time; the id breaks the tie
+            self.repo.update_job_fields(job_id, {"created_at": start + timedelta(microseconds=min(i, 1))})
+        self.repo.update_job_fields(job_ids[0], {"status": JobStatus.FAILED.value})
+        
+        jobs, cursor = self.repo.list_jobs(limit=2, created_after=start, created_before=end,
+                                          fields=["job_id", "topic", "status"])
+        assert [job["job_id"] for job in jobs] == [job_ids[2], job_ids[1]]
+        assert jobs[0] == {"job_id": job_ids[2], "topic": "Test Topic 2", "status": "PENDING"}
+        assert cursor is not None
+        
+        jobs, cursor = self.repo.list_jobs(limit=2, cursor=cursor, created_after=start, created_before=end)
+        assert [job["job_id"] for job in jobs] == [job_ids[0]]
+        assert jobs[0]["status"] == "FAILED" and "script" not in jobs[0]
+        assert cursor is None
+        
+        jobs, _ = self.repo.list_jobs(created_after=start, created_before=end, statuses=[JobStatus.FAILED.value],
+                                      fields=["job_id"])
+        assert jobs == [{"job_id": job_ids[0]}]
+        with pytest.raises(ValueError):
+            self.repo.list_jobs(fields=["password"])
+
+class TestMigrations:
+    
+    def test_runner_applies_pending_migrations_once(self, tmp_path):
+        """Test that migrations apply in order, are recorded, and can be rerun after an interruption"""
+        from sqlalchemy import create_engine, inspect
+        from database.models import Base
+        from database.migrations.runner import CreateIndex, Migration, MigrationRunner, schema_migrations
+        from database.migrations.versions import MIGRATIONS
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+        Base.metadata.create_all(bind=engine)
+        runner = MigrationRunner(engine)
+        
+        versions = [migration.version for migration in MIGRATIONS]
+        assert runner.run(dry_run=True) == versions
+        assert runner.run() == versions
+        assert runner.run() == []
+        assert sorted(runner.applied()) == versions
+        
+        columns = {column["name"] for column in inspect(engine).get_columns("podcast_jobs")}
+        assert {"approval_stage", "approval_timeout", "continuation_data"} <= columns
+        indexes = {index["name"] for index in inspect(engine).get_indexes("podcast_jobs")}
+        assert {"ix_podcast_jobs_status_created_at_id", "ix_podcast_jobs_active_created_at"} <= indexes
+        assert "idx_podcast_jobs_outline_approved" not in indexes
+        
+        # A migration whose version was never recorded runs again without error
+        with engine.begin() as connection:
+            connection.execute(schema_migrations.delete().where(schema_migrations.c.version == 2))
+        assert runner.run() == [2]
+        
+        with pytest.raises(ValueError):
+            MigrationRunner(engine, [Migration(2, "out_of_order", [CreateIndex("ix_x", "podcast_jobs", ["id"], None)])])
+
+class TestJobStatistics:
+    
+    def test_summary_table_follows_status_changes(self, tmp_path):
+        """Test that job statistics come from GROUP BY queries, then from the trigger-maintained summary"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database.job_stats import JobStatistics
+        from database.models import Base
+        from database.migrations.runner import MigrationRunner
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+        Base.metadata.create_all(bind=engine)
+        repo = PodcastRepository()
+        repo.session_factory = sessionmaker(bind=engine)
+        stats = JobStatistics(repo.session_factory)
+        
+        repo.create_job("job_1", {"topic": "Test"})
+        repo.update_job_fields("job_1", {"status": JobStatus.COMPLETED.value})
+        before = stats.summary()
+        assert before["source"] == "query"
+        assert before["jobs_by_status"] == {"COMPLETED": 1}
+        
+        # The migration backfills the summary from existing jobs
+        MigrationRunner(engine).run()
+        for job_id in ["job_2", "job_3", "job_4"]:
+            repo.create_job(job_id, {"topic": "Test"})
+        repo.update_job_fields("job_2", {"status": JobStatus.OUTLINE_GENERATION.value})
+        repo.update_job_fields("job_2", {"status": JobStatus.OUTLINE_GENERATION.value})
+        repo.update_job_fields("job_3", {"status": JobStatus.FAILED.value})
+        
+        summary = stats.summary()
+        assert summary["source"] == "summary"
+        assert summary["jobs_by_status"] == {"COMPLETED": 1, "PENDING": 1, "OUTLINE_GENERATION": 1, "FAILED": 1}
+        assert summary["total_jobs"] == 4 and summary["pending_jobs"] == 2
+        assert summary["success_rate"] == 25.0
+        assert summary["stage_durations"]["PENDING"]["exits"] == 2
+        
+        computed = stats.compute()
+        assert computed["jobs_by_status"] == summary["jobs_by_status"]
+        assert computed["stage_durations"] == summary["stage_durations"]
@@ -1,4 +1,5 @@
 import pytest
+import time
 from unittest.mock import Mock, patch
 from messaging.kafka_producer import KafkaProducerClient
 from messaging.kafka_consumer import KafkaConsumerClient
@@ -41,3 +42,1062 @@ class TestMessaging:
         
         assert client.consumer is not None
         assert len(client.handlers) == 0
+
+    def test_offset_tracker_commits_contiguous_offsets(self):
+        """Test that only the contiguous completed prefix is committable"""
+        from kafka.structs import TopicPartition
+        from messaging.kafka_consumer import OffsetTracker
+
+        tp = TopicPartition("test_topic", 0)
+        tracker = OffsetTracker()
+        for offset in (10, 11, 12):
+            tracker.track(tp, offset)
+
+        tracker.complete(tp, 11)
+        assert tracker.committable() == {}
+
+        tracker.complete(tp, 10)
+        assert tracker.committable()[tp].offset == 12
+
+        tracker.mark_committed(tracker.committable())
+        assert tracker.committable() == {}
+
+        tracker.complete(tp, 12)
+        assert tracker.committable()[tp].offset == 13
+
+    @patch('messaging.kafka_consumer.KafkaConsumer')
+    def test_concurrent_dispatch_preserves_job_order(self, mock_consumer):
+        """Test that messages for the same job run in order on the worker pool"""
+        from concurrent.futures import ThreadPoolExecutor
+        from kafka.structs import TopicPartition
+
+        mock_consumer.return_value = Mock()
+        client = KafkaConsumerClient([KafkaTopics.TTS_GENERATION], max_workers=4)
+
+        processed = []
+        client.register_handler(KafkaTopics.TTS_GENERATION, lambda m: processed.append(m["seq"]))
+
+        tp = TopicPartition(KafkaTopics.TTS_GENERATION, 0)
+        executor = ThreadPoolExecutor(max_workers=4)
+        for offset in range(20):
+            message = Mock(topic=KafkaTopics.TTS_GENERATION, offset=offset,
+                           value={"job_id": "job_1", "seq": offset})
+            client._dispatch(executor, tp, message)
+        executor.shutdown(wait=True)
+
+        assert processed == list(range(20))
+        assert client.offset_tracker.committable()[tp].offset == 20
+
+    @patch('messaging.kafka_consumer.KafkaConsumer')
+    def test_batch_handler_commits_once_per_batch(self, mock_consumer):
+        """Test that batch mode hands a list to the handler and commits once"""
+        from kafka.structs import OffsetAndMetadata, TopicPartition
+        mock_consumer_instance = Mock()
+        mock_consumer.return_value = mock_consumer_instance
+
+        client = KafkaConsumerClient([KafkaTopics.TTS_EVALUATION])
+        client.batch_size = 3
+        client.batch_timeout_ms = 1000
+
+        messages = [
+            Mock(topic=KafkaTopics.TTS_EVALUATION, partition=0, offset=i, value={"job_id": f"job_{i}"})
+            for i in range(3)
+        ]
+        mock_consumer_instance.poll.side_effect = [{"tp0": messages[:2]}, {"tp1": messages[2:]}]
+
+        batches = []
+        def handle_batch(values):
+            batches.append(values)
+            client.stop()
+
+        client.register_batch_handler(KafkaTopics.TTS_EVALUATION, handle_batch)
+        client.start_consuming()
+
+        assert batches == [[{"job_id": "job_0"}, {"job_id": "job_1"}, {"job_id": "job_2"}]]
+        mock_consumer_instance.commit.assert_called_once_with(
+            offsets={TopicPartition(KafkaTopics.TTS_EVALUATION, 0): OffsetAndMetadata(3, None)})
+        assert mock_consumer_instance.poll.call_args_list[1].kwargs["max_records"] == 1
+
+    def test_failed_batch_is_fetched_again(self):
+        """Test that a failed batch is rewound and only handled records are committed"""
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import get_broker, reset_broker
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            get_broker().create_topic("batch.topic", partitions=1)
+            producer = KafkaProducerClient()
+            for i in range(3):
+                producer.send_message("batch.topic", {"seq": i})
+
+            client = KafkaConsumerClient(["batch.topic"], group_id="batch")
+            client.batch_size = 3
+            client.batch_timeout_ms = 100
+
+            batches = []
+            def handle_batch(values):
+                batches.append([value["seq"] for value in values])
+                if len(batches) == 1:
+                    raise RuntimeError("handler failed")
+                client.stop()
+
+            client.register_batch_handler("batch.topic", handle_batch)
+            client.start_consuming()
+
+            assert batches == [[0, 1, 2], [0, 1, 2]]
+            assert get_broker().committed("batch", TopicPartition("batch.topic", 0)) == 3
+            reset_broker()
+
+    @patch('messaging.kafka_producer.KafkaProducer')
+    def test_send_message_async_routes_failures_to_dlq(self, mock_producer):
+        """Test that async sends return immediately and failed deliveries reach the DLQ"""
+        mock_producer_instance = Mock()
+        mock_producer.return_value = mock_producer_instance
+
+        mock_future = Mock()
+        mock_producer_instance.send.return_value = mock_future
+
+        client = KafkaProducerClient()
+        errors = []
+        future = client.send_message_async("test_topic", {"test": "message"}, on_error=errors.append)
+
+        assert future is mock_future
+        mock_future.get.assert_not_called()
+
+        # Simulate the broker rejecting the record
+        errback = mock_future.add_errback.call_args[0][0]
+        errback(Exception("broker down"))
+
+        assert len(errors) == 1
+        dlq_call = mock_producer_instance.send.call_args_list[-1]
+        assert dlq_call[0][0] == KafkaTopics.DLQ
+        assert dlq_call[1]["value"]["original_topic"] == "test_topic"
+
+    @patch('messaging.kafka_producer.KafkaProducer')
+    def test_send_many_flushes_once(self, mock_producer):
+        """Test that send_many pipelines sends and flushes once"""
+        mock_producer_instance = Mock()
+        mock_producer.return_value = mock_producer_instance
+
+        client = KafkaProducerClient()
+        delivered = client.send_many([
+            ("topic_a", {"job_id": "1"}),
+            ("topic_b", {"job_id": "2"}, "2"),
+        ])
+
+        assert delivered == 2
+        assert mock_producer_instance.send.call_count == 2
+        mock_producer_instance.flush.assert_called_once()
+
+    def test_serializer_reads_legacy_and_framed_messages(self):
+        """Test that framed messages round-trip and legacy JSON still decodes"""
+        import json
+        from messaging.serialization import MessageSerializer, MAGIC, SCHEMA_VERSION
+
+        message = {"job_id": "job_1", "script": "word " * 2000, "brief": {"topic": "AI"}}
+
+        legacy = MessageSerializer(codec="json")
+        assert legacy.serialize(message) == json.dumps(message).encode('utf-8')
+
+        framed = MessageSerializer(codec="msgpack", compression="zstd", compression_threshold=1024)
+        data = framed.serialize(message)
+        assert data[0] == MAGIC and data[1] == SCHEMA_VERSION
+        assert framed.deserialize(data) == message
+
+        # Consumers configured for the new format still accept rollout-era JSON
+        assert framed.deserialize(legacy.serialize(message)) == message
+        assert legacy.deserialize(data) == message
+
+    def test_artifact_store_offloads_and_resolves_large_fields(self, tmp_path):
+        """Test claim-check offload on send and read-through resolution on consume"""
+        from storage.artifact_store import LocalArtifactStore, ArtifactCache, resolve_artifacts, is_artifact_ref
+
+        store = LocalArtifactStore(base_dir=str(tmp_path), offload_threshold=100)
+        message = {"job_id": "job_1", "script": "word " * 100, "outline": {"title": "Short"}}
+
+        offloaded = store.offload(message)
+        assert is_artifact_ref(offloaded["script"])
+        assert offloaded["outline"] == {"title": "Short"}
+        assert offloaded["job_id"] == "job_1"
+        assert message["script"] == "word " * 100
+
+        # A fresh cache forces a read from the backing store
+        consumer_store = LocalArtifactStore(base_dir=str(tmp_path), cache=ArtifactCache(4))
+        assert resolve_artifacts(offloaded, consumer_store) == message
+
+        # Identical content maps to the same reference
+        assert store.offload(message)["script"] == offloaded["script"]
+
+        with pytest.raises(ValueError):
+            resolve_artifacts(offloaded, None)
+
+    def test_producer_registry_shares_one_producer(self):
+        """Test that the registry builds one producer per process and closes it on shutdown"""
+        from concurrent.futures import ThreadPoolExecutor
+        from messaging.kafka_producer import ProducerRegistry
+
+        factory = Mock(side_effect=lambda: Mock())
+        registry = ProducerRegistry()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            producers = list(executor.map(lambda _: registry.get(factory), range(32)))
+
+        assert factory.call_count == 1
+        assert all(p is producers[0] for p in producers)
+
+        registry.close_all()
+        producers[0].close.assert_called_once()
+        assert registry.get(factory) is not producers[0]
+
+    def test_memory_backend_partitions_groups_and_offsets(self):
+        """Test the in-memory transport behind the regular client classes"""
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import get_broker, reset_broker
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            get_broker().create_topic("bench.topic", partitions=2)
+
+            producer = KafkaProducerClient()
+            for i in range(4):
+                assert producer.send_message("bench.topic", {"seq": i}) is True
+
+            first = KafkaConsumerClient(["bench.topic"], group_id="bench")
+            second = KafkaConsumerClient(["bench.topic"], group_id="bench")
+
+            # Two members of one group split the partitions
+            records_a = first.consumer.poll(timeout_ms=100)
+            records_b = second.consumer.poll(timeout_ms=100)
+            assert set(records_a) == {TopicPartition("bench.topic", 0)}
+            assert set(records_b) == {TopicPartition("bench.topic", 1)}
+            assert [r.value["seq"] for r in records_a[TopicPartition("bench.topic", 0)]] == [0, 2]
+
+            # Only the first member commits; a replacement resumes from committed offsets
+            first.consumer.commit()
+            first.close()
+            second.close()
+
+            third = KafkaConsumerClient(["bench.topic"], group_id="bench")
+            records_c = third.consumer.poll(timeout_ms=100)
+            assert set(records_c) == {TopicPartition("bench.topic", 1)}
+            assert [r.value["seq"] for r in records_c[TopicPartition("bench.topic", 1)]] == [1, 3]
+            third.close()
+            reset_broker()
+
+    def test_serial_consumer_stops_on_request(self):
+        """Test that stop() ends the one-at-a-time consume loop"""
+        import threading
+        from messaging.memory_broker import reset_broker
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            client = KafkaConsumerClient(["serial.topic"], group_id="serial")
+            received = []
+            client.register_handler("serial.topic", lambda message: received.append(message["seq"]))
+
+            producer = KafkaProducerClient()
+            for i in range(3):
+                producer.send_message("serial.topic", {"seq": i})
+
+            thread = threading.Thread(target=client.start_consuming)
+            thread.start()
+            deadline = time.monotonic() + 5
+            while len(received) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            client.stop()
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+            assert received == [0, 1, 2]
+            reset_broker()
+
+    def test_queue_stats_report_lag_per_group_and_partition(self):
+        """Test lag and oldest-message age computed from end vs committed offsets"""
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import get_broker, reset_broker
+        from messaging.queue_manager import QueueStatsCollector
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            get_broker().create_topic(KafkaTopics.TTS_GENERATION, partitions=2)
+
+            producer = KafkaProducerClient()
+            for i in range(5):
+                producer.send_message(KafkaTopics.TTS_GENERATION, {"seq": i})
+            get_broker().commit(config.KAFKA_GROUP_ID, {TopicPartition(KafkaTopics.TTS_GENERATION, 0): 2})
+            get_broker().commit("other-group", {TopicPartition(KafkaTopics.TTS_GENERATION, 1): 2})
+
+            collector = QueueStatsCollector(ttl_seconds=60)
+            stats = collector.get_stats()
+
+            tts = stats["groups"][config.KAFKA_GROUP_ID][KafkaTopics.TTS_GENERATION]
+            # Partition 0 holds seq 0,2,4 (2 committed), partition 1 holds 1,3 (none committed)
+            assert tts["partitions"]["0"]["lag"] == 1
+            assert tts["partitions"]["1"]["lag"] == 2
+            assert tts["lag"] == 3
+            assert tts["oldest_message_age_seconds"] is not None
+            assert stats["groups"]["other-group"][KafkaTopics.TTS_GENERATION]["lag"] == 3
+            assert stats["backlog"][KafkaTopics.TTS_GENERATION] == 3
+            assert stats["bottleneck"]["topic"] == KafkaTopics.TTS_GENERATION
+            assert stats["topics"][KafkaTopics.TTS_GENERATION]["end_offset"] == 5
+
+            # Served from cache until the TTL expires or a refresh is requested
+            producer.send_message(KafkaTopics.TTS_GENERATION, {"seq": 5})
+            assert collector.get_stats()["backlog"][KafkaTopics.TTS_GENERATION] == 3
+            assert collector.get_stats(refresh=True)["backlog"][KafkaTopics.TTS_GENERATION] == 4
+
+            collector.close()
+            reset_broker()
+
+    def test_retry_error_classification(self):
+        """Test transient vs permanent error classification"""
+        from messaging.retry import is_transient_error
+
+        class RateLimitError(Exception):
+            pass
+
+        class HTTPError(Exception):
+            def __init__(self, status_code):
+                super().__init__(f"HTTP {status_code}")
+                self.status_code = status_code
+
+        assert is_transient_error(ConnectionError("reset"))
+        assert is_transient_error(TimeoutError())
+        assert is_transient_error(RateLimitError("slow down"))
+        assert is_transient_error(HTTPError(503))
+        assert is_transient_error(HTTPError(429))
+        assert not is_transient_error(HTTPError(400))
+        assert not is_transient_error(ValueError("bad script"))
+
+        # Wrapped provider errors are classified by their cause
+        try:
+            try:
+                raise ConnectionError("provider down")
+            except ConnectionError as e:
+                raise RuntimeError("TTS generation failed") from e
+        except RuntimeError as wrapped:
+            assert is_transient_error(wrapped)
+
+    def test_retry_tiers_and_relay(self):
+        """Test transient failures are delayed through retry tiers and relayed back"""
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import MemoryKafkaConsumer, reset_broker
+        from messaging.dlq_replay import parse_entry
+        from messaging.retry import (ATTEMPT_HEADER, RetryRelay, delivery_context,
+                                     record_headers, retry_or_dead_letter, schedule_retry)
+        from utils.config import config
+
+        topic = KafkaTopics.TTS_GENERATION
+        retry_10s = KafkaTopics.retry_topic(topic, "10s")
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            producer = KafkaProducerClient()
+            producer.send_message(topic, {"job_id": "job_1"}, key="job_1")
+
+            stage = MemoryKafkaConsumer(topic, group_id="stage", auto_offset_reset='earliest',
+                                        value_deserializer=producer.serializer.deserialize)
+            record = stage.poll(timeout_ms=100)[TopicPartition(topic, 0)][0]
+
+            # Permanent errors and calls outside a handler are dead-lettered
+            assert schedule_retry(producer, record.value, ConnectionError("down")) is None
+            with delivery_context(record):
+                assert schedule_retry(producer, record.value, ValueError("bad input")) is None
+                assert schedule_retry(producer, record.value, ConnectionError("down")) == 1
+
+            relay = RetryRelay(producer=producer)
+            tp = TopicPartition(retry_10s, 0)
+            # Not yet due: the relay holds the partition instead of spinning on it
+            for records_tp, batch in relay.consumer.poll(timeout_ms=100).items():
+                relay._relay_partition(records_tp, batch)
+            assert tp in relay.consumer.paused()
+            assert stage.poll(timeout_ms=10) == {}
+
+            with patch.dict(KafkaTopics.RETRY_TIERS, {"10s": 0}):
+                relay._held[tp] = time.time() - 1
+                relay._resume_due()
+                for records_tp, batch in relay.consumer.poll(timeout_ms=100).items():
+                    relay._relay_partition(records_tp, batch)
+
+            retried = stage.poll(timeout_ms=100)[TopicPartition(topic, 0)][0]
+            assert retried.value == {"job_id": "job_1"}
+            assert retried.key == b"job_1"
+            assert record_headers(retried)[ATTEMPT_HEADER] == "1"
+
+            # The next failure moves up a tier; attempts beyond max_retries are dead-lettered
+            with delivery_context(retried):
+                assert schedule_retry(producer, retried.value, ConnectionError("down")) == 2
+            exhausted = retried._replace(headers=[(ATTEMPT_HEADER, b"3")])
+            with delivery_context(exhausted):
+                assert schedule_retry(producer, retried.value, ConnectionError("down")) is None
+
+            # The shared helper dead-letters in the shape the replay tool reads
+            with delivery_context(retried):
+                assert retry_or_dead_letter(producer, "tts", None, retried.value, ValueError("bad input")) is None
+            dlq = MemoryKafkaConsumer(KafkaTopics.DLQ, group_id="dlq", auto_offset_reset='earliest',
+                                      value_deserializer=producer.serializer.deserialize)
+            entry = parse_entry(dlq.poll(timeout_ms=100)[TopicPartition(KafkaTopics.DLQ, 0)][0])
+            assert (entry.job_id, entry.stage, entry.error_class) == ("job_1", "tts", "ValueError")
+            assert entry.original_topic == topic and entry.message == {"job_id": "job_1"}
+
+            dlq.close()
+            relay.consumer.close()
+            stage.close()
+            reset_broker()
+
+    def test_dlq_replay_filters_throttles_and_deduplicates(self):
+        """Test DLQ indexing, selective replay and replay de-duplication"""
+        from kafka.structs import TopicPartition
+        from messaging.dlq_replay import DLQReplayer, TokenBucket
+        from messaging.memory_broker import MemoryKafkaConsumer, reset_broker
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            producer = KafkaProducerClient()
+            # Agent, evaluator and legacy (non-replayable) DLQ shapes
+            producer.send_message(KafkaTopics.DLQ, {
+                "job_id": "job_1", "agent": "tts", "stage": "tts", "error": "quota",
+                "error_class": "RateLimitError", "original_topic": KafkaTopics.TTS_GENERATION,
+                "message": {"job_id": "job_1", "script": "one"}
+            })
+            producer.send_message(KafkaTopics.DLQ, {
+                "job_id": "job_2", "stage": "outline_evaluation", "error": "bad json",
+                "error_class": "ValueError", "original_topic": KafkaTopics.OUTLINE_EVALUATION,
+                "message": {"job_id": "job_2", "outline": {}, "brief": {}}
+            })
+            producer.send_message(KafkaTopics.DLQ, {"job_id": "job_3", "agent": "script", "error": "x"})
+            producer.send_message(KafkaTopics.DLQ, {
+                "job_id": "job_1", "agent": "tts", "stage": "tts", "error": "quota again",
+                "error_class": "RateLimitError", "original_topic": KafkaTopics.TTS_GENERATION,
+                "message": {"job_id": "job_1", "script": "two"}
+            })
+
+            repo = Mock()
+            repo.get_job_statuses.return_value = {"job_1": "FAILED", "job_2": "COMPLETED"}
+            replayer = DLQReplayer(producer=producer, repo=repo)
+            index = replayer.load_index()
+
+            assert len(index.entries) == 4
+            summary = index.summary()
+            assert summary["replayable"] == 2
+            assert summary["by_error_class"] == {"RateLimitError": 1, "ValueError": 1}
+
+            # Completed jobs are skipped; the latest failure per job is replayed once
+            result = replayer.replay(index, index.query(), rate=1000, concurrency=2)
+            assert result["replayed"] == 1 and result["job_ids"] == ["job_1"]
+            assert result["skipped"] == 1
+
+            stage = MemoryKafkaConsumer(KafkaTopics.TTS_GENERATION, group_id="tts", auto_offset_reset='earliest',
+                                        value_deserializer=producer.serializer.deserialize)
+            replayed = stage.poll(timeout_ms=100)[TopicPartition(KafkaTopics.TTS_GENERATION, 0)]
+            assert [r.value["script"] for r in replayed] == ["two"]
+
+            # A fresh index sees the replay marker and does not re-drive the job
+            index = replayer.load_index()
+            assert index.query(error_class="RateLimitError") == []
+            assert len(index.query(error_class="RateLimitError", include_replayed=True)) == 1
+            result = replayer.replay(index, index.query(error_class="RateLimitError", include_replayed=True),
+                                     dry_run=True)
+            assert result["replayed"] == 0 and result["skipped"] == 1
+            result = replayer.replay(index, index.query(error_class="RateLimitError", include_replayed=True),
+                                     dry_run=True, include_replayed=True)
+            assert result["job_ids"] == ["job_1"]
+
+            stage.close()
+            reset_broker()
+
+        # Rate limiting: 5 acquisitions at 50/s with no burst take at least ~80ms
+        bucket = TokenBucket(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.07
+
+    def test_ledger_backends_and_ttl(self):
+        """Test ledger keys, TTL eviction and fail-open behaviour"""
+        from messaging.ledger import MemoryLedger, MessageLedger, PostgresLedger, RedisLedger
+
+        key = MessageLedger.key("job_1", "tts", {"job_id": "job_1", "script": "hi"})
+        assert key == MessageLedger.key("job_1", "tts", {"script": "hi", "job_id": "job_1"})
+        assert key != MessageLedger.key("job_1", "script", {"job_id": "job_1", "script": "hi"})
+
+        ledger = MemoryLedger(ttl_seconds=0.05)
+        ledger.record(key, "job_1", "tts", "next.topic", {"job_id": "job_1"})
+        assert ledger.get(key)["topic"] == "next.topic"
+        time.sleep(0.06)
+        assert ledger.get(key) is None
+
+        redis_client = Mock()
+        redis_ledger = RedisLedger(client=redis_client, ttl_seconds=60)
+        redis_ledger.record(key, "job_1", "tts")
+        assert redis_client.set.call_args[1]["ex"] == 60
+
+        # Storage outages fail open: the stage simply runs again
+        repo = Mock()
+        repo.get_processed_message.side_effect = Exception("database down")
+        assert PostgresLedger(repo=repo).get(key) is None
+
+    def test_priority_lanes_drain_by_weight_without_starvation(self):
+        """Test that backlogged lanes are interleaved by weight and idle lanes are skipped"""
+        from kafka.structs import TopicPartition
+        from messaging.priority import WeightedLaneBuffer
+
+        buffer = WeightedLaneBuffer(weights={"high": 6, "normal": 3, "low": 1}, capacity=5)
+        for priority in ["high", "normal", "low"]:
+            tp = TopicPartition(KafkaTopics.priority_topic(KafkaTopics.TTS_GENERATION, priority), 0)
+            buffer.add(tp, [Mock(offset=i) for i in range(20)])
+
+        lanes = [KafkaTopics.split_priority(tp.topic)[1] for tp, _ in buffer.take(10)]
+        assert lanes.count("high") == 6
+        assert lanes.count("normal") == 3
+        assert lanes.count("low") == 1
+        assert buffer.full_lanes() == {"high", "normal", "low"}
+
+        # Once high and normal run dry, low gets every slot
+        rest = [KafkaTopics.split_priority(tp.topic)[1] for tp, _ in buffer.take()]
+        assert len(rest) == 50 and len(buffer) == 0
+        assert rest[-5:] == ["low"] * 5
+
+    def test_priority_lanes_route_and_consume(self):
+        """Test that stage messages land on their lane, inherit it downstream and are all consumed"""
+        import threading
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import get_broker, reset_broker
+        from messaging.retry import delivery_context
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'), \
+             patch.object(config, 'PRIORITY_LANES_ENABLED', True):
+            reset_broker()
+            producer = KafkaProducerClient()
+            high = KafkaTopics.priority_topic(KafkaTopics.SCRIPT_GENERATION, "high")
+
+            assert producer.send_message(KafkaTopics.SCRIPT_GENERATION,
+                                         {"job_id": "a", "brief": {"priority": "high"}}) is True
+            assert producer.send_message(KafkaTopics.SCRIPT_GENERATION, {"job_id": "b"}) is True
+            assert get_broker().end_offset(TopicPartition(high, 0)) == 1
+            assert get_broker().end_offset(TopicPartition(KafkaTopics.SCRIPT_GENERATION, 0)) == 1
+
+            # A handoff without a priority inherits the lane of the record being handled
+            record = Mock(topic=high, value={"job_id": "a"})
+            with delivery_context(record):
+                producer.send_message(KafkaTopics.TTS_GENERATION, {"job_id": "a"})
+            tts_high = TopicPartition(KafkaTopics.priority_topic(KafkaTopics.TTS_GENERATION, "high"), 0)
+            assert get_broker().end_offset(tts_high) == 1
+
+            client = KafkaConsumerClient([KafkaTopics.SCRIPT_GENERATION], group_id="lanes")
+            assert set(client.topics) == set(KafkaTopics.priority_topics(KafkaTopics.SCRIPT_GENERATION))
+            received = []
+            client.register_handler(KafkaTopics.SCRIPT_GENERATION,
+                                    lambda message: received.append((message["job_id"], message.get("priority", "normal"))))
+
+            thread = threading.Thread(target=client.start_consuming)
+            thread.start()
+            deadline = time.monotonic() + 5
+            while len(received) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            client.stop()
+            thread.join(timeout=5)
+
+            assert sorted(received) == [("a", "high"), ("b", "normal")]
+            assert get_broker().committed("lanes", TopicPartition(high, 0)) == 1
+            reset_broker()
+
+    def test_handoffs_are_keyed_by_job(self):
+        """Test that unkeyed stage messages default to the job ID and share a partition"""
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import get_broker, reset_broker
+        from messaging.partitioning import crc32_partitioner, get_partitioner
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            get_broker().create_topic(KafkaTopics.TTS_GENERATION, partitions=4)
+            producer = KafkaProducerClient()
+            for attempt in range(5):
+                producer.send_message(KafkaTopics.TTS_GENERATION, {"job_id": "job_42", "attempt": attempt})
+
+            ends = [get_broker().end_offset(TopicPartition(KafkaTopics.TTS_GENERATION, p)) for p in range(4)]
+            assert sorted(ends) == [0, 0, 0, 5]
+            reset_broker()
+
+        assert crc32_partitioner(b"job_42", [0, 1, 2], [0, 1, 2]) == crc32_partitioner(b"job_42", [0, 1, 2], [])
+        with pytest.raises(ValueError):
+            get_partitioner("sticky")
+
+    def test_partition_cache_is_dropped_on_revoke(self):
+        """Test that cached job data lives only while its partition is owned"""
+        from kafka.structs import TopicPartition
+        from messaging.partition_cache import PartitionCache
+
+        cache = PartitionCache(max_jobs=2)
+        tp = TopicPartition(KafkaTopics.PUBLISHING, 0)
+        loader = Mock(return_value={"title": "t"})
+
+        # Jobs not delivered by a consumer are never cached
+        cache.get("job_1", "job", loader)
+        cache.get("job_1", "job", loader)
+        assert loader.call_count == 2
+
+        cache.bind("job_1", tp)
+        cache.get("job_1", "job", loader)
+        assert cache.get("job_1", "job", loader) == {"title": "t"}
+        assert loader.call_count == 3
+
+        cache.bind("job_2", TopicPartition(KafkaTopics.PUBLISHING, 1))
+        cache.put("job_2", "job", {"title": "u"})
+        assert cache.drop({tp}) == 1
+        assert cache.get("job_1", "job") is None
+        assert cache.get("job_2", "job") == {"title": "u"}
+
+        # Least recently bound jobs are evicted past max_jobs
+        cache.bind("job_3", tp)
+        cache.bind("job_4", tp)
+        assert cache.get("job_2", "job") is None
+
+    def test_admission_control_accepts_queues_and_rejects(self):
+        """Test that job admission follows active and held jobs and stage lag, counting admissions since the snapshot"""
+        from services.admission import ACCEPT, HELD_STATUS, QUEUE, REJECT, AdmissionController
+        from utils.config import config
+
+        load = {"active": 1, "held": 0}
+        repo = Mock()
+        repo.count_jobs.side_effect = lambda statuses: load["held" if HELD_STATUS in statuses else "active"]
+        stats = Mock()
+        stats.get_stats.return_value = {"backlog": {KafkaTopics.OUTLINE_GENERATION: 0}}
+        with patch.object(config, 'ADMISSION_CONTROL_ENABLED', True):
+            controller = AdmissionController(repo=repo, stats=stats, max_in_flight=2, queue_limit=2,
+                                             throughput_per_minute=6, ttl_seconds=60)
+
+            assert controller.admit().action == ACCEPT
+            # The snapshot still says 1 active job, but one was just admitted
+            queued = controller.admit()
+            assert queued.action == QUEUE and queued.queue_position == 1
+            assert queued.estimated_start_at is not None
+            assert controller.admit().queue_position == 2
+            rejected = controller.admit()
+            assert rejected.action == REJECT and rejected.retry_after_seconds == 10
+            assert repo.count_jobs.call_count == 2
+            assert controller.summary()["decisions"] == {ACCEPT: 1, QUEUE: 2, REJECT: 1}
+
+            # Held jobs start oldest first as room frees up; a job claimed elsewhere is skipped
+            load.update(active=0, held=3)
+            repo.get_pending_jobs.return_value = [("job_1", {"topic": "a"}), ("job_2", {}), ("job_3", {})]
+            repo.claim_pending_job.side_effect = lambda job_id: job_id != "job_2"
+            start = Mock(return_value=True)
+            assert controller.release(start) == 2
+            assert [call.args for call in start.call_args_list] == [("job_1", {"topic": "a"}), ("job_3", {})]
+            # Nothing is released while the pipeline is full
+            load.update(active=2, held=1)
+            assert controller.release(start) == 0
+
+            # Lag on a work topic queues jobs even with free workers; load errors fail open
+            stats.get_stats.return_value = {"backlog": {KafkaTopics.TTS_GENERATION: 1}}
+            load.update(active=0, held=0)
+            controller = AdmissionController(repo=repo, stats=stats, max_in_flight=2, queue_limit=2, ttl_seconds=0)
+            assert controller.admit().action == QUEUE
+            repo.count_jobs.side_effect = Exception("database down")
+            assert controller.admit().action == ACCEPT
+
+    def test_long_handler_survives_rebalance_and_drains_on_stop(self):
+        """Test that a running handler is neither redelivered by a rebalance nor cut off by stop()"""
+        import threading
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import get_broker, reset_broker
+        from utils.config import config
+
+        tp = TopicPartition("long.topic", 0)
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            producer = KafkaProducerClient()
+            producer.send_message("long.topic", {"job_id": "job_1"})
+            started, release, calls = threading.Event(), threading.Event(), []
+
+            def synthesize(message):
+                calls.append(message["job_id"])
+                started.set()
+                release.wait(5)
+
+            client = KafkaConsumerClient(["long.topic"], group_id="long")
+            client.revoke_drain_seconds = 0.05
+            client.register_handler("long.topic", synthesize)
+            assignments = []
+            take_ownership = client._take_ownership
+            client._take_ownership = lambda partitions: (assignments.append(partitions), take_ownership(partitions))
+            thread = threading.Thread(target=client.start_consuming)
+            thread.start()
+            other = None
+            try:
+                assert started.wait(5)
+
+                # A member joining mid-flight triggers a rebalance; the partition comes back
+                # to its owner, which resumes after the running message instead of re-fetching it
+                other = KafkaConsumerClient(["long.topic"], group_id="long")
+                deadline = time.monotonic() + 5
+                while len(assignments) < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert assignments[-1] == {tp}
+                release.set()
+                deadline = time.monotonic() + 5
+                while get_broker().committed("long", tp) != 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                time.sleep(0.2)
+                assert calls == ["job_1"]
+                assert get_broker().committed("long", tp) == 1
+
+                # stop() waits for the running handler and commits it before leaving
+                started.clear()
+                release.clear()
+                producer.send_message("long.topic", {"job_id": "job_2"})
+                assert started.wait(5)
+                client.stop()
+                time.sleep(0.2)
+                assert thread.is_alive()
+                assert get_broker().committed("long", tp) == 1
+                release.set()
+                thread.join(timeout=5)
+                assert not thread.is_alive()
+                assert calls == ["job_1", "job_2"]
+                assert get_broker().committed("long", tp) == 2
+            finally:
+                # Never leave the consumer thread behind if an assertion fails
+                release.set()
+                client.stop()
+                thread.join(timeout=5)
+                if other is not None:
+                    other.close()
+                reset_broker()
+
+    def test_circuit_breaker_opens_probes_and_closes(self):
+        """Test breaker transitions: transient failures open it, one probe at a time, success closes it"""
+        from utils.circuit_breaker import CircuitBreaker
+        from utils.exceptions import ProviderUnavailableError
+
+        breaker = CircuitBreaker("tts", failure_threshold=2, recovery_seconds=0.05)
+
+        def fail(exc):
+            raise exc
+
+        # Bad requests mean the provider answered and are not counted
+        with pytest.raises(ValueError):
+            breaker.call(fail, ValueError("bad ssml"))
+        with pytest.raises(ConnectionError):
+            breaker.call(fail, ConnectionError("reset"))
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        # The failure that opens the breaker is reported as an outage, later calls fail fast
+        with pytest.raises(ProviderUnavailableError):
+            breaker.call(fail, TimeoutError("timed out"))
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.ready()
+        with pytest.raises(ProviderUnavailableError):
+            breaker.call(lambda: "audio")
+
+        # After the recovery wait one probe runs; a failed probe reopens with a longer wait
+        time.sleep(0.06)
+        assert breaker.ready()
+        assert breaker.allow_request()
+        assert not breaker.ready() and not breaker.allow_request()
+        assert breaker.record_failure(ConnectionError("still down"))
+        assert 0.05 < breaker.retry_after() <= 0.1
+
+        time.sleep(0.11)
+        assert breaker.call(lambda: "audio") == "audio"
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.call(lambda: "audio") == "audio"
+
+    def test_llm_outage_parks_every_llm_stage(self):
+        """Test that each stage the LLM breaker pauses parks its messages instead of losing them"""
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import MemoryKafkaConsumer, reset_broker
+        from messaging.retry import delivery_context, schedule_retry
+        from utils.circuit_breaker import LLM, PROVIDER_TOPICS
+        from utils.config import config
+        from utils.exceptions import ProviderUnavailableError
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            producer = KafkaProducerClient()
+            for topic in PROVIDER_TOPICS[LLM]:
+                producer.send_message(topic, {"job_id": "job_1"})
+                stage = MemoryKafkaConsumer(topic, group_id="stage", auto_offset_reset='earliest',
+                                            value_deserializer=producer.serializer.deserialize)
+                record = stage.poll(timeout_ms=100)[TopicPartition(topic, 0)][0]
+                with delivery_context(record):
+                    assert schedule_retry(producer, record.value, ProviderUnavailableError(LLM)) == 0, topic
+                stage.close()
+
+                parked = MemoryKafkaConsumer(KafkaTopics.retry_topic(topic, "10s"), group_id="relay",
+                                             auto_offset_reset='earliest')
+                assert parked.poll(timeout_ms=100), topic
+                parked.close()
+            reset_broker()
+
+    def test_provider_outage_pauses_consumption_without_failing(self):
+        """Test that an open breaker parks failures without using attempts and pauses its stage topics"""
+        import threading
+        from kafka.structs import TopicPartition
+        from messaging.memory_broker import MemoryKafkaConsumer, get_broker, reset_broker
+        from messaging.retry import ATTEMPT_HEADER, delivery_context, record_headers, schedule_retry
+        from utils.circuit_breaker import TTS, get_breaker, reset_breakers
+        from utils.config import config
+        from utils.exceptions import ProviderUnavailableError
+
+        topic = KafkaTopics.TTS_GENERATION
+        tp = TopicPartition(topic, 0)
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'), \
+             patch.object(config, 'CIRCUIT_BREAKER_FAILURE_THRESHOLD', 1), \
+             patch.object(config, 'CIRCUIT_BREAKER_RECOVERY_SECONDS', 0.3):
+            reset_broker()
+            reset_breakers()
+            producer = KafkaProducerClient()
+            producer.send_message(topic, {"job_id": "job_1"})
+
+            # An outage is parked on the first tier even when retries are exhausted
+            stage = MemoryKafkaConsumer(topic, group_id="parked", auto_offset_reset='earliest',
+                                        value_deserializer=producer.serializer.deserialize)
+            record = stage.poll(timeout_ms=100)[tp][0]._replace(headers=[(ATTEMPT_HEADER, b"3")])
+            with delivery_context(record):
+                assert schedule_retry(producer, record.value, ProviderUnavailableError("tts")) == 3
+            stage.close()
+            parked = MemoryKafkaConsumer(KafkaTopics.retry_topic(topic, "10s"), group_id="relay",
+                                         auto_offset_reset='earliest')
+            parked_record = parked.poll(timeout_ms=100)[TopicPartition(KafkaTopics.retry_topic(topic, "10s"), 0)][0]
+            assert record_headers(parked_record)[ATTEMPT_HEADER] == "3"
+            parked.close()
+
+            # While the TTS breaker is open the stage is not consumed; it resumes with a probe
+            get_breaker(TTS).record_failure(ConnectionError("TTS down"))
+            handled = []
+            client = KafkaConsumerClient([topic], group_id="tts")
+            client.register_handler(topic, lambda message: handled.append(get_breaker(TTS).call(lambda: message["job_id"])))
+            thread = threading.Thread(target=client.start_consuming)
+            thread.start()
+            try:
+                time.sleep(0.15)
+                assert handled == []
+                assert tp in client.consumer.paused()
+
+                deadline = time.monotonic() + 5
+                while not handled and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert handled == ["job_1"]
+                assert get_breaker(TTS).state == "closed"
+                deadline = time.monotonic() + 5
+                while get_broker().committed("tts", tp) != 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert get_broker().committed("tts", tp) == 1
+                assert tp not in client.consumer.paused()
+            finally:
+                client.stop()
+                thread.join(timeout=5)
+                reset_breakers()
+                reset_broker()
+
+    def test_topic_provisioning_sizes_and_grows_partitions(self):
+        """Test that topics are created from stage concurrency and only idle topics gain partitions"""
+        from messaging.memory_broker import get_broker, reset_broker
+        from messaging.provisioning import TopicProvisioner, parse_concurrency, plan_topics
+        from utils.config import config
+
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'):
+            reset_broker()
+            specs = {spec.name: spec for spec in plan_topics(parse_concurrency("tts=3"), headroom=2)}
+            assert specs[KafkaTopics.TTS_GENERATION].partitions == 6
+            assert specs[KafkaTopics.SCRIPT_GENERATION].partitions == config.KAFKA_DEFAULT_STAGE_CONCURRENCY * 2
+            assert specs[KafkaTopics.DLQ].partitions == 1
+            assert specs[KafkaTopics.DLQ_REPLAYED].configs["cleanup.policy"] == "compact"
+            with pytest.raises(ValueError):
+                parse_concurrency("speech=2")
+
+            stats = Mock()
+            provisioner = TopicProvisioner(stats=stats)
+            report = provisioner.provision(list(specs.values()))
+            assert len(report["created"]) == len(specs)
+            broker = get_broker()
+            assert len(broker.partitions_for_topic(KafkaTopics.TTS_GENERATION)) == 6
+            assert broker.topic_configs(KafkaTopics.DLQ)["retention.ms"] == str(config.KAFKA_DLQ_RETENTION_DAYS * 24 * 3600 * 1000)
+
+            # Scaling up: idle topics grow, topics with pending messages wait unless forced, nothing shrinks
+            stats.get_stats.return_value = {"backlog": {KafkaTopics.SCRIPT_GENERATION: 5}}
+            grown = plan_topics(parse_concurrency("tts=4,script=4,outline=1"), headroom=2)
+            report = provisioner.provision(grown, dry_run=True)
+            assert report["expanded"][KafkaTopics.TTS_GENERATION] == [6, 8]
+            assert KafkaTopics.SCRIPT_GENERATION not in report["expanded"]
+            assert len(broker.partitions_for_topic(KafkaTopics.TTS_GENERATION)) == 6
+
+            report = provisioner.provision(grown)
+            assert len(broker.partitions_for_topic(KafkaTopics.TTS_GENERATION)) == 8
+            assert len(broker.partitions_for_topic(KafkaTopics.SCRIPT_GENERATION)) == 4
+            assert "pending" in report["skipped"][KafkaTopics.SCRIPT_GENERATION]
+            assert "cannot be removed" in report["skipped"][KafkaTopics.OUTLINE_GENERATION]
+
+            provisioner.provision(grown, force=True)
+            assert len(broker.partitions_for_topic(KafkaTopics.SCRIPT_GENERATION)) == 8
+            assert len(broker.partitions_for_topic(KafkaTopics.OUTLINE_GENERATION)) == 4
+            reset_broker()
+
+    def test_cancelled_jobs_are_skipped_by_every_worker(self):
+        """Test that a cancel published on the control topic stops queued work but still commits it"""
+        import threading
+        from kafka.structs import TopicPartition
+        from messaging.cancellation import TopicCancellationRegistry, reset_cancellation_registry
+        from messaging.memory_broker import get_broker, reset_broker
+        from utils.config import config
+        from utils.exceptions import JobCancelledError
+
+        topic = KafkaTopics.OUTLINE_GENERATION
+        tp = TopicPartition(topic, 0)
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'), \
+             patch.object(config, 'CANCELLATION_BACKEND', 'topic'):
+            reset_broker()
+            reset_cancellation_registry()
+            producer = KafkaProducerClient()
+            api = TopicCancellationRegistry(producer=producer)
+            api.cancel("job_1")
+            assert api.is_cancelled("job_1")
+            with pytest.raises(JobCancelledError):
+                api.check("job_1")
+            producer.send_message(topic, {"job_id": "job_1"})
+            producer.send_message(topic, {"job_id": "job_2"})
+
+            # The worker learns of the cancel from the control topic, not from the API's memory
+            handled = []
+            client = KafkaConsumerClient([topic], group_id="outline")
+            client.register_handler(topic, lambda message: handled.append(message["job_id"]))
+            assert client.cancellations is not api
+            thread = threading.Thread(target=client.start_consuming)
+            thread.start()
+            try:
+                deadline = time.monotonic() + 5
+                while get_broker().committed("outline", tp) != 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert get_broker().committed("outline", tp) == 2
+                assert handled == ["job_2"]
+                assert client.cancellations.is_cancelled("job_1")
+
+                # Retrying the job lifts the cancel everywhere
+                api.restore("job_1")
+                deadline = time.monotonic() + 5
+                while client.cancellations.is_cancelled("job_1") and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert not client.cancellations.is_cancelled("job_1")
+            finally:
+                client.stop()
+                thread.join(timeout=5)
+                reset_cancellation_registry()
+                reset_broker()
+
+            # Cancels older than the TTL are ignored on replay
+            registry = TopicCancellationRegistry(ttl_seconds=60)
+            registry._apply(Mock(value={"type": "cancel", "job_id": "job_3"}, timestamp=(time.time() - 120) * 1000))
+            assert not registry.is_cancelled("job_3")
+
+    def test_deadline_scheduling_runs_earliest_deadline_first(self):
+        """Test that buffered records run earliest deadline first, late ones last, and handoffs keep the deadline"""
+        import threading
+        from datetime import datetime, timedelta, timezone
+        from kafka.structs import TopicPartition
+        from messaging.deadline import DEADLINE_HEADER, parse_deadline
+        from messaging.memory_broker import MemoryKafkaConsumer, get_broker, reset_broker
+        from messaging.retry import record_headers
+        from utils.config import config
+
+        topic = KafkaTopics.SCRIPT_GENERATION
+        now = datetime.now(timezone.utc)
+        with patch.object(config, 'MESSAGE_BACKEND', 'memory'), \
+             patch.object(config, 'DEADLINE_SCHEDULING_ENABLED', True):
+            reset_broker()
+            producer = KafkaProducerClient()
+            producer.send_message(topic, {"job_id": "undated", "brief": {}})
+            producer.send_message(topic, {"job_id": "later", "brief": {"deliver_by": (now + timedelta(minutes=30)).isoformat()}})
+            producer.send_message(topic, {"job_id": "missed", "brief": {"deliver_by": (now - timedelta(minutes=5)).isoformat()}})
+            producer.send_message(topic, {"job_id": "soon", "brief": {"deliver_by": (now + timedelta(minutes=10)).isoformat()}})
+
+            handled = []
+            client = KafkaConsumerClient([topic], group_id="edf", max_workers=1)
+
+            def handle(message):
+                handled.append(message["job_id"])
+                # Handoffs without the brief carry the deadline in the message and the header
+                producer.send_message(KafkaTopics.SCRIPT_EVALUATION, {"job_id": message["job_id"]})
+
+            client.register_handler(topic, handle)
+            thread = threading.Thread(target=client.start_consuming)
+            thread.start()
+            try:
+                deadline = time.monotonic() + 5
+                while get_broker().committed("edf", TopicPartition(topic, 0)) != 4 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert get_broker().committed("edf", TopicPartition(topic, 0)) == 4
+            finally:
+                client.stop()
+                thread.join(timeout=5)
+
+            assert handled == ["soon", "later", "undated", "missed"]
+            evaluation = MemoryKafkaConsumer(KafkaTopics.SCRIPT_EVALUATION, group_id="check", auto_offset_reset='earliest',
+                                             value_deserializer=producer.serializer.deserialize)
+            records = evaluation.poll(timeout_ms=100)[TopicPartition(KafkaTopics.SCRIPT_EVALUATION, 0)]
+            soon = records[0]
+            assert soon.value["job_id"] == "soon"
+            assert parse_deadline(soon.value["deliver_by"]) == parse_deadline(record_headers(soon)[DEADLINE_HEADER])
+            assert abs(parse_deadline(soon.value["deliver_by"]) - (now + timedelta(minutes=10)).timestamp()) < 1
+            assert "deliver_by" not in records[2].value
+            evaluation.close()
+            reset_broker()
+
+    def test_fair_share_interleaves_tenants_and_caps_admission(self):
+        """Test that workers take turns between tenants by weight and admission caps each tenant's share"""
+        from kafka.structs import TopicPartition
+        from messaging.fairness import TENANT_HEADER, api_key_tenant, parse_tenant_weights
+        from messaging.priority import WeightedLaneBuffer
+        from services.admission import HELD_STATUS, QUEUE, REJECT, AdmissionController
+        from utils.config import config
+
+        assert parse_tenant_weights("alice@example.com:3, api-key:1a2b:2") == {"alice@example.com": 3.0, "api-key:1a2b": 2.0}
+        assert api_key_tenant("secret") == api_key_tenant("secret") and "secret" not in api_key_tenant("secret")
+
+        # A burst from one tenant does not hold back a later, lighter tenant
+        tp = TopicPartition(KafkaTopics.TTS_GENERATION, 0)
+        records = [Mock(headers=[], value={"job_id": f"heavy_{i}", "tenant": "heavy"}, timestamp=time.time() * 1000)
+                   for i in range(4)]
+        records += [Mock(headers=[(TENANT_HEADER, b"light")], value={"job_id": f"light_{i}"}, timestamp=time.time() * 1000)
+                    for i in range(2)]
+        buffer = WeightedLaneBuffer(weights={"high": 1, "normal": 1, "low": 1}, capacity=10,
+                                    tenant_weights={"heavy": 2})
+        buffer.add(tp, records)
+        order = [record.value["job_id"] for _, record in buffer.take()]
+        assert order == ["heavy_0", "heavy_1", "light_0", "heavy_2", "heavy_3", "light_1"]
+
+        # Once jobs wait, a tenant over its share is turned away while others still get in line
+        repo = Mock()
+        repo.count_jobs.side_effect = lambda statuses: 0 if HELD_STATUS in statuses else 6
+        repo.count_jobs_by_tenant.side_effect = lambda statuses: (
+            {} if HELD_STATUS in statuses else {"heavy": {"jobs": 6, "oldest_created_at": None}})
+        stats = Mock()
+        stats.get_stats.return_value = {"backlog": {}}
+        with patch.object(config, 'ADMISSION_CONTROL_ENABLED', True), \
+             patch.object(config, 'FAIR_SHARE_ENABLED', True):
+            controller = AdmissionController(repo=repo, stats=stats, max_in_flight=2, queue_limit=2,
+                                             throughput_per_minute=6, ttl_seconds=60, tenant_weights={})
+            rejected = controller.admit("heavy")
+            assert rejected.action == REJECT and rejected.retry_after_seconds > 0
+            queued = controller.admit("light")
+            assert queued.action == QUEUE and queued.queue_position == 1
+            tenants = controller.summary()["fair_share"]["tenants"]
+            assert tenants["heavy"]["active_jobs"] == 6
+            assert tenants["light"]["decisions"] == {QUEUE: 1}
+
+            # Held jobs are released taking turns between tenants, not in creation order
+            repo.count_jobs.side_effect = lambda statuses: 4 if HELD_STATUS in statuses else 0
+            repo.get_pending_jobs.return_value = [(f"heavy_{i}", {"tenant": "heavy"}) for i in range(3)] + [
+                ("light_0", {"tenant": "light"})]
+            repo.claim_pending_job.return_value = True
+            start = Mock(return_value=True)
+            assert controller.release(start) == 2
+            assert [call.args[0] for call in start.call_args_list] == ["heavy_0", "light_0"]
@@ -22,4 +22,77 @@ class TestWorkers:
             from workers import script_worker
             assert script_worker is not None
         except ImportError as e:
-            pytest.skip(f"Worker import failed: {e}")
\ No newline at end of file
+            pytest.skip(f"Worker import failed: {e}")
+    
+    def test_worker_host_parses_stages(self):
+        """Test stage selection and per-stage concurrency parsing"""
+        from workers.host import STAGE_MODULES, parse_stages
+
+        assert parse_stages("outline, tts=2") == {"outline": None, "tts": 2}
+
+        stages = parse_stages("all,tts=3")
+        assert set(stages) == set(STAGE_MODULES)
+        assert stages["tts"] == 3
+
+        with pytest.raises(ValueError):
+            parse_stages("nonexistent")
+        with pytest.raises(ValueError):
+            parse_stages("tts=0")
+
+    def test_worker_host_runs_and_stops_stages(self):
+        """Test that the host runs each stage on its own thread and drains on stop"""
+        import threading
+        from workers.host import WorkerHost
+
+        class FakeConsumer:
+            def __init__(self, max_workers):
+                self.max_workers = max_workers or 1
+                self.started = threading.Event()
+                self.stopped = threading.Event()
+
+            def start_consuming(self):
+                self.started.set()
+                self.stopped.wait(5)
+
+            def stop(self):
+                self.stopped.set()
+
+        module = Mock()
+        module.create_consumer.side_effect = lambda max_workers=None: FakeConsumer(max_workers)
+
+        with patch('workers.host.producer_registry') as mock_registry, \
+             patch('workers.host.importlib.import_module', return_value=module):
+            host = WorkerHost({"outline": None, "tts": 2})
+            host.start()
+            assert all(c.started.wait(2) for c in host.consumers.values())
+            assert host.consumers["tts"].max_workers == 2
+
+            host.stop()
+            host.wait(shutdown_timeout=2)
+
+        assert not any(thread.is_alive() for thread in host.threads)
+        mock_registry.close_all.assert_called_once()
+
+    def test_approval_defers_on_smtp_outage(self):
+        """Test that SMTP outages leave approvals to be delivered again and only permanent failures auto-approve"""
+        pytest.importorskip("jwt")
+        from services.approval_mixin import ApprovalMixin
+        from utils.exceptions import ProviderUnavailableError
+
+        with patch('services.approval_mixin.PodcastRepository'), \
+             patch('services.approval_mixin.EmailApprovalService'):
+            mixin = ApprovalMixin()
+        mixin.approval_enabled = True
+        mixin._auto_approve_and_continue = Mock(return_value=True)
+        args = dict(job_id="job_1", stage="outline", content_data={}, next_topic="next",
+                    next_message={}, status_update={}, user_email="user@example.com")
+
+        mixin.email_service.send_outline_approval_email.side_effect = ProviderUnavailableError("smtp")
+        with pytest.raises(ProviderUnavailableError):
+            mixin.handle_with_email_approval(**args)
+        mixin._auto_approve_and_continue.assert_not_called()
+
+        mixin.email_service.send_outline_approval_email.side_effect = None
+        mixin.email_service.send_outline_approval_email.return_value = False
+        assert mixin.handle_with_email_approval(**args) is True
+        mixin._auto_approve_and_continue.assert_called_once()
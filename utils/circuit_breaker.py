@@ -0,0 +1,181 @@
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+from messaging.retry import is_transient_error
+from messaging.topics import KafkaTopics
+from utils.config import config
+from utils.exceptions import ProviderUnavailableError
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# External providers with a breaker each
+LLM = "llm"
+TTS = "tts"
+S3 = "s3"
+SMTP = "smtp"
+
+# Stage topics whose handlers call each provider; consumers stop fetching them while it is down
+PROVIDER_TOPICS = {
+    LLM: [KafkaTopics.OUTLINE_GENERATION, KafkaTopics.OUTLINE_GUARDRAILS, KafkaTopics.OUTLINE_EVALUATION,
+          KafkaTopics.SCRIPT_GENERATION, KafkaTopics.SCRIPT_GUARDRAILS, KafkaTopics.SCRIPT_EVALUATION],
+    TTS: [KafkaTopics.TTS_GENERATION],
+    S3: [KafkaTopics.TTS_GENERATION, KafkaTopics.PUBLISHING],
+    SMTP: [KafkaTopics.OUTLINE_APPROVAL, KafkaTopics.SCRIPT_APPROVAL, KafkaTopics.AUDIO_APPROVAL],
+}
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker around calls to one provider
+
+    Consecutive transient failures (timeouts, 5xx, throttling) open the
+    breaker; permanent errors mean the provider answered and do not count.
+    While open, calls fail fast with ProviderUnavailableError. After the
+    recovery wait a single probe call is let through: success closes the
+    breaker, failure reopens it and doubles the wait (up to a maximum).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 recovery_seconds: Optional[float] = None, max_recovery_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or config.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.recovery_seconds = config.CIRCUIT_BREAKER_RECOVERY_SECONDS if recovery_seconds is None else recovery_seconds
+        self.max_recovery_seconds = max(self.recovery_seconds, config.CIRCUIT_BREAKER_MAX_RECOVERY_SECONDS
+                                        if max_recovery_seconds is None else max_recovery_seconds)
+        self.state = self.CLOSED
+        self._failures = 0
+        self._trips = 0  # consecutive openings without a successful call in between
+        self._retry_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def ready(self) -> bool:
+        """Whether a call would be let through now; does not claim the half-open probe"""
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return True
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() >= self._retry_at
+            return not (self.state == self.HALF_OPEN and self._probing)
+
+    def allow_request(self) -> bool:
+        """Admit a call; in the half-open state only one probe runs at a time"""
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return True
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() < self._retry_at:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+                logger.info(f"Circuit breaker {self.name} half-open, probing")
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 unless open)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def _release_probe(self):
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit breaker {self.name} closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trips = 0
+            self._probing = False
+
+    def record_failure(self, exc: BaseException) -> bool:
+        """
+        Count a failed call
+
+        Returns:
+            True if the breaker is open afterwards
+        """
+        if not is_transient_error(exc):
+            # The provider answered; the request itself was bad
+            self.record_success()
+            return False
+
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                wait = min(self.recovery_seconds * 2 ** self._trips, self.max_recovery_seconds)
+                self.state = self.OPEN
+                self._trips += 1
+                self._retry_at = time.monotonic() + wait
+                logger.warning(f"Circuit breaker {self.name} open for {wait:.0f}s after "
+                               f"{self._failures} failures: {type(exc).__name__}: {str(exc)}")
+            return self.state == self.OPEN
+
+    @contextmanager
+    def guard(self):
+        """
+        Run a provider call through the breaker
+
+        Raises:
+            ProviderUnavailableError: The breaker is open, or this failure opened it
+        """
+        if not self.allow_request():
+            raise ProviderUnavailableError(self.name, self.retry_after())
+        try:
+            yield
+        except ProviderUnavailableError:
+            # Another provider is down; the call proved nothing about this one
+            self._release_probe()
+            raise
+        except Exception as e:
+            if config.CIRCUIT_BREAKER_ENABLED and self.record_failure(e):
+                raise ProviderUnavailableError(self.name, self.retry_after(), str(e)) from e
+            raise
+        else:
+            self.record_success()
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call func(*args, **kwargs) through the breaker"""
+        with self.guard():
+            return func(*args, **kwargs)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Get the process-wide breaker for a provider"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker(provider)
+        return breaker
+
+def topic_providers(topic: str) -> List[str]:
+    """Providers called by the handlers of a stage topic (or one of its priority lanes)"""
+    base_topic = KafkaTopics.split_priority(topic)[0]
+    return [provider for provider, topics in PROVIDER_TOPICS.items() if base_topic in topics]
+
+def unavailable_providers(topic: str) -> List[str]:
+    """Providers needed by a stage topic whose breaker is not taking calls"""
+    if not config.CIRCUIT_BREAKER_ENABLED:
+        return []
+    return [provider for provider in topic_providers(topic) if not get_breaker(provider).ready()]
+
+def reset_breakers():
+    """Forget all breaker state (tests)"""
+    with _breakers_lock:
+        _breakers.clear()
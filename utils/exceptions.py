@@ -32,4 +32,19 @@ class JobNotFoundError(PodcastGenerationError):
 
 class InvalidJobStateError(PodcastGenerationError):
     """Job is in invalid state for operation"""
-    pass
\ No newline at end of file
+    pass
+
+class ProviderUnavailableError(PodcastGenerationError):
+    """An external provider's circuit breaker is open; the work should wait, not fail"""
+
+    def __init__(self, provider: str, retry_after: float = None, detail: str = ""):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} unavailable" + (f": {detail}" if detail else ""))
+
+class JobCancelledError(PodcastGenerationError):
+    """The job was cancelled; the stage stops without retrying or failing it"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        super().__init__(f"Job {job_id} was cancelled")
@@ -29,7 +29,8 @@ class Settings:
             },
             "worker_settings": {
                 "batch_size": 1,
-                "timeout": 300
+                "timeout": 300,
+                "concurrency": 1
             }
         }
     
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Multi-Stage Worker Host
+Runs several pipeline stages in one process so they share the Kafka
+producer, the database engine and any loaded models
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messaging.kafka_producer import producer_registry
+from utils.config import config
+from typing import Dict, Optional
+import argparse
+import importlib
+import logging
+import signal
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stage name -> worker module exposing create_consumer(max_workers)
+STAGE_MODULES = {
+    "outline": "workers.outline_worker",
+    "outline_guardrails": "workers.outline_guardrails_worker",
+    "outline_evaluation": "workers.outline_evaluation_worker",
+    "outline_approval": "workers.outline_approval_worker",
+    "script": "workers.script_worker",
+    "script_guardrails": "workers.script_guardrails_worker",
+    "script_evaluation": "workers.script_evaluation_worker",
+    "script_approval": "workers.script_approval_worker",
+    "tts": "workers.tts_worker",
+    "tts_evaluation": "workers.tts_evaluation_worker",
+    "audio_approval": "workers.audio_approval_worker",
+    "publishing": "workers.publishing_worker",
+    "retry": "workers.retry_worker",
+}
+
+def parse_stages(spec: str) -> Dict[str, Optional[int]]:
+    """
+    Parse a stage list such as "outline,script,tts=2"
+
+    Args:
+        spec: Comma-separated stage names, each optionally followed by
+            "=<concurrency>"; "all" selects every stage
+
+    Returns:
+        Dict mapping stage name to its handler concurrency (None = worker default)
+    """
+    stages = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, concurrency = item.partition("=")
+        name = name.strip()
+        value = int(concurrency) if concurrency.strip() else None
+        if value is not None and value < 1:
+            raise ValueError(f"Concurrency for stage '{name}' must be at least 1")
+
+        if name == "all":
+            for stage in STAGE_MODULES:
+                stages.setdefault(stage, value)
+        elif name in STAGE_MODULES:
+            stages[name] = value
+        else:
+            raise ValueError(f"Unknown stage '{name}', expected one of: {', '.join(STAGE_MODULES)}")
+
+    if not stages:
+        raise ValueError("No stages selected")
+    return stages
+
+class WorkerHost:
+    """Runs each selected stage's consumer loop on its own thread"""
+
+    def __init__(self, stages: Dict[str, Optional[int]]):
+        self.stages = stages
+        self.consumers = {}
+        self.threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        """Build every stage consumer, then start their poll loops"""
+        for stage, concurrency in self.stages.items():
+            module = importlib.import_module(STAGE_MODULES[stage])
+            self.consumers[stage] = module.create_consumer(max_workers=concurrency)
+            logger.info(f"Stage '{stage}' ready (concurrency={self.consumers[stage].max_workers})")
+
+        for stage, consumer in self.consumers.items():
+            thread = threading.Thread(target=self._run_stage, args=(stage, consumer),
+                                      name=f"stage-{stage}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _run_stage(self, stage: str, consumer):
+        try:
+            consumer.start_consuming()
+        except Exception as e:
+            logger.error(f"Stage '{stage}' stopped with error: {str(e)}")
+        finally:
+            logger.info(f"Stage '{stage}' stopped")
+
+    def stop(self):
+        """Ask every stage to finish its current work and exit"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        logger.info("Stopping worker host...")
+        for consumer in self.consumers.values():
+            consumer.stop()
+
+    def wait(self, shutdown_timeout: Optional[float] = None):
+        """Block until stop() is called or every stage has exited, then release shared resources"""
+        shutdown_timeout = config.WORKER_HOST_SHUTDOWN_TIMEOUT if shutdown_timeout is None else shutdown_timeout
+
+        while not self._stopping.is_set() and any(thread.is_alive() for thread in self.threads):
+            self._stopping.wait(1)
+        self.stop()
+
+        deadline = time.monotonic() + shutdown_timeout
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.monotonic()))
+            if thread.is_alive():
+                logger.warning(f"{thread.name} did not stop within {shutdown_timeout}s")
+
+        producer_registry.close_all()
+        logger.info("Worker host stopped")
+
+def main():
+    """Main worker function"""
+    parser = argparse.ArgumentParser(description="Run several pipeline stages in one process")
+    parser.add_argument("--stages", default=config.WORKER_HOST_STAGES,
+                        help='Stages to run, e.g. "outline,script,tts=2" or "all"')
+    args = parser.parse_args()
+
+    host = WorkerHost(parse_stages(args.stages))
+    logger.info(f"Starting Worker Host with stages: {', '.join(host.stages)}")
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}")
+        host.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    host.start()
+    host.wait()
+
+if __name__ == "__main__":
+    main()
@@ -9,28 +9,28 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from messaging.kafka_consumer import KafkaConsumerClient
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.kafka_producer import get_shared_producer
+from messaging.retry import retry_or_dead_letter
 from messaging.topics import KafkaTopics
 from database.repositories import PodcastRepository
-from guardrails.nsfw_filter import NSFWFilter
-from guardrails.bias_detector import BiasDetector
+from guardrails.nsfw_filter import get_nsfw_filter
+from guardrails.bias_detector import get_bias_detector
+from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main worker function"""
-    logger.info("Starting Outline Guardrails Worker")
-    
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the Outline Guardrails consumer with its handlers registered"""
     # Initialize consumer and producer
-    consumer = KafkaConsumerClient([KafkaTopics.OUTLINE_GUARDRAILS])
-    producer = KafkaProducerClient()
+    consumer = KafkaConsumerClient([KafkaTopics.OUTLINE_GUARDRAILS], max_workers=max_workers)
+    producer = get_shared_producer()
     repo = PodcastRepository()
     
     # Initialize guardrails
-    nsfw_filter = NSFWFilter()
-    bias_detector = BiasDetector()
+    nsfw_filter = get_nsfw_filter()
+    bias_detector = get_bias_detector()
     
     # Register message handler
     def handle_guardrails_message(message):
@@ -63,16 +63,25 @@ def main():
                 })
             else:
                 logger.warning(f"Outline guardrails failed for job {job_id}")
-                repo.update_job(job_id, {
+                repo.update_job_fields(job_id, {
                     "status": "FAILED",
                     "error_message": f"Guardrails failed: NSFW={nsfw_result['message']}, Bias={bias_result['message']}"
                 })
                 
         except Exception as e:
             logger.error(f"Error processing guardrails message: {str(e)}")
+            retry_or_dead_letter(producer, "outline_guardrails", KafkaTopics.OUTLINE_GUARDRAILS, message, e)
     
     consumer.register_handler(KafkaTopics.OUTLINE_GUARDRAILS, handle_guardrails_message)
     
+    return consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting Outline Guardrails Worker")
+    
+    consumer = create_consumer()
+    
     # Start consuming
     logger.info("Starting to consume messages...")
     consumer.start_consuming()
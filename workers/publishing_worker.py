@@ -12,17 +12,16 @@ from messaging.kafka_consumer import KafkaConsumerClient
 from messaging.topics import KafkaTopics
 from agents.publishing_agent import PublishingAgent
 from utils.monitoring import monitor_performance
+from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main worker function"""
-    logger.info("Starting Publishing Worker")
-    
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the Publishing consumer with its handlers registered"""
     # Initialize consumer
-    consumer = KafkaConsumerClient([KafkaTopics.PUBLISHING])
+    consumer = KafkaConsumerClient([KafkaTopics.PUBLISHING], max_workers=max_workers)
     
     # Initialize agent
     agent = PublishingAgent()
@@ -32,7 +31,7 @@ def main():
     def handle_publishing_message(message):
         logger.info(f"Processing publishing message: {message}")
         try:
-            agent.process(message)
+            agent.process_once(message)
         except Exception as e:
             logger.error(f"Error processing publishing message: {str(e)}")
             
@@ -42,6 +41,14 @@ def main():
     
     consumer.register_handler(KafkaTopics.PUBLISHING, handle_publishing_message)
     
+    return consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting Publishing Worker")
+    
+    consumer = create_consumer()
+    
     # Start consuming
     logger.info("Starting to consume messages...")
     try:
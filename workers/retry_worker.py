@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Retry Worker
+Holds transiently failed messages on the retry tier topics and
+republishes them to their stage once the tier delay has elapsed
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messaging.retry import RetryRelay
+from typing import Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def create_consumer(max_workers: Optional[int] = None) -> RetryRelay:
+    """Build the retry relay (republishing is sequential, so max_workers is ignored)"""
+    return RetryRelay()
+
+def main():
+    """Main worker function"""
+    logger.info("Starting Retry Worker")
+    
+    relay = create_consumer()
+    
+    # Start consuming
+    logger.info("Starting to relay retries...")
+    try:
+        relay.start_consuming()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped by user")
+
+if __name__ == "__main__":
+    main()
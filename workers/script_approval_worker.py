@@ -9,11 +9,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from messaging.kafka_consumer import KafkaConsumerClient
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.kafka_producer import get_shared_producer
 from messaging.topics import KafkaTopics
 from database.repositories import PodcastRepository
 from services.approval_mixin import ApprovalMixin
+from services.email_service import retry_later
 from utils.config import config
+from typing import Optional
 import logging
 import time
 
@@ -21,55 +23,56 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ScriptApprovalWorker(ApprovalMixin):
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None):
         super().__init__()
-        self.consumer = KafkaConsumerClient([KafkaTopics.SCRIPT_APPROVAL])
-        self.producer = KafkaProducerClient()
+        self.consumer = KafkaConsumerClient([KafkaTopics.SCRIPT_APPROVAL], max_workers=max_workers)
+        self.producer = get_shared_producer()
         self.repo = PodcastRepository()
         # Get approval setting from config
         self.auto_approve = getattr(config, 'AUTO_APPROVE_SCRIPT', False)  # Changed default to False
 
-def main():
-    """Main worker function"""
-    logger.info("Starting Script Approval Worker")
-    
-    worker = ScriptApprovalWorker()
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the Script Approval consumer with its handlers registered"""
+    worker = ScriptApprovalWorker(max_workers=max_workers)
     
-    # Register message handler
-    def handle_approval_message(message):
+    # Per-message approval logic; status updates and handoffs are collected for the batch
+    def handle_approval_message(message, status_updates, handoffs):
         logger.info(f"Processing script approval message: {message}")
+        job_id = message.get("job_id")
         try:
-            job_id = message.get("job_id")
             script = message.get("script")
             brief = message.get("brief")
             
             logger.info(f"Processing script approval for job {job_id}")
             
             if worker.auto_approve:
-                # Auto-approve logic
-                time.sleep(2)
-                
                 logger.info(f"Auto-approving script for job {job_id}")
                 
-                # Send to TTS generation
-                worker.producer.send_message(KafkaTopics.TTS_GENERATION, {
+                # Send to TTS generation (after the status flush)
+                handoffs.append((KafkaTopics.TTS_GENERATION, {
                     "job_id": job_id,
                     "script": script,
-                    "voice_preference": brief.get("voice_preference", "professional_female")
-                })
+                    "voice_preference": brief.get("voice_preference", "professional_female"),
+                    "priority": message.get("priority") or brief.get("priority"),
+                    "deliver_by": message.get("deliver_by") or brief.get("deliver_by"),
+                    "tenant": message.get("tenant") or brief.get("tenant") or brief.get("user_email")
+                }))
                 
-                # Update status
-                worker.repo.update_job(job_id, {
+                # Update status (flushed once per batch)
+                status_updates[job_id] = {
                     "status": "TTS_GENERATION",
                     "script_approved": True  # NEW: Mark as approved
-                })
+                }
             else:
                 # Email approval logic
                 content_data = {"script": script, "brief": brief}
                 next_message = {
                     "job_id": job_id,
                     "script": script,
-                    "voice_preference": brief.get("voice_preference", "professional_female")
+                    "voice_preference": brief.get("voice_preference", "professional_female"),
+                    "priority": message.get("priority") or brief.get("priority"),
+                    "deliver_by": message.get("deliver_by") or brief.get("deliver_by"),
+                    "tenant": message.get("tenant") or brief.get("tenant") or brief.get("user_email")
                 }
                 status_update = {
                     "status": "TTS_GENERATION",
@@ -86,22 +89,57 @@ def main():
                 )
                 
         except Exception as e:
+            if retry_later(e):
+                raise
             logger.error(f"Error processing approval message: {str(e)}")
             # Update job status to failed
+            status_updates[job_id] = {
+                "status": "FAILED",
+                "error_message": f"Script approval failed: {str(e)}"
+            }
+    
+    # Register batch handler: one DB round-trip and one commit per batch
+    def handle_approval_batch(messages):
+        status_updates = {}
+        handoffs = []
+        
+        if worker.auto_approve:
+            # Auto-approve logic
+            time.sleep(2)
+        
+        deferred = None
+        for message in messages:
             try:
-                worker.repo.update_job(job_id, {
-                    "status": "FAILED",
-                    "error_message": f"Script approval failed: {str(e)}"
-                })
-            except Exception as db_error:
-                logger.error(f"Failed to update job status: {str(db_error)}")
+                handle_approval_message(message, status_updates, handoffs)
+            except Exception as e:
+                # SMTP is down: stop here and leave the batch uncommitted so it is delivered again
+                deferred = e
+                break
+        
+        # Write the statuses before handing off, so the next stage's own status update cannot be overwritten
+        try:
+            worker.repo.update_jobs(status_updates)
+        except Exception as db_error:
+            logger.error(f"Failed to update job statuses: {str(db_error)}")
+        for topic, next_message in handoffs:
+            worker.producer.send_message(topic, next_message)
+        if deferred is not None:
+            raise deferred
+    
+    worker.consumer.register_batch_handler(KafkaTopics.SCRIPT_APPROVAL, handle_approval_batch)
+    
+    return worker.consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting Script Approval Worker")
     
-    worker.consumer.register_handler(KafkaTopics.SCRIPT_APPROVAL, handle_approval_message)
+    consumer = create_consumer()
     
     # Start consuming
     logger.info("Starting to consume messages...")
     try:
-        worker.consumer.start_consuming()
+        consumer.start_consuming()
     except KeyboardInterrupt:
         logger.info("Worker stopped by user")
     except Exception as e:
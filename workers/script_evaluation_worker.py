@@ -9,19 +9,19 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from messaging.kafka_consumer import KafkaConsumerClient
+from messaging.ledger import regeneration
 from messaging.topics import KafkaTopics
 from evaluation.script_evaluator import ScriptEvaluator
+from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main worker function"""
-    logger.info("Starting Script Evaluation Worker")
-    
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the Script Evaluation consumer with its handlers registered"""
     # Initialize consumer
-    consumer = KafkaConsumerClient([KafkaTopics.SCRIPT_EVALUATION])
+    consumer = KafkaConsumerClient([KafkaTopics.SCRIPT_EVALUATION], max_workers=max_workers)
     
     # Initialize evaluator
     evaluator = ScriptEvaluator()
@@ -35,12 +35,20 @@ def main():
             outline = message.get("outline")
             brief = message.get("brief")
             
-            evaluator.evaluate(job_id, script, outline, brief)
+            evaluator.evaluate(job_id, script, outline, brief, regeneration(message))
         except Exception as e:
             logger.error(f"Error processing script evaluation message: {str(e)}")
     
     consumer.register_handler(KafkaTopics.SCRIPT_EVALUATION, handle_evaluation_message)
     
+    return consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting Script Evaluation Worker")
+    
+    consumer = create_consumer()
+    
     # Start consuming
     logger.info("Starting to consume messages...")
     consumer.start_consuming()
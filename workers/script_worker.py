@@ -11,17 +11,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from messaging.kafka_consumer import KafkaConsumerClient
 from messaging.topics import KafkaTopics
 from agents.script_agent import ScriptAgent
+from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main worker function"""
-    logger.info("Starting Script Generation Worker")
-    
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the Script Generation consumer with its handlers registered"""
     # Initialize consumer
-    consumer = KafkaConsumerClient([KafkaTopics.SCRIPT_GENERATION])
+    consumer = KafkaConsumerClient([KafkaTopics.SCRIPT_GENERATION], max_workers=max_workers)
     
     # Initialize agent
     agent = ScriptAgent()
@@ -30,12 +29,20 @@ def main():
     def handle_script_message(message):
         logger.info(f"Processing script generation message: {message}")
         try:
-            agent.process(message)
+            agent.process_once(message)
         except Exception as e:
             logger.error(f"Error processing script message: {str(e)}")
     
     consumer.register_handler(KafkaTopics.SCRIPT_GENERATION, handle_script_message)
     
+    return consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting Script Generation Worker")
+    
+    consumer = create_consumer()
+    
     # Start consuming
     logger.info("Starting to consume messages...")
     consumer.start_consuming()
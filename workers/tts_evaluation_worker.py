@@ -9,88 +9,111 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from messaging.kafka_consumer import KafkaConsumerClient
-from messaging.kafka_producer import KafkaProducerClient
+from messaging.kafka_producer import get_shared_producer
+from messaging.ledger import REGENERATION_FIELD, regeneration
 from messaging.topics import KafkaTopics
 from database.repositories import PodcastRepository
 from utils.monitoring import monitor_performance
+from typing import Optional
 import logging
 import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main worker function"""
-    logger.info("Starting TTS Evaluation Worker")
-    
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the TTS Evaluation consumer with its handlers registered"""
     # Initialize consumer and producer
-    consumer = KafkaConsumerClient([KafkaTopics.TTS_EVALUATION])
-    producer = KafkaProducerClient()
+    consumer = KafkaConsumerClient([KafkaTopics.TTS_EVALUATION], max_workers=max_workers)
+    producer = get_shared_producer()
     repo = PodcastRepository()
     
-    # Register message handler
+    def evaluate_audio(message):
+        """Evaluate a single TTS output"""
+        # Simulate TTS evaluation (in production, implement actual audio quality checks)
+        # Could check:
+        # - Audio duration vs expected
+        # - Audio quality metrics
+        # - Speech clarity
+        # - Proper pronunciation
+        time.sleep(3)
+        
+        # For now, assume evaluation passes
+        return True, 0.85
+    
+    # Register batch handler: one DB round-trip per batch instead of one per message
     @monitor_performance("tts_evaluation")
-    def handle_evaluation_message(message):
-        logger.info(f"Processing TTS evaluation message: {message}")
-        try:
+    def handle_evaluation_batch(messages):
+        logger.info(f"Processing {len(messages)} TTS evaluation messages")
+        status_updates = {}
+        handoffs = []
+        
+        for message in messages:
             job_id = message.get("job_id")
-            audio_url = message.get("audio_url")
-            script = message.get("script")
-            
-            logger.info(f"Evaluating TTS output for job {job_id}")
-            
-            # Simulate TTS evaluation (in production, implement actual audio quality checks)
-            # Could check:
-            # - Audio duration vs expected
-            # - Audio quality metrics
-            # - Speech clarity
-            # - Proper pronunciation
-            time.sleep(3)
-            
-            # For now, assume evaluation passes
-            evaluation_passed = True
-            evaluation_score = 0.85
-            
-            if evaluation_passed:
-                logger.info(f"TTS evaluation passed for job {job_id}")
-                
-                # Send to audio approval
-                producer.send_message(KafkaTopics.AUDIO_APPROVAL, {
-                    "job_id": job_id,
-                    "audio_url": audio_url,
-                    "script": script,
-                    "evaluation_score": evaluation_score
-                })
-                
-                # Update job status
-                repo.update_job(job_id, {
-                    "status": "AUDIO_APPROVAL",
-                    "tts_evaluation_score": evaluation_score
-                })
-            else:
-                logger.warning(f"TTS evaluation failed for job {job_id}")
+            try:
+                audio_url = message.get("audio_url")
+                script = message.get("script")
                 
-                # Send back to TTS generation for retry
-                producer.send_message(KafkaTopics.TTS_GENERATION, {
-                    "job_id": job_id,
-                    "script": script,
-                    "retry": True,
-                    "feedback": "TTS quality below threshold"
-                })
+                logger.info(f"Evaluating TTS output for job {job_id}")
+                evaluation_passed, evaluation_score = evaluate_audio(message)
                 
-        except Exception as e:
-            logger.error(f"Error processing TTS evaluation message: {str(e)}")
-            
-            # Update job status to failed
-            try:
-                repo.update_job(message.get("job_id"), {
+                if evaluation_passed:
+                    logger.info(f"TTS evaluation passed for job {job_id}")
+                    
+                    # Send to audio approval (after the status flush)
+                    handoffs.append((KafkaTopics.AUDIO_APPROVAL, {
+                        "job_id": job_id,
+                        "audio_url": audio_url,
+                        "script": script,
+                        "evaluation_score": evaluation_score,
+                        "priority": message.get("priority"),
+                        "deliver_by": message.get("deliver_by"),
+                        "tenant": message.get("tenant")
+                    }))
+                    
+                    status_updates[job_id] = {
+                        "status": "AUDIO_APPROVAL",
+                        "tts_evaluation_score": evaluation_score
+                    }
+                else:
+                    logger.warning(f"TTS evaluation failed for job {job_id}")
+                    
+                    # Send back to TTS generation for retry (after the status flush)
+                    handoffs.append((KafkaTopics.TTS_GENERATION, {
+                        "job_id": job_id,
+                        "script": script,
+                        "retry": True,
+                        "feedback": "TTS quality below threshold",
+                        REGENERATION_FIELD: regeneration(message) + 1,
+                        "priority": message.get("priority"),
+                        "deliver_by": message.get("deliver_by"),
+                        "tenant": message.get("tenant")
+                    }))
+                    
+            except Exception as e:
+                logger.error(f"Error processing TTS evaluation message: {str(e)}")
+                status_updates[job_id] = {
                     "status": "FAILED",
                     "error_message": f"TTS evaluation failed: {str(e)}"
-                })
-            except Exception as db_error:
-                logger.error(f"Failed to update job status: {str(db_error)}")
+                }
+        
+        # Write the statuses before handing off, so the next stage's own status update cannot be overwritten
+        try:
+            repo.update_jobs(status_updates)
+        except Exception as db_error:
+            logger.error(f"Failed to update job statuses: {str(db_error)}")
+        for topic, next_message in handoffs:
+            producer.send_message(topic, next_message)
+    
+    consumer.register_batch_handler(KafkaTopics.TTS_EVALUATION, handle_evaluation_batch)
+    
+    return consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting TTS Evaluation Worker")
     
-    consumer.register_handler(KafkaTopics.TTS_EVALUATION, handle_evaluation_message)
+    consumer = create_consumer()
     
     # Start consuming
     logger.info("Starting to consume messages...")
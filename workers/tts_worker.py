@@ -11,17 +11,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from messaging.kafka_consumer import KafkaConsumerClient
 from messaging.topics import KafkaTopics
 from agents.tts_agent import TTSAgent
+from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main worker function"""
-    logger.info("Starting TTS Generation Worker")
-    
+def create_consumer(max_workers: Optional[int] = None) -> KafkaConsumerClient:
+    """Build the TTS Generation consumer with its handlers registered"""
     # Initialize consumer
-    consumer = KafkaConsumerClient([KafkaTopics.TTS_GENERATION])
+    consumer = KafkaConsumerClient([KafkaTopics.TTS_GENERATION], max_workers=max_workers)
     
     # Initialize agent
     agent = TTSAgent()
@@ -30,12 +29,20 @@ def main():
     def handle_tts_message(message):
         logger.info(f"Processing TTS generation message: {message}")
         try:
-            agent.process(message)
+            agent.process_once(message)
         except Exception as e:
             logger.error(f"Error processing TTS message: {str(e)}")
     
     consumer.register_handler(KafkaTopics.TTS_GENERATION, handle_tts_message)
     
+    return consumer
+
+def main():
+    """Main worker function"""
+    logger.info("Starting TTS Generation Worker")
+    
+    consumer = create_consumer()
+    
     # Start consuming
     logger.info("Starting to consume messages...")
     consumer.start_consuming()